@@ -0,0 +1,276 @@
+# dksalaries/benchmarks/bench.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""bench.py: hot-path benchmarks over the bundled fixtures and a synthetic lobby
+
+Each case records the best per-call time over several repeats and the
+peak traced memory of one call. Results are compared against
+benchmarks/baseline.json. Times are compared relative to a reference
+workload, plain json work that does not touch dksalaries, timed in
+the same run, so a baseline recorded on a faster or slower machine
+still applies. Timings stay noisy across machines, so the time check is
+opt-in; peak memory is always compared.
+
+Usage:
+
+    python benchmarks/bench.py               # compare memory against baseline
+    python benchmarks/bench.py --check-time  # and times, relative to the reference
+    python benchmarks/bench.py --save        # record new baseline
+    python -m pytest benchmarks              # same comparison as tests
+
+    DKSALARIES_BENCH_TIME_THRESHOLD=0.25 python -m pytest benchmarks   # with times
+
+"""
+import argparse
+import datetime
+import gc
+import json
+from pathlib import Path
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from dksalaries import Parser
+from dksalaries.history import SalaryHistory
+from dksalaries.lateswap import LateSwapTracker
+from dksalaries.pool import StatMatrix
+from dksalaries.portfolio import Portfolio
+from dksalaries.rules import RulesRegistry
+from dksalaries.simulate import ContestSimulator, payout_table
+from dksalaries.synthetic import LobbyGenerator
+from dksalaries.util import camel_to_snake, parse_dktime
+
+
+DATA_DIR = ROOT / 'tests' / 'data'
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+CASE_NAMES = (
+  'parser_draftables',
+  'parser_getcontests',
+  'parser_getcontests_sections',
+  'parser_getcontests_incremental',
+  'classic_slates',
+  'calendar',
+  'find_contest',
+  'find_main_slate',
+  'player_salaries',
+  'contests_frame',
+  'stat_matrix',
+  'salary_history',
+  'pool_query',
+  'lateswap',
+  'simulate',
+  'portfolio',
+  'validate_lineups',
+  'parse_dktime',
+  'camel_to_snake',
+  'synthetic_getcontests',
+  'synthetic_draftables',
+)
+
+# size of the synthetic lobby, roughly a busy NFL sunday
+SYNTHETIC_CONTESTS = 5000
+SYNTHETIC_GAME_SETS = 30
+
+# machine speed yardstick, timed with every run but never a regression itself
+REFERENCE = 'reference'
+
+# allowed slowdown / memory growth over baseline before failing
+TIME_THRESHOLD = 0.25
+MEMORY_THRESHOLD = 0.25
+
+
+def _fixture(name: str) -> dict:
+    return json.loads((DATA_DIR / name).read_text())
+
+
+def _reference(text: str) -> Any:
+    """Fixed work that stands in for machine speed"""
+    data = json.loads(text)
+    return sorted(k for c in data['Contests'] for k in c)
+
+
+def build_cases() -> Dict[str, Tuple[Callable[[], Any], Callable[[Any], Any]]]:
+    """Builds cases as name: (setup, func), func receives the setup result"""
+    p = Parser()
+    draftables = _fixture('draftables.json')
+    getcontests = _fixture('getcontests.json')
+    gcd = p.getcontests(getcontests)
+    ddoc = p.draftables(draftables)
+    tracked = p.getcontests(getcontests, track=True)
+    # about 1% of contests change between polls, plus entrant counts everywhere
+    churned = json.loads(json.dumps(getcontests))
+    for i, c in enumerate(churned['Contests']):
+        c['nt'] += 1
+        if i % 100 == 0:
+            c['n'] += ' (updated)'
+    churned_draftables = json.loads(json.dumps(draftables))
+    for i, pl in enumerate(churned_draftables['draftables']):
+        if i % 10 == 0:
+            pl['salary'] += 100
+    churned_ddoc = p.draftables(churned_draftables)
+    sim = ContestSimulator(ddoc)
+    payouts = payout_table(p.contest_detail(_fixture('contest.json')))
+    ids = [pl.draftable_id for pl in ddoc.draftables]
+    sim_lineups = [ids[i:i + 9] for i in range(0, 150 * 9, 9)]
+    sim_field = [[ids[(i + j) % len(ids)] for j in range(9)] for i in range(0, 2000 * 7, 7)]
+    validator = RulesRegistry().validator(ddoc, 1)
+    random_lineups = validator.pool.arrays['draftable_id'][(np.arange(100000 * 9) * 7919 % len(ids)).reshape(-1, 9)]
+    gen = LobbyGenerator(seed=1)
+    lobby = gen.getcontests(SYNTHETIC_CONTESTS, SYNTHETIC_GAME_SETS)
+    main_slate = gen.draftables(lobby, lobby['DraftGroups'][0]['DraftGroupId'])
+
+    def fresh_gcd():
+        gcd.__dict__.pop('classic_slates', None)
+        gcd.__dict__.pop('calendar', None)
+        for gs in gcd.game_sets:
+            gs.__dict__.pop('start_end_time', None)
+            gs.__dict__.pop('slate_teams', None)
+        return gcd
+
+    return {
+        'parser_draftables': (lambda: draftables, p.draftables),
+        'parser_getcontests': (lambda: getcontests, p.getcontests),
+        'parser_getcontests_incremental': (lambda: churned, lambda o: p.getcontests(o, previous=tracked)),
+        'parser_getcontests_sections': (lambda: getcontests, lambda o: p.getcontests(o, sections=['draft_groups', 'game_sets'])),
+        'classic_slates': (fresh_gcd, lambda o: o.classic_slates),
+        'calendar': (fresh_gcd, lambda o: o.calendar.next_to_lock(datetime.datetime(2021, 9, 12, 14))),
+        'find_contest': (lambda: gcd, lambda o: o.find_contest({'n': ('like', 'Million'), 'a': ('lte', 20)})),
+        'find_main_slate': (lambda: gcd, lambda o: o.find_main_slate()),
+        'player_salaries': (lambda: ddoc, lambda o: o.player_salaries()),
+        'contests_frame': (lambda: gcd, lambda o: o.to_frame()),
+        'stat_matrix': (lambda: ddoc, StatMatrix.from_document),
+        'salary_history': (lambda: (ddoc, churned_ddoc), lambda o: SalaryHistory(o).diff(changed_only=True)),
+        'pool_query': (lambda: ddoc.pool, lambda o: o.query("position in ('RB', 'WR') and salary between 4000 and 6000 and status != 'O'")),
+        'lateswap': (lambda: ddoc, lambda o: LateSwapTracker(o, now=datetime.datetime(2021, 9, 12, 13, 30)).alternatives(67, 6000)),
+        'simulate': (lambda: sim_lineups, lambda o: sim.simulate(o, payouts, field=sim_field, iterations=2000, seed=1)),
+        'portfolio': (lambda: sim_field, lambda o: Portfolio(ddoc, o).overlap_distribution()),
+        'validate_lineups': (lambda: random_lineups, validator.check),
+        'parse_dktime': (lambda: None, lambda _: [parse_dktime(s) for s in ('2021-09-12T17:00:00.0000000Z', '/Date(1631233200000)/') * 500]),
+        'camel_to_snake': (lambda: None, lambda _: [camel_to_snake(k) for k in getcontests['Contests'][0]] * 100),
+        'synthetic_getcontests': (lambda: lobby, p.getcontests),
+        'synthetic_draftables': (lambda: main_slate, p.draftables),
+        REFERENCE: (lambda: (DATA_DIR / 'getcontests.json').read_text(), _reference),
+    }
+
+
+def measure(setup: Callable[[], Any], func: Callable[[Any], Any], repeat: int = 5) -> Dict[str, float]:
+    """Measures best time per call and peak memory of one call
+
+    Args:
+        setup (Callable): builds the argument, not timed
+        func (Callable): the timed function
+        repeat (int): the number of timed runs, default 5
+
+    Returns:
+        Dict[str, float]: keys 'time' (seconds) and 'peak' (bytes)
+
+    """
+    times = []
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        times.append(timeit.timeit(lambda: func(arg), number=1))
+    arg = setup()
+    gc.collect()
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'time': min(times), 'peak': peak}
+
+
+def run(names=None, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Runs the named cases, default all, and always the reference"""
+    cases = build_cases()
+    names = list(names or CASE_NAMES)
+    return {name: measure(*cases[name], repeat=repeat) for name in names + [REFERENCE] if name in cases}
+
+
+def load_baseline(path: Path = BASELINE) -> Dict[str, Dict[str, float]]:
+    """Loads baseline results, empty if none recorded"""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())['results']
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], path: Path = BASELINE) -> None:
+    """Saves results as baseline"""
+    data = {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'results': results}
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + '\n')
+
+
+def regressions(results: Dict[str, Dict[str, float]],
+                baseline: Dict[str, Dict[str, float]],
+                time_threshold: float = TIME_THRESHOLD,
+                memory_threshold: float = MEMORY_THRESHOLD) -> Dict[str, str]:
+    """Compares results to baseline
+
+    Times are scaled by the ratio of the reference times, and are not
+    compared without a time_threshold or unless both results and
+    baseline have a reference.
+
+    Args:
+        results (Dict[str, Dict[str, float]]): the current results
+        baseline (Dict[str, Dict[str, float]]): the baseline results
+        time_threshold (float): allowed fractional slowdown, None skips times, default TIME_THRESHOLD
+        memory_threshold (float): allowed fractional peak memory growth, default MEMORY_THRESHOLD
+
+    Returns:
+        Dict[str, str]: key is case name, value describes the regression
+
+    """
+    failed = {}
+    speed = None
+    if time_threshold is not None and results.get(REFERENCE) and baseline.get(REFERENCE):
+        speed = results[REFERENCE]['time'] / baseline[REFERENCE]['time']
+    for name, res in results.items():
+        base = baseline.get(name)
+        if not base or name == REFERENCE:
+            continue
+        if speed is not None and res['time'] > base['time'] * speed * (1 + time_threshold):
+            failed[name] = f"time {res['time']:.6f}s vs baseline {base['time'] * speed:.6f}s (scaled {speed:.2f}x)"
+        elif res['peak'] > base['peak'] * (1 + memory_threshold):
+            failed[name] = f"peak {res['peak']:,} bytes vs baseline {base['peak']:,} bytes"
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='dksalaries benchmarks')
+    parser.add_argument('cases', nargs='*', help='case names, default all')
+    parser.add_argument('--save', action='store_true', help='record results as baseline')
+    parser.add_argument('--check-time', action='store_true', help='also fail on slowdowns relative to the reference')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--time-threshold', type=float, default=TIME_THRESHOLD)
+    parser.add_argument('--memory-threshold', type=float, default=MEMORY_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.repeat)
+    baseline = load_baseline()
+    speed = results[REFERENCE]['time'] / baseline[REFERENCE]['time'] if REFERENCE in baseline else 1
+    for name, res in results.items():
+        base = baseline.get(name, {})
+        ratio = f"{res['time'] / (base['time'] * speed):6.2f}x" if base else '     -'
+        print(f"{name:>20}: {res['time'] * 1000:10.3f} ms {ratio}  peak {res['peak'] / 1024:10.1f} KiB")
+    if args.save:
+        save_baseline({**baseline, **results})
+        return 0
+    time_threshold = args.time_threshold if args.check_time else None
+    failed = regressions(results, baseline, time_threshold, args.memory_threshold)
+    for name, msg in failed.items():
+        print(f'REGRESSION {name}: {msg}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
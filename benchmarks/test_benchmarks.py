@@ -0,0 +1,48 @@
+# dksalaries/benchmarks/test_benchmarks.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""Fails when a hot path regresses beyond threshold, run with: pytest benchmarks
+
+Peak memory is always checked. Times are checked, relative to the
+reference workload, only when DKSALARIES_BENCH_TIME_THRESHOLD is set.
+
+"""
+
+import os
+
+import pytest
+
+import bench
+
+
+TIME_THRESHOLD = os.environ.get('DKSALARIES_BENCH_TIME_THRESHOLD')
+TIME_THRESHOLD = float(TIME_THRESHOLD) if TIME_THRESHOLD else None
+MEMORY_THRESHOLD = float(os.environ.get('DKSALARIES_BENCH_MEMORY_THRESHOLD', bench.MEMORY_THRESHOLD))
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    return bench.load_baseline()
+
+
+@pytest.fixture(scope='module')
+def cases():
+    return bench.build_cases()
+
+
+@pytest.fixture(scope='module')
+def reference(cases):
+    return bench.measure(*cases[bench.REFERENCE])
+
+
+@pytest.mark.parametrize('name', bench.CASE_NAMES)
+def test_benchmark(name, cases, baseline, reference, tprint):
+    """Compares case against baseline, times relative to the reference workload"""
+    if name not in baseline:
+        pytest.skip(f'no baseline for {name}, run: python benchmarks/bench.py --save')
+    res = {name: bench.measure(*cases[name]), bench.REFERENCE: reference}
+    tprint(f"{name}: {res[name]['time'] * 1000:.3f} ms, peak {res[name]['peak']:,} bytes")
+    failed = bench.regressions(res, baseline, TIME_THRESHOLD, MEMORY_THRESHOLD)
+    assert not failed, failed[name]
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+import sys
+
+import pytest
+
+
+@pytest.fixture()
+def tprint(request, capsys):
+    """Fixture for printing info after test, not supressed by pytest stdout/stderr capture"""
+    lines = []
+    yield lines.append
+
+    with capsys.disabled():
+        for line in lines:
+            sys.stdout.write("\n{}".format(line))
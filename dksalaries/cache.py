@@ -0,0 +1,257 @@
+# dksalaries/dksalaries/cache.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""cache.py: parsed-document cache keyed by payload hash
+
+Example:
+
+    p = Parser(cache=DocumentCache('~/.cache/dksalaries'))
+    ddoc = p.draftables(s.draftables(53019))   # miss: parsed and stored
+    ddoc = p.draftables(s.draftables(53019))   # hit: no parsing
+
+"""
+import collections
+import copy
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Union
+import zlib
+
+import attr
+
+from . import documents
+from .util import lazy_import
+
+try:
+    msgpack = lazy_import('msgpack')
+except ImportError:
+    msgpack = None
+
+
+# bump when the encoding itself changes
+CACHE_VERSION = 1
+
+# type(obj) rather than isinstance so lazily imported modules stay unloaded
+DOCUMENT_CLASSES = {name: obj for name, obj in vars(documents).items()
+                    if type(obj) is type and attr.has(obj)}
+
+CLS_KEY = '__cls__'
+
+
+def schema_version() -> str:
+    """Fingerprints the document class definitions
+
+    Any added, removed, renamed or retyped field changes the fingerprint,
+    which invalidates every cached entry.
+
+    Args:
+        None
+
+    Returns:
+        str
+
+    """
+    parts = [str(CACHE_VERSION)]
+    for name in sorted(DOCUMENT_CLASSES):
+        fields = attr.fields(DOCUMENT_CLASSES[name])
+        parts.append(name + ':' + ','.join(f'{f.name}={f.type}' for f in fields))
+    return hashlib.blake2b('|'.join(parts).encode(), digest_size=8).hexdigest()
+
+
+def payload_bytes(data: Union[bytes, str, dict]) -> bytes:
+    """Gets the bytes of a raw payload for hashing
+
+    Args:
+        data (Union[bytes, str, dict]): the raw or decoded payload
+
+    Returns:
+        bytes
+
+    """
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, str):
+        return data.encode()
+    return json.dumps(data, separators=(',', ':')).encode()
+
+
+def pack_document(obj: Any) -> Any:
+    """Encodes document as nested lists of field values in attrs order
+
+    Args:
+        obj (Any): the document
+
+    Returns:
+        Any
+
+    """
+    if attr.has(type(obj)):
+        return {CLS_KEY: type(obj).__name__,
+                'v': [pack_document(getattr(obj, f.name)) for f in attr.fields(type(obj))]}
+    if isinstance(obj, (list, tuple)):
+        return [pack_document(item) for item in obj]
+    return obj
+
+
+def unpack_document(obj: Any) -> Any:
+    """Decodes output of pack_document
+
+    Args:
+        obj (Any): the encoded document
+
+    Returns:
+        Any
+
+    """
+    if isinstance(obj, dict) and CLS_KEY in obj:
+        return DOCUMENT_CLASSES[obj[CLS_KEY]](*[unpack_document(v) for v in obj['v']])
+    if isinstance(obj, list):
+        return [unpack_document(item) for item in obj]
+    return obj
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes document to compact bytes (msgpack, else compressed json)"""
+    packed = pack_document(obj)
+    if msgpack is not None:
+        return msgpack.packb(packed, use_bin_type=True)
+    return zlib.compress(json.dumps(packed, separators=(',', ':')).encode())
+
+
+def loads(b: bytes) -> Any:
+    """Deserializes output of dumps"""
+    if msgpack is not None:
+        return unpack_document(msgpack.unpackb(b, raw=False, strict_map_key=False))
+    return unpack_document(json.loads(zlib.decompress(b)))
+
+
+class DocumentCache:
+    """Two-level (in-process LRU and disk) cache of parsed documents
+
+    Entries are keyed by a hash of the raw payload, the document kind and
+    the schema version, so changing a document class invalidates old entries.
+    Every caller gets its own shallow copy of a cached document: setting a
+    field such as selected_sport does not leak to other callers, but the
+    record lists are shared and must not be modified in place.
+
+    """
+    def __init__(self, path: Union[str, Path] = None, maxsize: int = 64):
+        """Creates cache
+
+        Args:
+            path (Union[str, Path]): the cache directory, default None (memory only)
+            maxsize (int): maximum documents in the LRU, default 64
+
+        """
+        self.path = Path(path).expanduser() if path else None
+        if self.path:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self.maxsize = maxsize
+        self.version = schema_version()
+        self.hits = 0
+        self.misses = 0
+        self._lru = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def extension(self) -> str:
+        return 'msgpack' if msgpack is not None else 'json.z'
+
+    def key(self, kind: str, data: Union[bytes, str, dict]) -> str:
+        """Hashes payload into cache key
+
+        Args:
+            kind (str): the document kind, e.g. 'draftables'
+            data (Union[bytes, str, dict]): the raw or decoded payload
+
+        Returns:
+            str
+
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f'{self.version}:{kind}:'.encode())
+        h.update(payload_bytes(data))
+        return h.hexdigest()
+
+    def _file(self, key: str) -> Path:
+        return self.path / f'{key}.{self.extension}'
+
+    def get(self, key: str) -> Any:
+        """Gets document from LRU, then disk
+
+        Args:
+            key (str): the cache key
+
+        Returns:
+            Any: a copy of the document or None
+
+        """
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return copy.copy(self._lru[key])
+        if self.path:
+            fn = self._file(key)
+            try:
+                obj = loads(fn.read_bytes())
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logging.getLogger(__name__).warning(f'dropping unreadable cache entry {fn}: {e}')
+                fn.unlink(missing_ok=True)
+            else:
+                self._remember(key, obj)
+                with self._lock:
+                    self.hits += 1
+                return obj
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, obj: Any) -> None:
+        """Adds document to LRU and disk
+
+        Args:
+            key (str): the cache key
+            obj (Any): the document
+
+        Returns:
+            None
+
+        """
+        self._remember(key, obj)
+        if self.path:
+            fn = self._file(key)
+            tmp = fn.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp.write_bytes(dumps(obj))
+            os.replace(tmp, fn)
+
+    def _remember(self, key: str, obj: Any) -> None:
+        # the LRU keeps its own copy, later changes to obj are not seen
+        obj = copy.copy(obj)
+        with self._lock:
+            self._lru[key] = obj
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all entries from LRU and disk"""
+        with self._lock:
+            self._lru.clear()
+        if self.path:
+            for fn in self.path.glob('*.msgpack'):
+                fn.unlink(missing_ok=True)
+            for fn in self.path.glob('*.json.z'):
+                fn.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Gets hit/miss counts"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._lru)}
@@ -4,6 +4,9 @@
 # Licensed under the MIT License
 
 
+DEFAULT_SPORTS = ('NFL', 'MLB', 'NBA', 'NHL')
+
+
 MLB_GAMETYPES = {
   2: 'Classic',
   114: 'Showdown Captain Mode',
@@ -12,6 +15,17 @@ MLB_GAMETYPES = {
   178: 'Snake'
 }
 
+NBA_GAMETYPES = {
+  70: 'Classic',
+  81: 'Showdown Captain Mode',
+  73: 'Tiers',
+}
+
+NHL_GAMETYPES = {
+  125: 'Classic',
+  126: 'Showdown Captain Mode',
+}
+
 NFL_GAMETYPES = {
   1: 'Classic',
   96: 'Showdown Captain Mode',
@@ -47,3 +61,39 @@ SPORTS = {
   25: 'Defense of the Ancient 2',
   26: 'Valorant'
 }
+
+# DK lobby abbreviation -> SPORTS key
+SPORT_IDS = {
+  'NFL': 1,
+  'MLB': 2,
+  'NHL': 3,
+  'NBA': 4,
+  'CFB': 5,
+  'CBB': 6,
+  'MMA': 9,
+  'NAS': 10,
+  'LOL': 11,
+  'SOC': 12,
+  'GOLF': 13,
+  'CFL': 14,
+  'TEN': 16,
+  'XFL': 18,
+}
+
+# SPORTS key -> game type table
+SPORT_GAMETYPES = {
+  1: NFL_GAMETYPES,
+  2: MLB_GAMETYPES,
+  3: NHL_GAMETYPES,
+  4: NBA_GAMETYPES,
+}
+
+# main slate rules, times are America/New_York
+# weekday is datetime.weekday(), None matches any day
+# end_hour is the start hour of the latest game, None is not checked
+MAIN_SLATE_RULES = {
+  'NFL': {'weekday': 6, 'start_hour': 13, 'end_hour': 16},
+  'MLB': {'weekday': None, 'start_hour': 19, 'end_hour': None},
+  'NBA': {'weekday': None, 'start_hour': 19, 'end_hour': None},
+  'NHL': {'weekday': None, 'start_hour': 19, 'end_hour': None},
+}
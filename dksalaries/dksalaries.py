@@ -20,21 +20,113 @@ Example:
     sals = {i['name]: i['salary] for i in pool}
 
 """
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import functools
+import json
 import logging
-from typing import Container, List
-
-import browser_cookie3
-import cattr
-
-try:
-    import requests_cache
-except:
-    import requests
+import pickle
+import threading
+from typing import Any, Callable, Container, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
 
+from . import metrics
+from .cache import DocumentCache, payload_bytes
 from .constants import *
 from .documents import *
 from .util import *
 
+# scraping dependencies are only loaded when a Scraper is created
+browser_cookie3 = lazy_import('browser_cookie3')
+cattr = lazy_import('cattr')
+requests = lazy_import('requests')
+
+try:
+    requests_cache = lazy_import('requests_cache')
+except ImportError:
+    requests_cache = None
+
+
+HEADERS = {
+  'Connection': 'keep-alive',
+  'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64)',
+  'DNT': '1',
+  'Accept': '*/*',
+  'Origin': 'https://www.draftkings.com',
+  'Sec-Fetch-Site': 'same-site',
+  'Sec-Fetch-Mode': 'cors',
+  'Sec-Fetch-Dest': 'empty',
+  'Referer': 'https://www.draftkings.com/',
+  'Accept-Language': 'en-US,en;q=0.9,ar;q=0.8',
+}
+
+# hosts with a connection pool: draftkings.com, api.draftkings.com and spares
+POOL_CONNECTIONS = 4
+
+# ms a cache write waits for another connection's write before failing
+CACHE_BUSY_TIMEOUT = 30000
+
+# api key: document field for contest detail and draft group resources
+CONTEST_DETAIL_FIELDS = {
+  'contestKey': 'tournament_key',
+  'name': 'name',
+  'draftGroupId': 'draft_group_id',
+  'sortOrder': 'sort_order',
+  'entries': 'entrants',
+  'attributes': 'contest_attributes',
+  'maximumEntries': 'maximum_entries',
+  'maximumEntriesPerUser': 'maximum_entries_per_user',
+  'entryFee': 'entry_fee',
+  'acceptedTickets': 'accepted_tickets',
+  'totalPayouts': 'total_payouts',
+  'payoutDescriptions': 'payout_descriptions',
+  'fppAward': 'fpp_award',
+  'crownAmount': 'crown_amount',
+  'ticketOnlyEntry': 'ticket_only_entry',
+  'contestStartTime': 'start_time',
+  'gameSetKey': 'game_set_key',
+  'gameTypeId': 'game_type_id',
+  'sport': 'sport',
+  'contestState': 'contest_state',
+}
+
+DRAFTGROUP_FIELDS = {
+  'draftGroupId': 'draft_group_id',
+  'minStartTime': 'start_date',
+  'gameTypeId': 'game_type_id',
+  'games': 'games',
+  'draftGroupSeries': 'draft_group_series_id',
+  'allowUgc': 'allow_ugc',
+  'startTimeType': 'start_time_type',
+  'maxStartTime': 'max_start_time',
+  'draftGroupState': 'draft_group_state',
+}
+
+# Parser methods that parse_many can run in worker processes
+PARSE_MANY_KINDS = ('draftables', 'getcontests', 'contest_detail', 'draftgroup')
+
+# record key of each getcontests section, for incremental parsing
+RECORD_KEYS = {
+  'contests': 'id',
+  'tournaments': 'TournamentKey',
+  'draft_groups': 'DraftGroupId',
+  'game_sets': 'GameSetKey',
+  'game_types': 'GameTypeId',
+}
+
+# snake-case fields every getcontests projection keeps: record keys and required fields
+PROJECTION_KEYS = {
+  'contests': frozenset(['id']),
+  'tournaments': frozenset(['tournament_key']),
+  'draft_groups': frozenset(['draft_group_id']),
+  'game_sets': frozenset(['game_set_key']),
+  'game_types': frozenset(['game_type_id', 'sport_id', 'name']),
+}
+
+# fields that change between polls without changing the record, e.g. entrants
+VOLATILE_FIELDS = {
+  'contests': frozenset(['nt']),
+  'tournaments': frozenset(['Entrants']),
+}
+
 
 class Scraper:
     """Scrape DK site for data
@@ -47,25 +139,163 @@ class Scraper:
         dt = s.draftables(dgid)
 
     """
-    def __init__(self):
-        try:
-            self.s = requests_cache.CachedSession('dksalaries_scraper')
-        except:
-            self.s = requests.Session()
-            
-        self.s.headers.update({
-            'Connection': 'keep-alive',
-            'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64)',
-            'DNT': '1',
-            'Accept': '*/*',
-            'Origin': 'https://www.draftkings.com',
-            'Sec-Fetch-Site': 'same-site',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Dest': 'empty',
-            'Referer': 'https://www.draftkings.com/',
-            'Accept-Language': 'en-US,en;q=0.9,ar;q=0.8',
-        })
-        self.s.cookies = browser_cookie3.firefox()
+    def __init__(self,
+                 max_workers: int = 8,
+                 thread_safe: bool = False,
+                 pool_maxsize: int = None,
+                 pool_block: bool = False,
+                 cache_name: str = 'dksalaries_scraper'):
+        """Creates Scraper
+
+        Args:
+            max_workers (int): size of the shared pool for batch fetches, default 8
+            thread_safe (bool): one session and sqlite connection per thread, for sharing
+                the scraper across worker threads, default False
+            pool_maxsize (int): keep-alive connections per host, default None (max_workers, at least 10)
+            pool_block (bool): wait for a free connection instead of opening extra
+                ones past pool_maxsize, default False
+            cache_name (str): the http cache name, default 'dksalaries_scraper'
+
+        """
+        self._setup_fetch(max_workers)
+        self._setup_sessions(thread_safe, pool_maxsize, pool_block, cache_name, browser_cookie3.firefox())
+
+    def _setup_sessions(self,
+                        thread_safe: bool = False,
+                        pool_maxsize: int = None,
+                        pool_block: bool = False,
+                        cache_name: str = 'dksalaries_scraper',
+                        cookies: Any = None) -> None:
+        """Sets up the shared connection pool and the first session
+
+        Every session mounts the same HTTPAdapter, so all threads draw
+        on one connection pool per host. In thread-safe mode each thread
+        gets its own session and its own connection to the http cache,
+        which runs in WAL mode so readers never wait on the writer.
+
+        """
+        self.thread_safe = thread_safe
+        self.cache_name = cache_name
+        self._cookies = cookies
+        self._adapter = requests.adapters.HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                                                      pool_maxsize=pool_maxsize or max(self.max_workers, 10),
+                                                      pool_block=pool_block)
+        self.s = self._local.session = self._new_session()
+        self._sessions = [self.s]
+
+    def _new_session(self, wal: bool = False) -> 'requests.Session':
+        if requests_cache is None:
+            s = requests.Session()
+        elif wal or self.thread_safe:
+            backend = requests_cache.SQLiteCache(self.cache_name, wal=True, busy_timeout=CACHE_BUSY_TIMEOUT)
+            s = requests_cache.CachedSession(backend=backend)
+        else:
+            s = requests_cache.CachedSession(self.cache_name)
+        s.headers.update(HEADERS)
+        s.mount('https://', self._adapter)
+        s.mount('http://', self._adapter)
+        if self._cookies is not None:
+            s.cookies.update(self._cookies)
+        return s
+
+    def _session(self) -> 'requests.Session':
+        """Gets the session of the calling thread
+
+        Outside thread-safe mode callers share one session, but threads
+        of the fetch pools always get their own: a CachedSession is not
+        thread-safe.
+
+        """
+        s = getattr(self._local, 'session', None)
+        if s is None:
+            pooled = getattr(self._local, 'pooled', False)
+            if not pooled and not self.thread_safe:
+                return self.s
+            s = self._local.session = self._new_session(wal=pooled)
+            sessions = getattr(self._local, 'sessions', None)
+            with self._fetch_lock:
+                (self._sessions if sessions is None else sessions).append(s)
+        return s
+
+    def _pool_thread(self, sessions: List = None) -> None:
+        """Executor initializer, marks a pool thread for its own session
+
+        Args:
+            sessions (List): collects the thread's session, default None (the scraper's)
+
+        """
+        self._local.pooled = True
+        self._local.sessions = sessions
+
+    def _setup_fetch(self, max_workers: int = 8) -> None:
+        """Sets up the shared pool, in-flight table and result cache for batch fetches"""
+        self.max_workers = max_workers
+        self._executor = None
+        self._fetch_lock = threading.RLock()
+        self._local = threading.local()
+        self._inflight = {}
+        self._fetched = {}
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._fetch_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dksalaries-fetch',
+                                                    initializer=self._pool_thread)
+            return self._executor
+
+    def close(self) -> None:
+        """Shuts down the shared fetch pool and closes the sessions"""
+        with self._fetch_lock:
+            executor, self._executor = self._executor, None
+            sessions, self._sessions = getattr(self, '_sessions', []), []
+        if executor is not None:
+            executor.shutdown()
+        for s in sessions:
+            s.close()
+
+    def _fetch_done(self, key: Tuple[str, int], future) -> None:
+        with self._fetch_lock:
+            self._inflight.pop(key, None)
+            if not future.cancelled() and future.exception() is None:
+                self._fetched[key] = future.result()
+
+    def _fetch_many(self, kind: str, ids: Iterable[int], fetch: Callable[[int], dict], refresh: bool = False) -> Dict[int, dict]:
+        """Fetches ids on the shared pool
+
+        Results are cached per (kind, id). A request for an id that is
+        already being fetched, by this or another thread, waits on the
+        same future instead of issuing a second request.
+
+        Args:
+            kind (str): the resource kind, part of the cache key
+            ids (Iterable[int]): the resource ids
+            fetch (Callable[[int], dict]): fetches one id
+            refresh (bool): ignore cached results, default False
+
+        Returns:
+            Dict[int, dict]: key is id, in request order
+
+        """
+        ids = list(dict.fromkeys(ids))
+        results, futures = {}, {}
+        with self._fetch_lock:
+            for i in ids:
+                key = (kind, i)
+                if not refresh and key in self._fetched:
+                    metrics.count('scraper.fetch', kind=kind, result='cached')
+                    results[i] = self._fetched[key]
+                    continue
+                future = self._inflight.get(key)
+                if future is None:
+                    metrics.count('scraper.fetch', kind=kind, result='new')
+                    future = self._inflight[key] = self._pool().submit(fetch, i)
+                    future.add_done_callback(functools.partial(self._fetch_done, key))
+                else:
+                    metrics.count('scraper.fetch', kind=kind, result='joined')
+                futures[i] = future
+        for i, future in futures.items():
+            results[i] = future.result()
+        return {i: results[i] for i in ids}
 
     @property
     def api_url(self):
@@ -75,20 +305,85 @@ class Scraper:
     def base_params(self):
         return {'format': 'json'}
 
-    def draftables(self, dgid):
+    def draftables(self, dgid, raw=False):
         """
         Gets draftables JSON
 
         Args:
             dgid(int): draftgroup ID
+            raw(bool): return undecoded bytes, default False
 
         Returns:
             dict
 
         """
         url = self.api_url + f'draftgroups/v1/draftgroups/{dgid}/draftables?'
+        if raw:
+            return self.get_json(url, params=self.base_params, response_object=True).content
+        return self.get_json(url, params=self.base_params)
+
+    def contest_detail(self, contest_id, raw=False):
+        """
+        Gets contest detail JSON
+
+        Args:
+            contest_id(int): contest ID
+            raw(bool): return undecoded bytes, default False
+
+        Returns:
+            dict
+
+        """
+        url = self.api_url + f'contests/v1/contests/{contest_id}'
+        if raw:
+            return self.get_json(url, params=self.base_params, response_object=True).content
         return self.get_json(url, params=self.base_params)
 
+    def contests_detail(self, contest_ids: Iterable[int], refresh: bool = False) -> Dict[int, dict]:
+        """
+        Gets contest detail JSON for many contests concurrently
+
+        Args:
+            contest_ids(Iterable[int]): contest IDs
+            refresh(bool): refetch cached contests, default False
+
+        Returns:
+            Dict[int, dict]: key is contest ID
+
+        """
+        return self._fetch_many('contest_detail', contest_ids, self.contest_detail, refresh)
+
+    def draftgroup(self, dgid, raw=False):
+        """
+        Gets draft group JSON
+
+        Args:
+            dgid(int): draftgroup ID
+            raw(bool): return undecoded bytes, default False
+
+        Returns:
+            dict
+
+        """
+        url = self.api_url + f'draftgroups/v1/{dgid}'
+        if raw:
+            return self.get_json(url, params=self.base_params, response_object=True).content
+        return self.get_json(url, params=self.base_params)
+
+    def draftgroups(self, dgids: Iterable[int], refresh: bool = False) -> Dict[int, dict]:
+        """
+        Gets draft group JSON for many draft groups concurrently
+
+        Args:
+            dgids(Iterable[int]): draftgroup IDs
+            refresh(bool): refetch cached draft groups, default False
+
+        Returns:
+            Dict[int, dict]: key is draftgroup ID
+
+        """
+        return self._fetch_many('draftgroup', dgids, self.draftgroup, refresh)
+
     def getcontests(self, sport='NFL'):
         """
         Gets dk contests
@@ -103,55 +398,166 @@ class Scraper:
         url = "https://www.draftkings.com/lobby/getcontests"
         return self.get_json(url, params={'sport': sport})
 
+    def getcontests_many(self,
+                         sports: Iterable[str] = DEFAULT_SPORTS,
+                         max_workers: int = None,
+                         return_exceptions: bool = False) -> Iterator[Tuple[str, dict]]:
+        """
+        Gets dk contests for multiple sports concurrently
+
+        Args:
+            sports(Iterable[str]): default DEFAULT_SPORTS
+            max_workers(int): default None (one thread per sport)
+            return_exceptions(bool): yield a failed sport's exception instead of raising it, default False
+
+        Returns:
+            Iterator[Tuple[str, dict]]: (sport, getcontests document) as each lobby arrives
+
+        """
+        sports = list(sports)
+        sessions = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers or len(sports) or 1,
+                                    initializer=self._pool_thread, initargs=(sessions,)) as executor:
+                futures = {executor.submit(self.getcontests, sport): sport for sport in sports}
+                for future in as_completed(futures):
+                    if return_exceptions and future.exception() is not None:
+                        yield futures[future], future.exception()
+                    else:
+                        yield futures[future], future.result()
+        finally:
+            for s in sessions:
+                s.close()
+
+    def slates(self, sports: Iterable[str] = DEFAULT_SPORTS, parser: 'Parser' = None, max_workers: int = None) -> Iterator[SlateDocument]:
+        """
+        Gets classic slates across sports in one pass
+
+        Args:
+            sports(Iterable[str]): default DEFAULT_SPORTS
+            parser(Parser): default None (creates Parser)
+            max_workers(int): default None (one thread per sport)
+
+        Returns:
+            Iterator[SlateDocument]
+
+        """
+        parser = parser if parser else Parser()
+        for sport, data in self.getcontests_many(sports, max_workers=max_workers):
+            gcd = parser.getcontests(data)
+            if not gcd.selected_sport:
+                gcd.selected_sport = sport
+            yield from gcd.classic_slates
+
     def get_json(self, url, params, headers=None, response_object=False):
         """Gets json resource"""
         headers = headers if headers else {}
-        r = self.s.get(url, params=params, headers=headers)
+        with metrics.span('scraper.request') as sp:
+            r = self._session().get(url, params=params, headers=headers)
+            if metrics.enabled():
+                sp['bytes'] = len(r.content)
+                metrics.count('scraper.http_cache', result='hit' if getattr(r, 'from_cache', False) else 'miss')
         if response_object:
             return r
-        return r.json()
+        with metrics.span('scraper.decode'):
+            return r.json()
 
 
 class Parser:
-    """Parse DK site for data"""
+    """Parse DK site for data
+    
+    Examples:
+        p = Parser(cache=DocumentCache('~/.cache/dksalaries'))
+        ddoc = p.draftables(s.draftables(dgid))
+
+    """
+    def __init__(self, cache: DocumentCache = None):
+        """Creates Parser
+
+        Args:
+            cache (DocumentCache): parsed-document cache, default None
+
+        """
+        self.cache = cache
+
+    def _cached(self, kind: str, data: Union[dict, bytes, str], func: Callable, options: str = '', use_cache: bool = True) -> Any:
+        """Parses data with func, using the cache if one is set
+        
+        Args:
+            kind (str): the document kind, part of the cache key
+            data (Union[dict, bytes, str]): the decoded or raw json document
+            func (Callable): the parse function
+            options (str): parse options, part of the cache key, default ''
+            use_cache (bool): False skips the cache, default True
+
+        Returns:
+            Any
 
-    def container_objects(self, l: list, cls: Any) -> List[Any]:
+        """
+        with metrics.span(f'parser.{kind}'):
+            key = None
+            if self.cache is not None and use_cache:
+                key = self.cache.key(f'{kind}:{options}' if options else kind, data)
+                o = self.cache.get(key)
+                metrics.count('parser.cache', kind=kind, result='miss' if o is None else 'hit')
+                if o is not None:
+                    return o
+            if isinstance(data, (bytes, str)):
+                with metrics.span('parser.decode', kind=kind, bytes=len(data)):
+                    data = json.loads(data)
+            o = func(data)
+            if key is not None:
+                self.cache.put(key, o)
+            return o
+
+    def container_objects(self, l: list, cls: Any, fields: Container[str] = None) -> List[Any]:
         """Creates container of the specified object
         
         Args:
             l (list): the container
             cls (Any): the class to create
+            fields (Container[str]): snake-case fields to keep, default None (all)
 
         Returns:
             List[Any] - list of the specified class
 
         """
-        newvalues = []
-        for item in l:
-            d = {camel_to_snake(k): v for k, v in item.items() if v is not None}
-            obj = cattr.structure_attrs_fromdict(d, cls)
-            newvalues.append(obj)
-        return newvalues
-
-    def draftables(self, data: dict) -> DraftablesDocument:
+        with metrics.span('parser.keys', cls=cls.__name__, records=len(l)):
+            # records share keys, so convert each key once
+            keymap = {}
+            for item in l:
+                for k in item:
+                    if k not in keymap:
+                        snake = camel_to_snake(k)
+                        keymap[k] = snake if fields is None or snake in fields else None
+            dicts = [{keymap[k]: v for k, v in item.items() if v is not None and keymap[k] is not None} for item in l]
+        with metrics.span('parser.structure', cls=cls.__name__, records=len(l)):
+            return [cattr.structure_attrs_fromdict(d, cls) for d in dicts]
+
+    def draftables(self, data: Union[dict, bytes, str]) -> DraftablesDocument:
         """Parses draftables document
         
         Args:
-            data (dict): the draftables document
+            data (Union[dict, bytes, str]): the draftables document, decoded or raw json
 
         Returns
             DraftablesDocument
       
         """
+        return self._cached('draftables', data, self._draftables)
+
+    def _draftables(self, data: dict) -> DraftablesDocument:
+        """Parses decoded draftables document"""
         # fix the key names
         newd = {camel_to_snake(k): v for k, v in data.items() if v is not None}
 
         # pull out the containers
         mapping = {
-          'draftables': PlayerDocument
+          'draftables': PlayerDocument,
+          'draft_stats': DraftStatsDocument
         }
 
-        popped = {k: newd.pop(k) for k in mapping}        
+        popped = {k: newd.pop(k, []) for k in mapping}
 
         # create the object
         o = cattr.structure_attrs_fromdict(newd, DraftablesDocument)
@@ -163,20 +569,186 @@ class Parser:
         return o
 
 
-    def getcontests(self, data: dict) -> GetContestsDocument:
+    def contest_detail(self, data: Union[dict, bytes, str]) -> TournamentDocument:
+        """Parses contest detail document
+        
+        Args:
+            data (Union[dict, bytes, str]): the contest detail document, decoded or raw json
+
+        Returns
+            TournamentDocument
+
+        """
+        return self._cached('contest_detail', data, self._contest_detail)
+
+    def _contest_detail(self, data: dict) -> TournamentDocument:
+        """Parses decoded contest detail document"""
+        detail = data['contestDetail']
+        newd = {snake: detail[k] for k, snake in CONTEST_DETAIL_FIELDS.items() if detail.get(k) is not None}
+        # lobby tournaments use capitalized payout keys
+        newd['payout_summaries'] = [{k[0].upper() + k[1:]: v for k, v in ps.items()}
+                                    for ps in detail.get('payoutSummary', [])]
+        newd['sport_id'] = SPORT_IDS.get(detail.get('sport'))
+        return cattr.structure_attrs_fromdict(newd, TournamentDocument)
+
+    def draftgroup(self, data: Union[dict, bytes, str]) -> DraftGroupDocument:
+        """Parses draft group document
+        
+        Args:
+            data (Union[dict, bytes, str]): the draft group document, decoded or raw json
+
+        Returns
+            DraftGroupDocument
+
+        """
+        return self._cached('draftgroup', data, self._draftgroup)
+
+    def parse_many(self,
+                   kind: str,
+                   payloads: Iterable[Union[bytes, str, dict]],
+                   processes: int = None,
+                   compact: bool = False,
+                   executor: Executor = None,
+                   chunksize: int = 1) -> List[Any]:
+        """Parses many raw payloads in a process pool
+
+        Workers receive raw bytes and decode and structure their share.
+        Documents come back pickled; unpickling them here takes about a
+        third of the parse time, which caps the speedup. With compact,
+        workers send a PlayerPool of numpy columns instead, about 1% of
+        the parse time to transfer, so throughput scales with cores.
+        With a cache, hits are served here and only misses are sent to
+        the workers.
+
+        Args:
+            kind (str): the parse method, e.g. 'draftables', 'getcontests', 'contest_detail'
+            payloads (Iterable[Union[bytes, str, dict]]): the payloads, raw bytes preferred
+            processes (int): worker processes, default None (cpu count), 1 parses here
+            compact (bool): return PlayerPool instead of documents, draftables only, default False
+            executor (Executor): reuse a process pool, default None (creates one)
+            chunksize (int): payloads per task, default 1
+
+        Returns:
+            List[Any]: documents (or PlayerPool) in payload order
+
+        """
+        if kind not in PARSE_MANY_KINDS:
+            raise ValueError(f'Invalid kind: {kind}')
+        if compact and kind != 'draftables':
+            raise ValueError('compact is only available for draftables')
+        payloads = [payload_bytes(d) for d in payloads]
+        results = [None] * len(payloads)
+        todo = list(range(len(payloads)))
+        keys = {}
+        if self.cache is not None and not compact:
+            todo = []
+            for i, data in enumerate(payloads):
+                keys[i] = self.cache.key(kind, data)
+                results[i] = self.cache.get(keys[i])
+                if results[i] is None:
+                    todo.append(i)
+        with metrics.span('parser.parse_many', kind=kind, payloads=len(payloads), parsed=len(todo)):
+            if processes == 1 or (executor is None and len(todo) < 2):
+                parsed = [_parse_one(kind, compact, payloads[i]) for i in todo]
+            else:
+                owned = executor is None
+                pool = executor or ProcessPoolExecutor(max_workers=processes)
+                try:
+                    work = functools.partial(_parse_one, kind, compact)
+                    parsed = list(pool.map(work, [payloads[i] for i in todo], chunksize=chunksize))
+                finally:
+                    if owned:
+                        pool.shutdown()
+        for i, o in zip(todo, parsed):
+            results[i] = o
+            if i in keys:
+                self.cache.put(keys[i], o)
+        return results
+
+    def draftables_many(self,
+                        payloads: Iterable[Union[bytes, str, dict]],
+                        processes: int = None,
+                        compact: bool = False,
+                        executor: Executor = None) -> List[Union[DraftablesDocument, 'PlayerPool']]:
+        """Parses many draftables payloads in a process pool, see parse_many
+
+        Args:
+            payloads (Iterable[Union[bytes, str, dict]]): the draftables payloads, raw bytes preferred
+            processes (int): worker processes, default None (cpu count), 1 parses here
+            compact (bool): return PlayerPool instead of DraftablesDocument, default False
+            executor (Executor): reuse a process pool, default None (creates one)
+
+        Returns:
+            List[Union[DraftablesDocument, PlayerPool]]: in payload order
+
+        """
+        return self.parse_many('draftables', payloads, processes, compact, executor)
+
+    def _draftgroup(self, data: dict) -> DraftGroupDocument:
+        """Parses decoded draft group document"""
+        dg = data['draftGroup']
+        newd = {snake: dg[k] for k, snake in DRAFTGROUP_FIELDS.items() if dg.get(k) is not None}
+        contest_type = dg.get('contestType') or {}
+        newd['contest_type_id'] = contest_type.get('contestTypeId')
+        newd['sport'] = contest_type.get('sport')
+        newd['game_count'] = len(dg.get('games') or [])
+        newd['draft_group_tag'] = 'Featured' if 'Featured' in (dg.get('allTags') or []) else ''
+        return cattr.structure_attrs_fromdict(newd, DraftGroupDocument)
+
+    def getcontests(self,
+                    data: Union[dict, bytes, str],
+                    sections: Iterable[str] = None,
+                    fields: Dict[str, Iterable[str]] = None,
+                    previous: GetContestsDocument = None,
+                    track: bool = False) -> GetContestsDocument:
         """Parses getcontests document
         
         Args:
-            data (dict): the getcontests document
+            data (Union[dict, bytes, str]): the getcontests document, decoded or raw json
+            sections (Iterable[str]): containers to parse, default None (all of GETCONTESTS_SECTIONS)
+            fields (Dict[str, Iterable[str]]): snake-case fields to keep per container, default None (all)
+                the fields in PROJECTION_KEYS are always kept; for game_sets, 'competitions'
+                and 'game_styles' must be listed to build the children
+            previous (GetContestsDocument): earlier tracked result, unchanged records are reused, default None
+            track (bool): keep raw records so the result can be passed as previous, default False
+                (always True when previous is given)
 
         Returns
             GetContestsDocument
 
-        """
-        # fix the key names
-        newd = {camel_to_snake(k): v for k, v in data.items() if v is not None}
+        Examples:
+            gcd = p.getcontests(data, sections=['draft_groups', 'game_sets'],
+                                fields={'draft_groups': ['draft_group_id', 'game_set_key']})
 
-        # pull out the containers
+            gcd = p.getcontests(s.getcontests('NFL'), track=True)
+            gcd = p.getcontests(s.getcontests('NFL'), previous=gcd)
+            gcd.changes.added['contests']
+
+        """
+        sections = GETCONTESTS_SECTIONS if sections is None else tuple(sections)
+        unknown = set(sections) - set(GETCONTESTS_SECTIONS)
+        if unknown:
+            raise ValueError(f'Invalid sections: {sorted(unknown)}')
+        fields = {k: frozenset(v) | PROJECTION_KEYS.get(k, frozenset()) for k, v in (fields or {}).items()}
+        options = ''
+        if sections != GETCONTESTS_SECTIONS or fields:
+            options = ';'.join([','.join(sorted(sections))] + [f'{k}={",".join(sorted(v))}' for k, v in sorted(fields.items())])
+        func = functools.partial(self._getcontests, sections=sections, fields=fields, options=options,
+                                 previous=previous, track=track or previous is not None)
+        # tracked documents carry raw records that the cache does not keep
+        return self._cached('getcontests', data, func, options, use_cache=previous is None and not track)
+
+    def _getcontests(self,
+                     data: dict,
+                     sections: Iterable[str] = GETCONTESTS_SECTIONS,
+                     fields: Dict[str, frozenset] = None,
+                     options: str = '',
+                     previous: GetContestsDocument = None,
+                     track: bool = False) -> GetContestsDocument:
+        """Parses decoded getcontests document"""
+        fields = fields or {}
+
+        # pull out the requested containers, the rest are never converted
         mapping = {
           'contests': ContestDocument,
           'tournaments': TournamentDocument,
@@ -184,50 +756,141 @@ class Parser:
           'game_sets': GameSetDocument,
           'game_types': GameTypeDocument
         }
+        raw_keys = {snake: camel for camel, snake in ((k, camel_to_snake(k)) for k in data) if snake in mapping}
+        popped = {k: data.get(raw_keys.get(k), None) or [] for k in sections}
 
-        popped = {k: newd.pop(k) for k in mapping}
+        # fix the key names
+        newd = {camel_to_snake(k): v for k, v in data.items() if v is not None and k not in raw_keys.values()}
 
         # create the object
         o = cattr.structure_attrs_fromdict(newd, GetContestsDocument)
 
-        # handle the ContestDocument objects
-        new_competitions = []
-        for idx, gs in enumerate(popped['game_sets']):
-            co = []
-            for comp in gs['Competitions']:
-                newco = {camel_to_snake(k): v for k, v in comp.items() if v is not None}
-                co.append(cattr.structure_attrs_fromdict(newco, CompetitionDocument))
-            new_competitions.append(co)
-            _ = popped['game_sets'][idx].pop('Competitions')
-
-        # handle the GameStyleDocuments
-        new_gamestyles = []
-        for idx, gset in enumerate(popped['game_sets']):
-            newgstyles = []
-            for gstyle in gset['GameStyles']:
-                newgstyle = {camel_to_snake(k): v for k, v in gstyle.items() if v is not None}
-                newgstyles.append(cattr.structure_attrs_fromdict(newgstyle, GameStyleDocument))
-            new_gamestyles.append(newgstyles)
-            _ = popped['game_sets'][idx].pop('GameStyles')
-
-        # now replace the containers with the correct objects
-        for k, v in mapping.items():
-
-            # now create the new objects
-            newobjs = self.container_objects(popped[k], v)
+        # records of the previous document only match if parsed the same way
+        prev_records = {}
+        if previous is not None:
+            o.changes = LobbyChangesDocument()
+            if previous.parse_options == options and previous.fingerprints:
+                prev_records = previous.fingerprints
 
+        records = {}
+        for k in sections:
+            items = popped[k]
             if k == 'game_sets':
-                for idx, comp in enumerate(new_competitions):
-                    newobjs[idx].competitions = comp
-
-                for idx, gstyle in enumerate(new_gamestyles):
-                    newobjs[idx].game_styles = gstyle
+                build = functools.partial(self._game_set_objects, fields=fields)
+            else:
+                build = functools.partial(self.container_objects, cls=mapping[k], fields=fields.get(k))
+            # immutable snapshots, the caller may change its payload in place
+            volatile = sorted(VOLATILE_FIELDS.get(k, ()))
+            prints = [_snapshot(item, volatile) for item in items] if track else None
+            if k in prev_records:
+                newobjs = self._reuse_objects(k, items, prints, build, prev_records[k], fields.get(k), o.changes)
+            else:
+                newobjs = build(items)
+                if o.changes is not None:
+                    o.changes.added[k] = [item.get(RECORD_KEYS[k]) for item in items]
+            if track:
+                key = RECORD_KEYS[k]
+                records[k] = {item.get(key): (fp, obj) for item, fp, obj in zip(items, prints, newobjs)}
 
             # add them to the parent object
             setattr(o, k, newobjs)
 
+        if track:
+            o.fingerprints = records
+            o.parse_options = options
         return o
 
+    def _game_set_objects(self, game_sets: List[dict], fields: Dict[str, frozenset]) -> List[GameSetDocument]:
+        """Creates game sets, building competitions and game styles in one pass"""
+        gs_fields = fields.get('game_sets')
+        want_comps = gs_fields is None or 'competitions' in gs_fields
+        want_styles = gs_fields is None or 'game_styles' in gs_fields
+
+        # game sets are copied so the input is not mutated
+        children, copies = [], []
+        for gs in game_sets:
+            gs = dict(gs)
+            comps = gs.pop('Competitions', None) or []
+            styles = gs.pop('GameStyles', None) or []
+            children.append((
+                self.container_objects(comps, CompetitionDocument, fields.get('competitions')) if want_comps else [],
+                self.container_objects(styles, GameStyleDocument, fields.get('game_styles')) if want_styles else []
+            ))
+            copies.append(gs)
+
+        newobjs = self.container_objects(copies, GameSetDocument, gs_fields)
+        for gso, (comps, styles) in zip(newobjs, children):
+            gso.competitions = comps
+            gso.game_styles = styles
+        return newobjs
+
+    def _reuse_objects(self,
+                       section: str,
+                       items: List[dict],
+                       prints: List[Tuple[bytes, tuple]],
+                       build: Callable[[List[dict]], List[Any]],
+                       previous: Dict[Any, Tuple[Tuple[bytes, tuple], Any]],
+                       fields: Container[str],
+                       changes: LobbyChangesDocument) -> List[Any]:
+        """Reuses objects of unchanged records, structures only new and modified ones
+
+        Records are compared by snapshot, see _snapshot: equal bytes and
+        values mean unchanged, equal bytes alone mean only volatile fields
+        changed. Comparing costs a fraction of structuring the record.
+
+        Args:
+            section (str): the getcontests section, e.g. 'contests'
+            items (List[dict]): the raw records
+            prints (List[Tuple[bytes, tuple]]): the snapshot of each raw record
+            build (Callable[[List[dict]], List[Any]]): structures raw records
+            previous (Dict[Any, Tuple[Tuple[bytes, tuple], Any]]): record key: (snapshot, object) of the previous parse
+            fields (Container[str]): snake-case fields kept, None for all
+            changes (LobbyChangesDocument): updated in place
+
+        Returns:
+            List[Any]
+
+        """
+        key = RECORD_KEYS[section]
+        volatile = sorted(VOLATILE_FIELDS.get(section, ()))
+        snakes = {f: camel_to_snake(f) for f in volatile}
+        out = [None] * len(items)
+        todo, added, modified, updated = [], [], [], []
+        with metrics.span('parser.reuse', section=section, records=len(items)):
+            for i, item in enumerate(items):
+                rid = item.get(key)
+                prev = previous.get(rid)
+                if prev is None:
+                    added.append(rid)
+                    todo.append(i)
+                    continue
+                (stable, values), obj = prev
+                if stable != prints[i][0]:
+                    modified.append(rid)
+                    todo.append(i)
+                    continue
+                if values == prints[i][1]:
+                    out[i] = obj
+                    continue
+                # shallow clone, the previous document keeps its object
+                clone = object.__new__(type(obj))
+                clone.__dict__.update(obj.__dict__)
+                for f, old, new in zip(volatile, values, prints[i][1]):
+                    if old != new and (fields is None or snakes[f] in fields):
+                        setattr(clone, snakes[f], new)
+                out[i] = clone
+                updated.append(rid)
+            for i, obj in zip(todo, build([items[i] for i in todo])):
+                out[i] = obj
+        seen = {item.get(key) for item in items}
+        changes.added[section] = added
+        changes.modified[section] = modified
+        changes.updated[section] = updated
+        changes.removed[section] = [rid for rid in previous if rid not in seen]
+        changes.unchanged[section] = len(items) - len(added) - len(modified) - len(updated)
+        metrics.count('parser.restructured', len(todo), section=section)
+        return out
+
 
     '''
     def classic_contests(self, contests: List[dict]) -> List[dict]:
@@ -338,4 +1001,39 @@ class Parser:
     def salary_draftgroups(self, data, sport='NFL', game_type='Classic'):
         """Parses draftgroups for salary contests"""
         return [i for i in data['DraftGroups'] if i['Sport'] == sport and i['GameTypeId'] == 1]
-    '''
\ No newline at end of file
+    '''
+
+
+def _snapshot(item: dict, volatile: Sequence[str]) -> Tuple[bytes, tuple]:
+    """Snapshots a raw lobby record for incremental parsing
+
+    Args:
+        item (dict): the raw record
+        volatile (Sequence[str]): fields that change without changing the record
+
+    Returns:
+        Tuple[bytes, tuple]: the other fields pickled, the volatile values
+
+    """
+    values = tuple(item.get(f) for f in volatile)
+    if volatile:
+        item = dict(item)
+        for f in volatile:
+            item.pop(f, None)
+    return pickle.dumps(item, pickle.HIGHEST_PROTOCOL), values
+
+
+# one parser per worker process, reused across tasks
+_worker_parser = None
+
+
+def _parse_one(kind: str, compact: bool, data: bytes) -> Any:
+    """Parses one payload, module level so worker processes can run it"""
+    global _worker_parser
+    if _worker_parser is None:
+        _worker_parser = Parser()
+    o = getattr(_worker_parser, kind)(data)
+    if compact:
+        from .pool import PlayerPool
+        return PlayerPool.from_document(o)
+    return o
@@ -5,15 +5,21 @@
 
 """documents.py: object model for draftkings API"""
 
+import bisect
+import calendar
 import datetime
 import functools
 import logging
 from typing import Any, Dict, List, Sequence, Set, Tuple
 
-import attr, cattr
+import attr
 
-from .util import flatten, parse_dktime
-from nflnames import standardize_team_code, standardize_team_name
+from . import metrics, util
+from .constants import MAIN_SLATE_RULES, SPORT_GAMETYPES, SPORT_IDS
+from .util import flatten, lazy_import, parse_dktime
+
+cattr = lazy_import('cattr')
+nflnames = lazy_import('nflnames')
 
 
 CONTEST_TYPE_IDS = {
@@ -61,6 +67,57 @@ CAPTAIN_GAME_TYPES = tuple([k for k, v in GAME_TYPE_IDS.items() if 'Captain' in
 CLASSIC_GAME_TYPES = tuple([k for k, v in GAME_TYPE_IDS.items() if v == 'Classic'])
 TIERS_GAME_TYPES = tuple([k for k, v in GAME_TYPE_IDS.items() if v == 'Tiers'])
 
+SLATE_SELECTORS = ('main', 'featured', 'all')
+
+# containers of GetContestsDocument, see Parser.getcontests(sections=...)
+GETCONTESTS_SECTIONS = ('contests', 'tournaments', 'draft_groups', 'game_sets', 'game_types')
+
+
+def is_main_slate(start: datetime.datetime, end: datetime.datetime, sport: str = 'NFL') -> bool:
+    """Applies the sport's main slate rule to a slate's start and end times
+    
+    Args:
+        start (datetime.datetime): the earliest game start, localized to America/New_York
+        end (datetime.datetime): the latest game start, localized to America/New_York
+        sport (str): the sport, default 'NFL'
+
+    Returns:
+        bool
+
+    """
+    rule = MAIN_SLATE_RULES.get(sport)
+    if not rule:
+        return False
+    if rule['weekday'] is not None and start.weekday() != rule['weekday']:
+        return False
+    if rule['end_hour'] is not None and (end.hour != rule['end_hour'] or end.weekday() != start.weekday()):
+        return False
+    return start.hour == rule['start_hour']
+
+
+def is_main_slate_sdstring(sdstring: str, sport: str = 'NFL') -> bool:
+    """Applies the sport's main slate rule to a contest start string, e.g. 'Sun 1:00PM'
+    
+    Args:
+        sdstring (str): the contest sdstring
+        sport (str): the sport, default 'NFL'
+
+    Returns:
+        bool
+
+    """
+    rule = MAIN_SLATE_RULES.get(sport)
+    if not rule or not sdstring:
+        return False
+    try:
+        day, tm = sdstring.split(' ')
+        start = datetime.datetime.strptime(tm, '%I:%M%p')
+    except ValueError:
+        return False
+    if rule['weekday'] is not None and day != calendar.day_abbr[rule['weekday']]:
+        return False
+    return start.hour == rule['start_hour']
+
 
 @attr.s(auto_attribs=True)
 class AttributesDocument:
@@ -78,34 +135,38 @@ class AttributesDocument:
 class DraftStatsDocument:
     id: int
     abbr: str
-    name: str
-    order: int
+    name: str = None
+    order: int = None
     
 
 @attr.s(auto_attribs=True)
 class TournamentDocument:   
     tournament_key: str
-    name: str
-    draft_group_id: int
-    is_visible: bool
-    sort_order: int
-    status: int
-    entrants: int
-    contest_attributes: List
-    maximum_entries: int
-    maximum_entries_per_user: int
-    entry_fee: float
-    accepted_tickets: List
-    total_payouts: float
-    payout_descriptions: List
-    fpp_award: int
-    payout_summaries: List
-    sport_id: int
-    crown_amount: int
-    ticket_only_entry: bool
-    start_time: str
-    start_time_type: str
-    game_set_key: str
+    name: str = None
+    draft_group_id: int = None
+    is_visible: bool = None
+    sort_order: int = None
+    status: int = None
+    entrants: int = None
+    contest_attributes: Dict = None
+    maximum_entries: int = None
+    maximum_entries_per_user: int = None
+    entry_fee: float = None
+    accepted_tickets: List = None
+    total_payouts: float = None
+    payout_descriptions: Dict = None
+    fpp_award: int = None
+    payout_summaries: List = None
+    sport_id: int = None
+    crown_amount: int = None
+    ticket_only_entry: bool = None
+    start_time: str = None
+    start_time_type: str = None
+    game_set_key: str = None
+    # contest detail only
+    game_type_id: int = None
+    sport: str = None
+    contest_state: str = None
 
 
 @attr.s(auto_attribs=True)
@@ -139,12 +200,18 @@ class CompetitionDocument:
 
     @property
     def team_codes(self):
-        return [standardize_team_code(t.strip()) for t in self.description.split(' @ ')]
+        codes = [t.strip() for t in self.description.split(' @ ')]
+        if self.sport not in (None, 'NFL'):
+            return codes
+        return [nflnames.standardize_team_code(t) for t in codes]
 
     @property
     def team_names(self):
-        return [standardize_team_name(self.away_team_city + ' ' + self.away_team_name), 
-                standardize_team_name(self.home_team_city + ' ' + self.home_team_name)]
+        names = [self.away_team_city + ' ' + self.away_team_name, 
+                 self.home_team_city + ' ' + self.home_team_name]
+        if self.sport not in (None, 'NFL'):
+            return names
+        return [nflnames.standardize_team_name(n) for n in names]
 
 
 @attr.s(auto_attribs=True)
@@ -168,7 +235,7 @@ class GameTypeDocument:
     description: str = None
     tag: str = None
     draft_type: str = None
-    game_style: List[GameStyleDocument] = attr.Factory(list)
+    game_style: Dict = attr.Factory(dict)
     is_season_long: bool = False
 
 
@@ -195,10 +262,13 @@ class GameSetDocument:
     def n_games(self) -> int:
         return len(self.competitions)
 
+    @property
+    def sport(self) -> str:
+        return self.competitions[0].sport if self.competitions else None
+
     @functools.cached_property
     def slate_teams(self) -> List[str]:
-        return [standardize_team_code(item) 
-                for item in flatten([c.team_codes for c in self.competitions])]
+        return flatten([c.team_codes for c in self.competitions])
 
     @functools.cached_property
     def start_end_time(self) -> Tuple[datetime.datetime, datetime.datetime]:
@@ -214,6 +284,16 @@ class GameSetDocument:
         times = [parse_dktime(comp.start_date, True, self.tz) for comp in self.competitions]
         return (min(times), max(times))
 
+    @property
+    def slate_starts(self) -> datetime.datetime:
+        """Gets the first start time (slate lock) of a gameset"""
+        return self.start_end_time[0]
+
+    @property
+    def slate_ends(self) -> datetime.datetime:
+        """Gets the last start time of a gameset"""
+        return self.start_end_time[1]
+
 
 @attr.s(auto_attribs=True)
 class ContestDocument:   
@@ -276,6 +356,10 @@ class DraftGroupDocument:
     draft_group_series_id: int = None
     game_set_key: str = None
     allow_ugc: bool = None
+    # draft group detail only
+    start_time_type: str = None
+    max_start_time: str = None
+    draft_group_state: str = None
 
 
 @attr.s(auto_attribs=True)
@@ -306,7 +390,7 @@ class PlayerDocument:
     player_game_attributes: List = attr.Factory(list)
     draft_alerts: List = attr.Factory(list)
     player_game_hash: str = None
-    competition: List = attr.Factory(list)
+    competition: Dict = attr.Factory(dict)
     competitions: List = attr.Factory(list)
 
 
@@ -337,6 +421,135 @@ class SlateDocument:
     slate_players: List[PlayerSalaryDocument] = attr.Factory(list)
 
  
+@attr.s(auto_attribs=True)
+class SlateIntervalDocument:
+    """Start (lock) and last start of a game set"""
+    game_set_key: str
+    start: datetime.datetime
+    end: datetime.datetime
+    sport: str = None
+    n_games: int = None
+    draft_group_ids: List[int] = attr.Factory(list)
+
+
+class SlateCalendar:
+    """Interval index over game set start times
+
+    Intervals are sorted by start and laid out as an implicit balanced
+    tree, each node holding the max end of its subtree. Overlap queries
+    are O(log n + k), lock time queries are a bisect.
+
+    """
+    def __init__(self, intervals: Sequence[SlateIntervalDocument], tz: str = 'America/New_York'):
+        """Creates SlateCalendar
+
+        Args:
+            intervals (Sequence[SlateIntervalDocument]): the game set intervals
+            tz (str): timezone for naive query times, default 'America/New_York'
+
+        """
+        self.intervals = sorted(intervals, key=lambda i: (i.start, i.end))
+        self.tz = tz
+        self.starts = [i.start for i in self.intervals]
+        self._max_end = [None] * len(self.intervals)
+        self._build(0, len(self.intervals))
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def _build(self, lo: int, hi: int) -> datetime.datetime:
+        mid = (lo + hi) // 2
+        m = self.intervals[mid].end
+        if lo < mid:
+            m = max(m, self._build(lo, mid))
+        if mid + 1 < hi:
+            m = max(m, self._build(mid + 1, hi))
+        self._max_end[mid] = m
+        return m
+
+    def _aware(self, dt: datetime.datetime) -> datetime.datetime:
+        if dt.tzinfo is None:
+            return util.pytz.timezone(self.tz).localize(dt)
+        return dt
+
+    def overlapping(self, start: datetime.datetime, end: datetime.datetime) -> List[SlateIntervalDocument]:
+        """Gets slates whose start-end interval overlaps [start, end]
+
+        Args:
+            start (datetime.datetime): window start, naive times are in tz
+            end (datetime.datetime): window end
+
+        Returns:
+            List[SlateIntervalDocument]: sorted by start
+
+        """
+        start, end = self._aware(start), self._aware(end)
+        out = []
+        stack = [(0, len(self.intervals))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] < start:
+                continue
+            if self.starts[mid] <= end:
+                if self.intervals[mid].end >= start:
+                    out.append(mid)
+                stack.append((mid + 1, hi))
+            stack.append((lo, mid))
+        return [self.intervals[i] for i in sorted(out)]
+
+    def within(self, start: datetime.datetime, end: datetime.datetime) -> List[SlateIntervalDocument]:
+        """Gets slates that start and end inside [start, end]"""
+        start, end = self._aware(start), self._aware(end)
+        lo = bisect.bisect_left(self.starts, start)
+        hi = bisect.bisect_right(self.starts, end)
+        return [i for i in self.intervals[lo:hi] if i.end <= end]
+
+    def locking(self, start: datetime.datetime, end: datetime.datetime) -> List[SlateIntervalDocument]:
+        """Gets slates that lock (first game starts) inside [start, end]"""
+        lo = bisect.bisect_left(self.starts, self._aware(start))
+        hi = bisect.bisect_right(self.starts, self._aware(end))
+        return self.intervals[lo:hi]
+
+    def next_to_lock(self, after: datetime.datetime = None, n: int = 1) -> List[SlateIntervalDocument]:
+        """Gets the next n slates to lock after a time
+
+        Args:
+            after (datetime.datetime): default None (now)
+            n (int): the number of slates, default 1
+
+        Returns:
+            List[SlateIntervalDocument]
+
+        """
+        after = self._aware(after) if after else datetime.datetime.now(datetime.timezone.utc)
+        lo = bisect.bisect_right(self.starts, after)
+        return self.intervals[lo:lo + n]
+
+
+@attr.s(auto_attribs=True)
+class LobbyChangesDocument:
+    """Records that changed since the previous getcontests document
+
+    Each dict is keyed by section (e.g. 'contests') and holds record keys
+    (contest id, draft_group_id, game_set_key ...). Updated records
+    differ only in volatile fields such as entrant counts.
+
+    """
+    added: Dict[str, List[Any]] = attr.Factory(dict)
+    removed: Dict[str, List[Any]] = attr.Factory(dict)
+    modified: Dict[str, List[Any]] = attr.Factory(dict)
+    updated: Dict[str, List[Any]] = attr.Factory(dict)
+    unchanged: Dict[str, int] = attr.Factory(dict)
+
+    @property
+    def n_changed(self) -> int:
+        """Number of added, removed, modified and updated records"""
+        return sum(len(v) for d in (self.added, self.removed, self.modified, self.updated) for v in d.values())
+
+
 @attr.s(auto_attribs=True)
 class GetContestsDocument:   
     contests: List[ContestDocument] = attr.Factory(list)
@@ -359,29 +572,86 @@ class GetContestsDocument:
     show_ads: Any = None
     is_vip: Any = None
     ads_enabled: Any = None
+    selected_sport: str = None
+    selected_sport_id: int = None
+    changes: LobbyChangesDocument = attr.ib(default=None, eq=False, repr=False)
+    # record key: (snapshot, object) per section of a tracked parse, see Parser.getcontests
+    fingerprints: Dict[str, Dict[Any, Tuple[Tuple[bytes, tuple], Any]]] = attr.ib(default=None, eq=False, repr=False)
+    parse_options: str = attr.ib(default=None, eq=False, repr=False)
+
+    @property
+    def sport(self) -> str:
+        """Gets the lobby sport, e.g. 'NFL'"""
+        if self.selected_sport:
+            return self.selected_sport
+        sports = [dg.sport for dg in self.draft_groups if dg.sport]
+        return max(set(sports), key=sports.count) if sports else 'NFL'
+
+    def classic_game_type_ids(self, sport: str = None) -> Set[int]:
+        """Gets the classic game type ids for a sport
+        
+        Args:
+            sport (str): the sport, default None (lobby sport)
+
+        Returns:
+            Set[int]
+
+        """
+        sport_id = SPORT_IDS.get(sport or self.sport)
+        ids = {k for k, v in SPORT_GAMETYPES.get(sport_id, {}).items() if v == 'Classic'}
+        ids.update(gt.game_type_id for gt in self.game_types 
+                   if gt.name == 'Classic' and gt.sport_id == sport_id)
+        return ids
+
+    @functools.cached_property
+    @metrics.timed('documents.calendar')
+    def calendar(self) -> SlateCalendar:
+        """Interval index of game set start times, lock times computed once per document
+
+        Examples:
+            gcd.calendar.locking(datetime.datetime(2021, 9, 12, 18), datetime.datetime(2021, 9, 12, 20))
+            gcd.calendar.next_to_lock()
+
+        """
+        dgids = {}
+        for dg in self.draft_groups:
+            dgids.setdefault(dg.game_set_key, []).append(dg.draft_group_id)
+        intervals = []
+        for gs in self.game_sets:
+            if not gs.competitions:
+                continue
+            start, end = gs.start_end_time
+            intervals.append(SlateIntervalDocument(game_set_key=gs.game_set_key, start=start, end=end, sport=gs.sport,
+                                                   n_games=gs.n_games, draft_group_ids=dgids.get(gs.game_set_key, [])))
+        return SlateCalendar(intervals)
 
     @functools.cached_property
+    @metrics.timed('documents.classic_slates')
     def classic_slates(self) -> List[SlateDocument]:
         """Gets classic slates from GetContestDocument"""
         slate_documents = []
+        classic_ids = {}
 
         # step one: need to iterate over slates (game_sets)
         for gset in [item for item in self.game_sets if item.has_classic]:
+            sport = gset.sport or self.sport
+            if sport not in classic_ids:
+                classic_ids[sport] = self.classic_game_type_ids(sport)
+
             # step one: find qualifying draft groups
             draft_groups = [dg for dg in self.draft_groups if
                             dg.game_set_key == gset.game_set_key and
-                            dg.game_type_id == 1]
+                            dg.game_type_id in classic_ids[sport]]
             start, end = gset.start_end_time
-            ims = all((start.hour == 13, end.hour == 16, start.weekday() == 6, end.weekday() == 6))
 
             o = SlateDocument(
-                sport='NFL',
+                sport=sport,
                 n_games=gset.n_games,
                 dg=draft_groups,
                 game_set_key=gset.game_set_key,
                 start_date=start,
                 end_date=end,
-                is_main_slate=ims,
+                is_main_slate=is_main_slate(start, end, sport),
                 slate_teams=gset.slate_teams,
                 slate_players=None
             )
@@ -390,6 +660,63 @@ class GetContestsDocument:
 
         return slate_documents
 
+    @metrics.timed('documents.select_draft_groups')
+    def select_draft_groups(self, game_types: Sequence[str] = None, slates: str = 'main') -> List[int]:
+        """Selects draft group ids by game type name and slate selector
+        
+        Args:
+            game_types (Sequence[str]): game type names, default None (Classic)
+            slates (str): 'main', 'featured' or 'all', default 'main'
+
+        Returns:
+            List[int]
+
+        Raises:
+            ValueError: if slates is not one of SLATE_SELECTORS
+
+        """
+        if slates not in SLATE_SELECTORS:
+            raise ValueError(f'Invalid slates: {slates}')
+        game_types = set(game_types or ['Classic'])
+        names = dict(SPORT_GAMETYPES.get(SPORT_IDS.get(self.sport), {}))
+        names.update({gt.game_type_id: gt.name for gt in self.game_types})
+        dgs = [dg for dg in self.draft_groups if names.get(dg.game_type_id) in game_types]
+        if slates == 'featured':
+            dgs = [dg for dg in dgs if dg.draft_group_tag == 'Featured']
+        elif slates == 'main':
+            keys = {s.game_set_key for s in self.classic_slates if s.is_main_slate}
+            dgs = [dg for dg in dgs if dg.game_set_key in keys]
+        return sorted({dg.draft_group_id for dg in dgs})
+
+    def to_frame(self, section: str = 'contests', columns: Sequence[str] = None) -> 'pd.DataFrame':
+        """Builds a DataFrame of one section, repeated strings categorical
+
+        Args:
+            section (str): the container, e.g. 'contests' or 'draft_groups', default 'contests'
+            columns (Sequence[str]): the columns, default None (all scalar fields)
+
+        Returns:
+            pd.DataFrame
+
+        """
+        from .export import to_frame
+        return to_frame(self, columns, section)
+
+    def to_arrow(self, section: str = 'contests', columns: Sequence[str] = None) -> 'pa.Table':
+        """Builds an arrow Table of one section, repeated strings dictionary-encoded
+
+        Args:
+            section (str): the container, e.g. 'contests' or 'draft_groups', default 'contests'
+            columns (Sequence[str]): the columns, default None (all scalar fields)
+
+        Returns:
+            pa.Table
+
+        """
+        from .export import to_arrow
+        return to_arrow(self, columns, section)
+
+    @metrics.timed('documents.find_contest')
     def find_contest(self, filters: dict, contests: List[ContestDocument] = None) -> List[ContestDocument]:
         """Finds contests according to filters
     
@@ -414,27 +741,39 @@ class GetContestsDocument:
                 contests = [c for c in contests if getattr(c, k) >= val]   
         return contests
 
-    def find_main_slate(self) -> Tuple[str, int]:
+    @metrics.timed('documents.find_main_slate')
+    def find_main_slate(self, sport: str = None) -> Tuple[str, int]:
         """Finds the game_set_key and draft_group of the main slate
         
         Args:
-            None
+            sport (str): the sport, default None (lobby sport)
 
         Returns:
             Tuple[str, int]
 
         """
-        # step one: get the draft group of contests that start Sunday at 1:00 PM
-        dgid = self.find_milly().dg
+        # step one: get the draft group of contests that start with the main slate
+        dgid = self.find_milly(sport=sport).dg
         gskey = [i.game_set_key for i in self.draft_groups if i.draft_group_id == dgid][0]
         return (dgid, gskey)
 
-    def find_milly(self, contests: List[ContestDocument] = None) -> List[ContestDocument]:
-        """Finds Millionaire Makers"""
+    @metrics.timed('documents.find_milly')
+    def find_milly(self, contests: List[ContestDocument] = None, sport: str = None) -> ContestDocument:
+        """Finds Millionaire Maker for the main slate
+        
+        Args:
+            contests (List[ContestDocument]): the contests, default None
+            sport (str): the sport, default None (lobby sport)
+
+        Returns:
+            ContestDocument
+
+        """
         l = contests if contests else self.contests
+        sport = sport or self.sport
         return [i for i in l if 
-                i.sdstring == 'Sun 1:00PM' and 
-                i.game_type == 'Classic'and
+                is_main_slate_sdstring(i.sdstring, sport) and 
+                i.game_type == 'Classic' and
                 'Million' in i.n][0]
 
 
@@ -444,10 +783,48 @@ class DraftablesDocument:
     competitions: List[CompetitionDocument] = attr.Factory(list)
     teams_without_competitions: List = attr.Factory(list)
     draft_alerts: List = attr.Factory(list)
-    draft_stats: List = attr.Factory(list)
+    draft_stats: List[DraftStatsDocument] = attr.Factory(list)
     player_game_attributes: List = attr.Factory(list)
     error_status: List = attr.Factory(list)
 
+    @functools.cached_property
+    def stat_matrix(self) -> 'StatMatrix':
+        """Dense player x stat matrix, rows in draftables order
+
+        Returns:
+            StatMatrix
+
+        """
+        from .pool import StatMatrix
+        return StatMatrix.from_document(self)
+
+    @functools.cached_property
+    def pool(self) -> 'PlayerPool':
+        """Columnar view of draftables, rows in draftables order
+
+        Returns:
+            PlayerPool
+
+        """
+        from .pool import PlayerPool
+        return PlayerPool.from_document(self)
+
+    def query(self, expr: str) -> List[PlayerDocument]:
+        """Finds players matching a filter expression, see dksalaries.query
+
+        Stat columns such as FPPG can be used alongside player fields.
+
+        Args:
+            expr (str): the filter, e.g. "position in ('RB', 'WR') and salary between 4000 and 6000"
+
+        Returns:
+            List[PlayerDocument]
+
+        """
+        from .query import compile_filter
+        mask = compile_filter(expr).mask(self.pool, self.stat_matrix)
+        return [p for p, keep in zip(self.draftables, mask.tolist()) if keep]
+
     def find_player_by_name(self, first_name: str = None, last_name: str = None, full_name: str = None, players: List[Any] = None) -> List[Any]:
         """Finds player by first, last, or full name
         
@@ -498,6 +875,32 @@ class DraftablesDocument:
         l = self.draftables if not players else players
         return [i for i in l if team == i.team_abbreviation]
 
+    def to_frame(self, columns: Sequence[str] = None) -> 'pd.DataFrame':
+        """Builds a DataFrame of the players, repeated strings categorical
+
+        Args:
+            columns (Sequence[str]): the columns, default None (all scalar fields)
+
+        Returns:
+            pd.DataFrame
+
+        """
+        from .export import to_frame
+        return to_frame(self, columns)
+
+    def to_arrow(self, columns: Sequence[str] = None) -> 'pa.Table':
+        """Builds an arrow Table of the players, repeated strings dictionary-encoded
+
+        Args:
+            columns (Sequence[str]): the columns, default None (all scalar fields)
+
+        Returns:
+            pa.Table
+
+        """
+        from .export import to_arrow
+        return to_arrow(self, columns)
+
     def player_salaries(self, players: List[PlayerDocument] = None) -> List[PlayerSalaryDocument]:
         """Converts PlayerDocument to PlayerSalaryDocument
         
@@ -0,0 +1,458 @@
+# dksalaries/dksalaries/export.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""export.py: streaming columnar export of parsed documents
+
+Example:
+
+    p = Parser()
+    ddoc = p.draftables(s.draftables(53019))
+    write_parquet(ddoc, 'salaries', columns=SALARY_COLUMNS,
+                  constants={'draft_group_id': 53019},
+                  partition_cols=['draft_group_id'])
+
+    # in memory, repeated strings as categoricals
+    df = to_frame(ddoc, columns=SALARY_COLUMNS)
+    table = to_arrow(gcd, section='contests')
+
+"""
+import csv
+import itertools
+import operator
+from pathlib import Path
+from typing import Any, Dict, IO, Iterable, Iterator, List, Sequence, Union
+import uuid
+
+import attr
+import numpy as np
+
+from .documents import DraftablesDocument, GetContestsDocument, PlayerSalaryDocument
+from .util import lazy_import
+
+pd = lazy_import('pandas')
+
+try:
+    pa = lazy_import('pyarrow')
+except ImportError:
+    pa = None
+
+
+BATCH_SIZE = 10000
+
+SCALAR_TYPES = (bool, int, float, str)
+
+SALARY_COLUMNS = [f.name for f in attr.fields(PlayerSalaryDocument)]
+
+# string columns become categorical when distinct values are at most this share of rows
+CATEGORY_RATIO = 0.5
+
+# stands in for None while filling int and bool columns, becomes the null mask
+_INT_NULL = np.iinfo(np.int64).min
+_BOOL_NULL = -1
+
+
+def _arrow_type(t: Any) -> Any:
+    """Maps a python scalar type to an arrow type"""
+    return {bool: pa.bool_(), int: pa.int64(), float: pa.float64(), str: pa.string()}[t]
+
+
+def _require_pyarrow() -> None:
+    """Raises if pyarrow is not installed"""
+    if pa is None:
+        raise ImportError('pyarrow is required for arrow and parquet export')
+
+
+def document_records(doc: Any, section: str = None) -> Iterable[Any]:
+    """Gets the exportable records from a document
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or an iterable of records
+        section (str): the GetContestsDocument container, default 'contests'
+
+    Returns:
+        Iterable[Any]
+
+    """
+    if isinstance(doc, DraftablesDocument):
+        return doc.draftables
+    if isinstance(doc, GetContestsDocument):
+        return getattr(doc, section or 'contests')
+    return doc
+
+
+def record_columns(cls: Any) -> Dict[str, Any]:
+    """Gets the scalar columns and their types for an attrs class
+
+    Args:
+        cls (Any): the attrs class
+
+    Returns:
+        Dict[str, Any]: key is field name, value is python type
+
+    """
+    return {f.name: f.type for f in attr.fields(cls) if f.type in SCALAR_TYPES}
+
+
+def column_types(cls: Any, columns: Sequence[str] = None) -> Dict[str, Any]:
+    """Gets the types of the named columns, checked against the scalar fields
+
+    Args:
+        cls (Any): the attrs class
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+
+    Returns:
+        Dict[str, Any]: key is column name, value is python type
+
+    Raises:
+        ValueError: for a column that is not a field, or not a scalar one
+
+    """
+    types = record_columns(cls)
+    if columns is None:
+        return types
+    fields = attr.fields_dict(cls)
+    for col in columns:
+        if col not in fields:
+            raise ValueError(f'Unknown column for {cls.__name__}: {col}')
+        if col not in types:
+            raise ValueError(f'Column {col} of {cls.__name__} is not a scalar field')
+    return {col: types[col] for col in columns}
+
+
+def iter_columns(records: Iterable[Any],
+                 columns: Sequence[str] = None,
+                 batch_size: int = BATCH_SIZE,
+                 constants: Dict[str, Any] = None,
+                 unique: Sequence[str] = None) -> Iterator[Dict[str, List[Any]]]:
+    """Yields batches of column lists straight from document attributes
+
+    Args:
+        records (Iterable[Any]): attrs documents, e.g. PlayerDocument
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        batch_size (int): records per batch, default BATCH_SIZE
+        constants (Dict[str, Any]): constant columns added to every batch, default None
+        unique (Sequence[str]): drop records that repeat these columns, default None
+
+    Returns:
+        Iterator[Dict[str, List[Any]]]
+
+    Raises:
+        ValueError: for unknown or non-scalar columns
+
+    """
+    it = iter(records)
+    seen = set()
+    key = operator.attrgetter(*unique) if unique else None
+    checked = False
+    while True:
+        chunk = list(itertools.islice(it, batch_size))
+        if not chunk:
+            return
+        if not checked:
+            columns = list(column_types(type(chunk[0]), columns))
+            if unique:
+                column_types(type(chunk[0]), unique)
+            checked = True
+        if key:
+            keep = []
+            for rec in chunk:
+                k = key(rec)
+                if k not in seen:
+                    seen.add(k)
+                    keep.append(rec)
+            chunk = keep
+            if not chunk:
+                continue
+        batch = {col: [getattr(rec, col) for rec in chunk] for col in columns}
+        for col, val in (constants or {}).items():
+            batch[col] = [val] * len(chunk)
+        yield batch
+
+
+def arrow_schema(cls: Any, columns: Sequence[str] = None, constants: Dict[str, Any] = None) -> Any:
+    """Builds arrow schema for an attrs class
+
+    Args:
+        cls (Any): the attrs class
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        constants (Dict[str, Any]): constant columns, default None
+
+    Returns:
+        pyarrow.Schema
+
+    """
+    _require_pyarrow()
+    types = column_types(cls, columns)
+    fields = [pa.field(col, _arrow_type(typ)) for col, typ in types.items()]
+    fields += [pa.field(col, _arrow_type(type(val))) for col, val in (constants or {}).items()]
+    return pa.schema(fields)
+
+
+def iter_record_batches(doc: Any,
+                        columns: Sequence[str] = None,
+                        section: str = None,
+                        batch_size: int = BATCH_SIZE,
+                        constants: Dict[str, Any] = None,
+                        unique: Sequence[str] = None) -> Iterator[Any]:
+    """Yields arrow record batches from a document
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or an iterable of records
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        batch_size (int): records per batch, default BATCH_SIZE
+        constants (Dict[str, Any]): constant columns added to every batch, default None
+        unique (Sequence[str]): drop records that repeat these columns, default None
+
+    Returns:
+        Iterator[pyarrow.RecordBatch]
+
+    """
+    _require_pyarrow()
+    records = iter(document_records(doc, section))
+    first = next(records, None)
+    if first is None:
+        return
+    schema = arrow_schema(type(first), columns, constants)
+    names = [f.name for f in schema if f.name not in (constants or {})]
+    for batch in iter_columns(itertools.chain([first], records), names, batch_size, constants, unique):
+        yield pa.record_batch([batch[f.name] for f in schema], schema=schema)
+
+
+def write_parquet(doc: Any,
+                  path: Union[str, Path],
+                  columns: Sequence[str] = None,
+                  section: str = None,
+                  partition_cols: Sequence[str] = None,
+                  batch_size: int = BATCH_SIZE,
+                  constants: Dict[str, Any] = None,
+                  unique: Sequence[str] = None) -> None:
+    """Streams a document to parquet
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or an iterable of records
+        path (Union[str, Path]): the file, or dataset root if partition_cols
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        partition_cols (Sequence[str]): hive partition columns, appends to existing dataset
+        batch_size (int): records per batch, default BATCH_SIZE
+        constants (Dict[str, Any]): constant columns added to every batch, default None
+        unique (Sequence[str]): drop records that repeat these columns, default None
+
+    Returns:
+        None
+
+    """
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+    batches = iter_record_batches(doc, columns, section, batch_size, constants, unique)
+    if partition_cols:
+        for batch in batches:
+            pq.write_to_dataset(pa.Table.from_batches([batch]),
+                                root_path=str(path),
+                                partition_cols=list(partition_cols),
+                                basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+                                existing_data_behavior='overwrite_or_ignore')
+        return
+    writer = None
+    try:
+        for batch in batches:
+            if writer is None:
+                writer = pq.ParquetWriter(str(path), batch.schema)
+            writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_csv(doc: Any,
+              path: Union[str, Path, IO],
+              columns: Sequence[str] = None,
+              section: str = None,
+              partition_cols: Sequence[str] = None,
+              batch_size: int = BATCH_SIZE,
+              constants: Dict[str, Any] = None,
+              unique: Sequence[str] = None) -> None:
+    """Streams a document to csv, appending to existing files
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or an iterable of records
+        path (Union[str, Path, IO]): the file, open file object, or dataset root if partition_cols
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        partition_cols (Sequence[str]): hive partition columns, one part file per partition
+        batch_size (int): records per batch, default BATCH_SIZE
+        constants (Dict[str, Any]): constant columns added to every batch, default None
+        unique (Sequence[str]): drop records that repeat these columns, default None
+
+    Returns:
+        None
+
+    Raises:
+        ValueError: for unknown or non-scalar columns, or partition_cols with a file object
+
+    """
+    if partition_cols and hasattr(path, 'write'):
+        raise ValueError('partition_cols needs a dataset root, not a file object')
+    batches = iter_columns(document_records(doc, section), columns, batch_size, constants, unique)
+    if hasattr(path, 'write'):
+        header = True
+        writer = csv.writer(path)
+        for batch in batches:
+            if header:
+                writer.writerow(list(batch))
+                header = False
+            writer.writerows(zip(*batch.values()))
+        return
+
+    part = uuid.uuid4().hex
+    for batch in batches:
+        names = list(batch)
+        if not partition_cols:
+            groups = {Path(path): list(zip(*batch.values()))}
+        else:
+            names = [c for c in names if c not in partition_cols]
+            groups = {}
+            for row in zip(*batch.values()):
+                d = dict(zip(batch, row))
+                subdir = Path(path).joinpath(*[f'{c}={d[c]}' for c in partition_cols])
+                groups.setdefault(subdir / f'part-{part}.csv', []).append([d[c] for c in names])
+        for fn, rows in groups.items():
+            fn.parent.mkdir(parents=True, exist_ok=True)
+            exists = fn.exists()
+            with fn.open('a', newline='') as f:
+                writer = csv.writer(f)
+                if not exists:
+                    writer.writerow(names)
+                writer.writerows(rows)
+
+
+@attr.s(auto_attribs=True)
+class Column:
+    """One column built from document attributes
+
+    values is the data, or int32 codes into categories for string
+    columns (-1 is null); mask marks nulls of int and bool columns.
+
+    """
+    values: np.ndarray
+    mask: np.ndarray = None
+    categories: List[Any] = None
+
+
+def _build_column(records: Sequence[Any], name: str, typ: Any, categorical: bool = None) -> Column:
+    """Fills one column in a single pass over the records"""
+    n = len(records)
+    values = (getattr(rec, name) for rec in records)
+    if typ is str:
+        lookup = {None: -1}
+        codes = np.fromiter((lookup.setdefault(v, len(lookup) - 1) for v in values), dtype=np.int32, count=n)
+        del lookup[None]
+        categories = list(lookup)
+        if categorical is False or (categorical is None and len(categories) > n * CATEGORY_RATIO):
+            decoded = np.asarray(categories + [None], dtype=object)[codes]
+            return Column(decoded)
+        return Column(codes, categories=categories)
+    if typ is float:
+        return Column(np.fromiter((np.nan if v is None else v for v in values), dtype=np.float64, count=n))
+    if typ is bool:
+        arr = np.fromiter((_BOOL_NULL if v is None else v for v in values), dtype=np.int8, count=n)
+        mask = arr == _BOOL_NULL
+        return Column(arr.view(np.bool_) if not mask.any() else arr == 1, mask if mask.any() else None)
+    try:
+        arr = np.fromiter((_INT_NULL if v is None else v for v in values), dtype=np.int64, count=n)
+    except (TypeError, ValueError, OverflowError):
+        # the api sometimes sends floats in int fields
+        return _build_column(records, name, float)
+    mask = arr == _INT_NULL
+    return Column(arr, mask if mask.any() else None)
+
+
+def document_columns(doc: Any,
+                     columns: Sequence[str] = None,
+                     section: str = None,
+                     categorical: bool = None) -> Dict[str, Column]:
+    """Builds each scalar column of a document once, without per-record dicts
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or a sequence of records
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        categorical (bool): string columns as categories, default None (when values repeat)
+
+    Returns:
+        Dict[str, Column]
+
+    Raises:
+        ValueError: for unknown or non-scalar columns
+
+    """
+    records = document_records(doc, section)
+    records = records if isinstance(records, Sequence) else list(records)
+    if not records:
+        return {}
+    types = column_types(type(records[0]), columns)
+    return {col: _build_column(records, col, typ, categorical) for col, typ in types.items()}
+
+
+def to_frame(doc: Any,
+             columns: Sequence[str] = None,
+             section: str = None,
+             categorical: bool = None) -> 'pd.DataFrame':
+    """Builds a pandas DataFrame from a document
+
+    Ints with nulls become nullable Int64, bools with nulls nullable
+    boolean, repeated strings categorical.
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or a sequence of records
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        categorical (bool): string columns as categories, default None (when values repeat)
+
+    Returns:
+        pd.DataFrame
+
+    """
+    data = {}
+    for name, col in document_columns(doc, columns, section, categorical).items():
+        if col.categories is not None:
+            data[name] = pd.Categorical.from_codes(col.values, categories=col.categories, validate=False)
+        elif col.mask is not None and col.values.dtype == np.bool_:
+            data[name] = pd.arrays.BooleanArray(col.values, col.mask)
+        elif col.mask is not None:
+            data[name] = pd.arrays.IntegerArray(col.values, col.mask)
+        else:
+            data[name] = col.values
+    return pd.DataFrame(data, copy=False)
+
+
+def to_arrow(doc: Any,
+             columns: Sequence[str] = None,
+             section: str = None,
+             categorical: bool = None) -> Any:
+    """Builds a pyarrow Table from a document, repeated strings dictionary-encoded
+
+    Args:
+        doc (Any): DraftablesDocument, GetContestsDocument or a sequence of records
+        columns (Sequence[str]): the columns, default None (all scalar fields)
+        section (str): the GetContestsDocument container, default 'contests'
+        categorical (bool): string columns as dictionaries, default None (when values repeat)
+
+    Returns:
+        pyarrow.Table
+
+    """
+    _require_pyarrow()
+    arrays = {}
+    for name, col in document_columns(doc, columns, section, categorical).items():
+        if col.categories is not None:
+            categories = pa.array([c if c is None or isinstance(c, str) else str(c) for c in col.categories], type=pa.string())
+            arrays[name] = pa.DictionaryArray.from_arrays(pa.array(col.values, mask=col.values < 0), categories)
+        elif col.values.dtype == object:
+            arrays[name] = pa.array(col.values, type=pa.string(), from_pandas=True)
+        else:
+            arrays[name] = pa.array(col.values, mask=col.mask, from_pandas=True)
+    return pa.table(arrays)
@@ -0,0 +1,232 @@
+# dksalaries/dksalaries/history.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""history.py: salary and status changes across draftables snapshots
+
+Snapshots are outer-joined once on (player_id, roster_slot_id) into
+key x snapshot matrices; any pair of snapshots can then be diffed with
+array operations. Results are columns (dict of numpy arrays).
+
+Snapshots are chosen by position or by label; an int is always a
+position, so integer labels (e.g. dates as ints) go through position().
+
+Example:
+
+    hist = SalaryHistory([ddoc_open, ddoc_lock], labels=['open', 'lock'])
+    cols = hist.diff()
+    hist.status_transitions()
+
+    # archived pool snapshots, e.g. one per week
+    hist = SalaryHistory.open(sorted(Path('/data/pools').glob('*.pool')))
+
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .documents import DraftablesDocument
+from .pool import PlayerPool
+
+
+# change column values of SalaryHistory.diff
+CHANGES = ('unchanged', 'added', 'removed', 'salary', 'status', 'salary+status')
+
+# string columns carried from the latest snapshot a key appears in
+LABEL_COLUMNS = ('display_name', 'position', 'team_abbreviation')
+
+# roster_slot_id bits of the join key
+SLOT_BITS = 20
+
+
+class SalaryHistory:
+    """Players of several snapshots of a draft group (or slate) joined by key
+
+    Attributes:
+        player_id, roster_slot_id (np.ndarray): the join keys, one row each
+        present (np.ndarray): bool rows x snapshots, key is in the snapshot
+        salary (np.ndarray): int64 rows x snapshots, 0 where absent
+        status (np.ndarray): int32 status codes rows x snapshots, -1 where absent
+        statuses (List[str]): status categories
+
+    """
+    def __init__(self, snapshots: Sequence[Union[DraftablesDocument, PlayerPool]], labels: Sequence[Any] = None):
+        """Creates SalaryHistory
+
+        Args:
+            snapshots (Sequence[Union[DraftablesDocument, PlayerPool]]): the snapshots, oldest first
+            labels (Sequence[Any]): snapshot labels, e.g. dates, default None (0, 1, ...)
+
+        """
+        pools = [PlayerPool.from_document(s) if isinstance(s, DraftablesDocument) else s for s in snapshots]
+        self.labels = list(labels) if labels is not None else list(range(len(pools)))
+        if len(self.labels) != len(pools):
+            raise ValueError(f'{len(self.labels)} labels for {len(pools)} snapshots')
+        keys = [(p.arrays['player_id'].astype(np.int64) << SLOT_BITS) | p.arrays['roster_slot_id'].astype(np.int64)
+                for p in pools]
+        all_keys, inverse = np.unique(np.concatenate(keys) if keys else np.zeros(0, dtype=np.int64), return_inverse=True)
+        n, k = len(all_keys), len(pools)
+        self.player_id = all_keys >> SLOT_BITS
+        self.roster_slot_id = all_keys & ((1 << SLOT_BITS) - 1)
+        self.present = np.zeros((n, k), dtype=np.bool_)
+        self.salary = np.zeros((n, k), dtype=np.int64)
+        self.status = np.full((n, k), -1, dtype=np.int32)
+        self.statuses = []
+        self._label_categories = {c: [] for c in LABEL_COLUMNS}
+        label_codes = {c: np.full(n, -1, dtype=np.int64) for c in LABEL_COLUMNS}
+        start = 0
+        for j, pool in enumerate(pools):
+            rows = inverse[start:start + len(pool)]
+            start += len(pool)
+            # the first appearance of a key in a snapshot wins
+            rows, first = np.unique(rows, return_index=True)
+            self.present[rows, j] = True
+            self.salary[rows, j] = pool.arrays['salary'][first]
+            self.status[rows, j] = self._recode(pool, 'status', self.statuses)[first]
+            for c in LABEL_COLUMNS:
+                label_codes[c][rows] = self._recode(pool, c, self._label_categories[c])[first]
+        self._label_codes = label_codes
+
+    @staticmethod
+    def _recode(pool: PlayerPool, column: str, categories: List[str]) -> np.ndarray:
+        """Maps pool codes of a string column onto shared categories, extending them"""
+        lookup = {c: i for i, c in enumerate(categories)}
+        mapping = np.array([lookup.setdefault(c, len(lookup)) for c in pool.categories[column]], dtype=np.int64)
+        categories.extend(list(lookup)[len(categories):])
+        return mapping[pool.arrays[column]] if len(mapping) else np.zeros(len(pool), dtype=np.int64)
+
+    @classmethod
+    def open(cls, paths: Iterable[Union[str, Path]], labels: Sequence[Any] = None) -> 'SalaryHistory':
+        """Builds history from PlayerPool snapshot files
+
+        Args:
+            paths (Iterable[Union[str, Path]]): snapshot paths, oldest first
+            labels (Sequence[Any]): snapshot labels, default None (file stems)
+
+        Returns:
+            SalaryHistory
+
+        """
+        paths = [Path(p) for p in paths]
+        return cls([PlayerPool.open_snapshot(p) for p in paths], labels or [p.stem for p in paths])
+
+    def __len__(self) -> int:
+        return len(self.player_id)
+
+    def position(self, label: Any) -> int:
+        """Gets the position of a snapshot label
+
+        Raises:
+            KeyError: if no snapshot has the label
+
+        """
+        try:
+            return self.labels.index(label)
+        except ValueError:
+            raise KeyError(f'Unknown snapshot: {label}') from None
+
+    def _index(self, snapshot: Any) -> int:
+        """Gets snapshot position from a position (int) or a label (anything else)"""
+        if isinstance(snapshot, (int, np.integer)) and not isinstance(snapshot, bool):
+            if not -len(self.labels) <= snapshot < len(self.labels):
+                raise IndexError(f'Snapshot position {snapshot} out of range for {len(self.labels)} snapshots')
+            return int(snapshot) % len(self.labels)
+        return self.position(snapshot)
+
+    def _decode(self, codes: np.ndarray, categories: List[str]) -> np.ndarray:
+        cats = np.asarray(categories + [None], dtype=object)
+        return cats[np.where(codes < 0, len(categories), codes)]
+
+    def diff(self, start: Any = 0, end: Any = -1, changed_only: bool = False) -> Dict[str, np.ndarray]:
+        """Compares two snapshots
+
+        Args:
+            start (Any): the earlier snapshot, position (int) or label, default 0 (first)
+            end (Any): the later snapshot, position (int) or label, default -1 (last)
+            changed_only (bool): leave out unchanged rows, default False
+
+        Returns:
+            Dict[str, np.ndarray]: columns player_id, roster_slot_id, display_name, position,
+            team_abbreviation, old_salary, new_salary, delta, pct_change (float, NaN where
+            a side is absent), old_status, new_status and change (see CHANGES)
+
+        """
+        i, j = self._index(start), self._index(end)
+        a, b = self.present[:, i], self.present[:, j]
+        rows = np.flatnonzero(a | b)
+        a, b = a[rows], b[rows]
+        old = np.where(a, self.salary[rows, i], np.nan)
+        new = np.where(b, self.salary[rows, j], np.nan)
+        delta = new - old
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pct = delta / old
+        old_status, new_status = self.status[rows, i], self.status[rows, j]
+        salary_changed = a & b & (delta != 0)
+        status_changed = a & b & (old_status != new_status)
+        change = np.select([~a, ~b, salary_changed & status_changed, salary_changed, status_changed],
+                           [1, 2, 5, 3, 4], default=0)
+        if changed_only:
+            keep = change != 0
+            rows, old, new, delta, pct, change = rows[keep], old[keep], new[keep], delta[keep], pct[keep], change[keep]
+            old_status, new_status = old_status[keep], new_status[keep]
+        cols = {'player_id': self.player_id[rows], 'roster_slot_id': self.roster_slot_id[rows]}
+        for c in LABEL_COLUMNS:
+            cols[c] = self._decode(self._label_codes[c][rows], self._label_categories[c])
+        cols.update({
+            'old_salary': old,
+            'new_salary': new,
+            'delta': delta,
+            'pct_change': pct,
+            'old_status': self._decode(old_status, self.statuses),
+            'new_status': self._decode(new_status, self.statuses),
+            'change': np.asarray(CHANGES, dtype=object)[change],
+        })
+        return cols
+
+    def added(self, start: Any = 0, end: Any = -1) -> Dict[str, np.ndarray]:
+        """Gets rows in end but not start"""
+        return _take(self.diff(start, end), lambda c: c['change'] == 'added')
+
+    def removed(self, start: Any = 0, end: Any = -1) -> Dict[str, np.ndarray]:
+        """Gets rows in start but not end"""
+        return _take(self.diff(start, end), lambda c: c['change'] == 'removed')
+
+    def salary_changes(self, start: Any = 0, end: Any = -1, min_delta: int = 1) -> Dict[str, np.ndarray]:
+        """Gets rows whose salary moved by at least min_delta, biggest moves first
+
+        Args:
+            start (Any): the earlier snapshot, default 0 (first)
+            end (Any): the later snapshot, default -1 (last)
+            min_delta (int): the smallest absolute change, default 1
+
+        Returns:
+            Dict[str, np.ndarray]
+
+        """
+        cols = _take(self.diff(start, end), lambda c: np.abs(np.nan_to_num(c['delta'])) >= min_delta)
+        order = np.argsort(-np.abs(cols['delta']), kind='stable')
+        return {k: v[order] for k, v in cols.items()}
+
+    def status_transitions(self, start: Any = 0, end: Any = -1) -> Dict[Tuple[str, str], int]:
+        """Counts status changes of keys in both snapshots, e.g. ('None', 'Q'): 12"""
+        i, j = self._index(start), self._index(end)
+        both = self.present[:, i] & self.present[:, j]
+        old, new = self.status[both, i], self.status[both, j]
+        moved = old != new
+        pairs, n = np.unique(np.stack([old[moved], new[moved]], axis=1), axis=0, return_counts=True)
+        return {(self.statuses[o], self.statuses[s]): int(c) for (o, s), c in zip(pairs.tolist(), n)}
+
+    def series(self, player_id: int, roster_slot_id: int = None) -> Dict[Any, int]:
+        """Gets salary by snapshot label for one player, lowest over slots if roster_slot_id is None"""
+        rows = self.player_id == player_id
+        if roster_slot_id is not None:
+            rows &= self.roster_slot_id == roster_slot_id
+        sal = np.where(self.present[rows], self.salary[rows], np.iinfo(np.int64).max).min(axis=0, initial=np.iinfo(np.int64).max)
+        return {label: int(s) for label, s, seen in zip(self.labels, sal, self.present[rows].any(axis=0)) if seen}
+
+
+def _take(cols: Dict[str, np.ndarray], where) -> Dict[str, np.ndarray]:
+    keep = where(cols)
+    return {k: v[keep] for k, v in cols.items()}
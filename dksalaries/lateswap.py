@@ -0,0 +1,211 @@
+# dksalaries/dksalaries/lateswap.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""lateswap.py: late-swap tracking as the games of a draft group lock
+
+The competition -> players index and the lock schedule are built once
+from the draftables. Each lock only touches the players of that game;
+swappable players are kept per roster slot sorted by salary, so finding
+alternatives is a binary search instead of a scan of the pool.
+
+Example:
+
+    ddoc = p.draftables(s.draftables(53019))
+    tracker = LateSwapTracker(ddoc)
+    tracker.update()                              # locks games that have started
+    tracker.alternatives(roster_slot_id=67, max_salary=6200)
+
+"""
+import datetime
+import threading
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from . import util
+from .documents import DraftablesDocument
+from .pool import PlayerPool
+from .util import parse_dktime
+
+
+# sorts competitions without a start time last
+_NEVER = datetime.datetime.max.replace(tzinfo=datetime.timezone.utc)
+
+
+class LateSwapTracker:
+    """Tracks which players of a draft group can still be swapped in
+
+    Players lock with their competition's start time. A player listed
+    with several competitions locks with the earliest one. Players DK
+    already marks as not swappable or disabled start out locked.
+
+    """
+    def __init__(self, ddoc: DraftablesDocument, now: datetime.datetime = None, tz: str = 'America/New_York'):
+        """Creates LateSwapTracker
+
+        Args:
+            ddoc (DraftablesDocument): the draft group players
+            now (datetime.datetime): lock games started by now, default None (no games locked by time)
+            tz (str): timezone for naive times, default 'America/New_York'
+
+        """
+        self.tz = tz
+        self._lock = threading.Lock()
+        self.pool = PlayerPool.from_document(ddoc)
+        self.index = {d: i for i, d in enumerate(self.pool.arrays['draftable_id'].tolist())}
+        self.lock_times: Dict[int, datetime.datetime] = {}
+        rows_by_competition = {}
+        for row, p in enumerate(ddoc.draftables):
+            comps = p.competitions or ([p.competition] if isinstance(p.competition, dict) else [])
+            comps = [c for c in comps if c.get('competitionId') is not None]
+            for c in comps:
+                if c['competitionId'] not in self.lock_times and c.get('startTime'):
+                    self.lock_times[c['competitionId']] = parse_dktime(c['startTime'])
+            if comps:
+                first = min(comps, key=lambda c: self.lock_times.get(c['competitionId'], _NEVER))
+                rows_by_competition.setdefault(first['competitionId'], []).append(row)
+        self.competition_rows = {cid: np.array(rows, dtype=np.int64) for cid, rows in rows_by_competition.items()}
+        self._schedule = sorted((t, cid) for cid, t in self.lock_times.items() if cid in self.competition_rows)
+        self._next = 0
+        self.locked_competitions = set()
+        self.locked = ~self.pool.arrays['is_swappable'].astype(np.bool_) | self.pool.arrays['is_disabled'].astype(np.bool_)
+        # roster_slot_id -> rows ascending by salary, all and unlocked only
+        slots = self.pool.arrays['roster_slot_id']
+        salary = self.pool.arrays['salary']
+        self._slot_rows = {}
+        for slot in np.unique(slots).tolist():
+            rows = np.flatnonzero(slots == slot)
+            self._slot_rows[slot] = rows[np.argsort(salary[rows], kind='stable')]
+        self._slots = {}
+        self._compact(self._slot_rows)
+        if now is not None:
+            self.update(now)
+
+    def _aware(self, dt: datetime.datetime) -> datetime.datetime:
+        if dt.tzinfo is None:
+            return util.pytz.timezone(self.tz).localize(dt)
+        return dt
+
+    def _compact(self, slots: Iterable[int]) -> None:
+        """Rebuilds the unlocked rows and salaries of roster slots"""
+        salary = self.pool.arrays['salary']
+        for slot in slots:
+            rows = self._slot_rows[slot]
+            rows = rows[~self.locked[rows]]
+            self._slots[slot] = (rows, salary[rows])
+
+    def lock(self, competition_id: int) -> int:
+        """Locks the players of a competition, e.g. one that started early
+
+        Args:
+            competition_id (int): the competition id
+
+        Returns:
+            int: the number of players newly locked
+
+        """
+        with self._lock:
+            return self._lock_competition(competition_id)
+
+    def _lock_competition(self, competition_id: int) -> int:
+        if competition_id in self.locked_competitions:
+            return 0
+        self.locked_competitions.add(competition_id)
+        rows = self.competition_rows.get(competition_id)
+        if rows is None or not len(rows):
+            return 0
+        rows = rows[~self.locked[rows]]
+        self.locked[rows] = True
+        self._compact(np.unique(self.pool.arrays['roster_slot_id'][rows]).tolist())
+        return len(rows)
+
+    def update(self, now: datetime.datetime = None) -> List[int]:
+        """Locks every competition that has started by now
+
+        Args:
+            now (datetime.datetime): the current time, default None (utc now)
+
+        Returns:
+            List[int]: the competition ids newly locked
+
+        """
+        now = self._aware(now) if now is not None else datetime.datetime.now(datetime.timezone.utc)
+        newly = []
+        with self._lock:
+            while self._next < len(self._schedule) and self._schedule[self._next][0] <= now:
+                cid = self._schedule[self._next][1]
+                self._next += 1
+                if cid not in self.locked_competitions:
+                    self._lock_competition(cid)
+                    newly.append(cid)
+        return newly
+
+    def next_lock(self) -> Tuple[datetime.datetime, List[int]]:
+        """Gets the next lock time and its competitions, None if every game has locked"""
+        pending = [(t, cid) for t, cid in self._schedule[self._next:] if cid not in self.locked_competitions]
+        if not pending:
+            return None
+        t = pending[0][0]
+        return t, [cid for ts, cid in pending if ts == t]
+
+    def players(self, competition_id: int) -> List[int]:
+        """Gets draftable_ids of a competition"""
+        rows = self.competition_rows.get(competition_id, [])
+        return self.pool.arrays['draftable_id'][rows].tolist()
+
+    def is_swappable(self, draftable_id: int) -> bool:
+        """Checks if a player is not locked, False if not in the draft group"""
+        row = self.index.get(draftable_id)
+        return row is not None and not self.locked[row]
+
+    def swappable(self, lineup: Sequence[int]) -> List[int]:
+        """Gets the draftable_ids of a lineup that can still be swapped out"""
+        return [d for d in lineup if self.is_swappable(d)]
+
+    def alternatives(self,
+                     roster_slot_id: int,
+                     max_salary: int,
+                     min_salary: int = 0,
+                     exclude: Iterable[int] = None) -> List[int]:
+        """Gets unlocked players for a roster slot within a salary range
+
+        Args:
+            roster_slot_id (int): the roster slot id
+            max_salary (int): the most salary available for the slot
+            min_salary (int): the least salary, default 0
+            exclude (Iterable[int]): player_ids to leave out, e.g. the rest of the lineup, default None
+
+        Returns:
+            List[int]: draftable_ids, highest salary first
+
+        """
+        rows, salaries = self._slots.get(roster_slot_id, (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)))
+        lo = np.searchsorted(salaries, min_salary, side='left')
+        hi = np.searchsorted(salaries, max_salary, side='right')
+        rows = rows[lo:hi][::-1]
+        if exclude:
+            rows = rows[~np.isin(self.pool.arrays['player_id'][rows], list(exclude))]
+        return self.pool.arrays['draftable_id'][rows].tolist()
+
+    def swap_options(self, lineup: Sequence[int], draftable_id: int, salary_cap: int) -> List[int]:
+        """Gets replacements for one player of a lineup that keep it under the cap
+
+        Args:
+            lineup (Sequence[int]): the lineup as draftable_ids
+            draftable_id (int): the player to swap out
+            salary_cap (int): the salary cap, e.g. 50000
+
+        Returns:
+            List[int]: draftable_ids in the same roster slot, highest salary first, empty if the player is locked
+
+        """
+        if not self.is_swappable(draftable_id):
+            return []
+        salary = self.pool.arrays['salary']
+        rows = [self.index[d] for d in lineup]
+        row = self.index[draftable_id]
+        budget = salary_cap - int(salary[rows].sum()) + int(salary[row])
+        others = self.pool.arrays['player_id'][[r for r in rows if r != row]].tolist()
+        return self.alternatives(int(self.pool.arrays['roster_slot_id'][row]), budget, exclude=others)
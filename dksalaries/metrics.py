@@ -0,0 +1,233 @@
+# dksalaries/dksalaries/metrics.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""metrics.py: opt-in tracing spans and timing metrics
+
+Instrumentation is off until a sink is set. Spans record their duration
+plus numeric fields (bytes, records), string fields become labels.
+
+Example:
+
+    sink = PrometheusSink()
+    set_sink(sink)
+    gcd = p.getcontests(s.getcontests('NFL'))
+    sink.stats()['parser.structure']
+    print(sink.render())
+
+"""
+import contextlib
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Tuple
+
+
+_sink = None
+
+
+def set_sink(sink: Any) -> None:
+    """Enables instrumentation with sink, None disables
+
+    Args:
+        sink (Any): object with record(name, duration, fields) and count(name, n, labels)
+
+    Returns:
+        None
+
+    """
+    global _sink
+    _sink = sink
+
+
+def get_sink() -> Any:
+    """Gets the active sink, None if disabled"""
+    return _sink
+
+
+def enabled() -> bool:
+    return _sink is not None
+
+
+@contextlib.contextmanager
+def span(name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+    """Times a block; fields can be added to the yielded dict inside the block
+
+    Args:
+        name (str): the span name, e.g. 'scraper.request'
+        **fields: numeric fields are summed, string fields are labels
+
+    Returns:
+        Iterator[Dict[str, Any]]
+
+    """
+    sink = _sink
+    if sink is None:
+        yield fields
+        return
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        sink.record(name, time.perf_counter() - start, fields)
+
+
+def count(name: str, n: int = 1, **labels: str) -> None:
+    """Increments a counter, e.g. cache hits
+
+    Args:
+        name (str): the counter name
+        n (int): the increment, default 1
+        **labels: counter labels
+
+    Returns:
+        None
+
+    """
+    sink = _sink
+    if sink is not None:
+        sink.count(name, n, labels)
+
+
+def timed(name: str) -> Callable:
+    """Decorator that wraps function in a span"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _sink is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _split(fields: Dict[str, Any]) -> Tuple[Tuple[Tuple[str, str], ...], Dict[str, float]]:
+    """Splits fields into sorted string labels and numeric values"""
+    labels = tuple(sorted((k, v) for k, v in fields.items() if isinstance(v, str)))
+    values = {k: v for k, v in fields.items() if isinstance(v, (int, float)) and not isinstance(v, bool)}
+    return labels, values
+
+
+class MemorySink:
+    """Aggregates spans and counters in memory"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}
+        self.counters = {}
+
+    def record(self, name: str, duration: float, fields: Dict[str, Any]) -> None:
+        labels, values = _split(fields)
+        with self._lock:
+            s = self.spans.get((name, labels))
+            if s is None:
+                s = self.spans[(name, labels)] = {'count': 0, 'total': 0.0, 'min': duration, 'max': duration}
+            s['count'] += 1
+            s['total'] += duration
+            s['min'] = min(s['min'], duration)
+            s['max'] = max(s['max'], duration)
+            for k, v in values.items():
+                s[k] = s.get(k, 0) + v
+
+    def count(self, name: str, n: int, labels: Dict[str, str]) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Gets span stats by name, summed over labels
+
+        Returns:
+            Dict[str, Dict[str, float]]: keys count, total, mean, min, max and numeric fields
+
+        """
+        out = {}
+        with self._lock:
+            for (name, _), s in self.spans.items():
+                o = out.setdefault(name, {'count': 0, 'total': 0.0, 'min': s['min'], 'max': s['max']})
+                for k, v in s.items():
+                    if k == 'min':
+                        o['min'] = min(o['min'], v)
+                    elif k == 'max':
+                        o['max'] = max(o['max'], v)
+                    else:
+                        o[k] = o.get(k, 0) + v
+        for o in out.values():
+            o['mean'] = o['total'] / o['count']
+        return out
+
+    def counter(self, name: str, **labels: str) -> int:
+        """Gets counter value, summed over labels not given"""
+        want = set(labels.items())
+        with self._lock:
+            return sum(v for (n, lbl), v in self.counters.items() if n == name and want <= set(lbl))
+
+    def reset(self) -> None:
+        with self._lock:
+            self.spans.clear()
+            self.counters.clear()
+
+
+class LoggingSink:
+    """Logs every span and counter"""
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        self.logger = logger or logging.getLogger('dksalaries.metrics')
+        self.level = level
+
+    def record(self, name: str, duration: float, fields: Dict[str, Any]) -> None:
+        extra = ' '.join(f'{k}={v}' for k, v in fields.items())
+        self.logger.log(self.level, f'{name} {duration * 1000:.3f}ms {extra}'.rstrip())
+
+    def count(self, name: str, n: int, labels: Dict[str, str]) -> None:
+        extra = ' '.join(f'{k}={v}' for k, v in labels.items())
+        self.logger.log(self.level, f'{name} +{n} {extra}'.rstrip())
+
+
+def _escape(value: Any) -> str:
+    """Escapes a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusSink(MemorySink):
+    """MemorySink that renders the Prometheus text exposition format"""
+
+    PREFIX = 'dksalaries'
+
+    @staticmethod
+    def _labels(pairs: Tuple[Tuple[str, str], ...]) -> str:
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+    def render(self) -> str:
+        """Renders spans and counters as Prometheus text
+
+        Returns:
+            str
+
+        """
+        p = self.PREFIX
+        lines = [f'# TYPE {p}_span_seconds summary']
+        extra = {}
+        with self._lock:
+            spans = list(self.spans.items())
+            counters = list(self.counters.items())
+        for (name, labels), s in spans:
+            lbl = self._labels((('span', name),) + labels)
+            lines.append(f'{p}_span_seconds_count{lbl} {s["count"]}')
+            lines.append(f'{p}_span_seconds_sum{lbl} {s["total"]:.9f}')
+            for k, v in s.items():
+                if k not in ('count', 'total', 'min', 'max'):
+                    extra.setdefault(k, []).append(f'{p}_span_{k}_total{lbl} {v}')
+        for k, rows in extra.items():
+            lines.append(f'# TYPE {p}_span_{k}_total counter')
+            lines.extend(rows)
+        if counters:
+            lines.append(f'# TYPE {p}_events_total counter')
+        for (name, labels), v in counters:
+            lines.append(f'{p}_events_total{self._labels((("event", name),) + labels)} {v}')
+        return '\n'.join(lines) + '\n'
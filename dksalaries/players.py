@@ -0,0 +1,177 @@
+# dksalaries/dksalaries/players.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""players.py: player identity index across draft groups
+
+The same athlete appears in many draft groups (main slate, showdowns,
+tiers ...) with a different draftable_id and salary in each. PlayerIndex
+records every appearance keyed by player_id as draft groups are added.
+
+Example:
+
+    idx = PlayerIndex()
+    for dgid in gcd.select_draft_groups(slates='all'):
+        idx.add(dgid, p.draftables(s.draftables(dgid)))
+    idx.salaries(player_id=830517)
+
+"""
+import threading
+from typing import Any, Dict, Iterable, List
+
+import attr
+
+from .documents import DraftablesDocument
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class PlayerAppearance:
+    """One roster slot of one player in one draft group"""
+    draft_group_id: int
+    draftable_id: int
+    player_id: int
+    player_dk_id: int = None
+    display_name: str = None
+    team_abbreviation: str = None
+    position: str = None
+    roster_slot_id: int = None
+    salary: int = None
+    status: str = None
+    competition_id: int = None
+    start_time: str = None
+    game_type: str = None
+
+
+class PlayerIndex:
+    """Where each player appears across draft groups, built incrementally
+
+    Adding a draft group again replaces its previous appearances, so the
+    index can follow a refresh loop. Lookups are dict lookups, adds are
+    linear in the size of the draft group.
+
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_draft_group = {}
+        self._by_player = {}
+        self._dk_ids = {}
+        self._names = {}
+
+    def __len__(self) -> int:
+        """Number of distinct players"""
+        return len(self._by_player)
+
+    def __contains__(self, player_id: int) -> bool:
+        return player_id in self._by_player
+
+    @property
+    def draft_group_ids(self) -> List[int]:
+        with self._lock:
+            return list(self._by_draft_group)
+
+    def add(self, draft_group_id: int, ddoc: DraftablesDocument, game_type: str = None) -> int:
+        """Adds or replaces the players of a draft group
+
+        Args:
+            draft_group_id (int): the draft group id
+            ddoc (DraftablesDocument): the parsed draftables
+            game_type (str): the game type name, e.g. 'Classic', default None
+
+        Returns:
+            int: the number of appearances added
+
+        """
+        apps = []
+        for p in ddoc.draftables:
+            comp = p.competition if isinstance(p.competition, dict) else {}
+            apps.append(PlayerAppearance(
+                draft_group_id=draft_group_id, draftable_id=p.draftable_id, player_id=p.player_id,
+                player_dk_id=p.player_dk_id, display_name=p.display_name, team_abbreviation=p.team_abbreviation,
+                position=p.position, roster_slot_id=p.roster_slot_id, salary=p.salary, status=p.status,
+                competition_id=comp.get('competitionId'), start_time=comp.get('startTime'), game_type=game_type))
+        with self._lock:
+            self._remove(draft_group_id)
+            self._by_draft_group[draft_group_id] = apps
+            for a in apps:
+                self._by_player.setdefault(a.player_id, {}).setdefault(draft_group_id, []).append(a)
+                if a.player_dk_id is not None:
+                    self._dk_ids[a.player_dk_id] = a.player_id
+                self._names.setdefault(a.display_name, set()).add(a.player_id)
+        return len(apps)
+
+    def remove(self, draft_group_id: int) -> None:
+        """Removes the players of a draft group"""
+        with self._lock:
+            self._remove(draft_group_id)
+
+    def _remove(self, draft_group_id: int) -> None:
+        for a in self._by_draft_group.pop(draft_group_id, []):
+            groups = self._by_player.get(a.player_id)
+            if groups is None:
+                continue
+            groups.pop(draft_group_id, None)
+            if not groups:
+                del self._by_player[a.player_id]
+                self._dk_ids.pop(a.player_dk_id, None)
+                ids = self._names.get(a.display_name)
+                if ids is not None:
+                    ids.discard(a.player_id)
+                    if not ids:
+                        del self._names[a.display_name]
+
+    def player_id(self, player_dk_id: int) -> int:
+        """Gets player_id for a player_dk_id, None if absent"""
+        return self._dk_ids.get(player_dk_id)
+
+    def find_player_by_name(self, display_name: str) -> List[int]:
+        """Gets player_ids with display_name"""
+        with self._lock:
+            return sorted(self._names.get(display_name, ()))
+
+    def appearances(self, player_id: int = None, player_dk_id: int = None, draft_group_ids: Iterable[int] = None) -> List[PlayerAppearance]:
+        """Gets every roster slot a player appears in
+
+        Args:
+            player_id (int): the player id, default None
+            player_dk_id (int): the player dk id, used if player_id is None
+            draft_group_ids (Iterable[int]): only these draft groups, default None (all)
+
+        Returns:
+            List[PlayerAppearance]
+
+        """
+        draft_group_ids = None if draft_group_ids is None else list(draft_group_ids)
+        # add and remove change the dicts in place, read them under the lock
+        with self._lock:
+            if player_id is None:
+                player_id = self._dk_ids.get(player_dk_id)
+            groups = self._by_player.get(player_id, {})
+            wanted = groups if draft_group_ids is None else [d for d in draft_group_ids if d in groups]
+            return [a for d in wanted for a in groups.get(d, [])]
+
+    def salaries(self, player_id: int = None, player_dk_id: int = None) -> Dict[int, int]:
+        """Gets lowest salary of a player per draft group
+
+        Args:
+            player_id (int): the player id, default None
+            player_dk_id (int): the player dk id, used if player_id is None
+
+        Returns:
+            Dict[int, int]: key is draft_group_id
+
+        """
+        out = {}
+        for a in self.appearances(player_id, player_dk_id):
+            if a.salary is not None and (a.draft_group_id not in out or a.salary < out[a.draft_group_id]):
+                out[a.draft_group_id] = a.salary
+        return out
+
+    def players(self, draft_group_id: int) -> List[PlayerAppearance]:
+        """Gets appearances in a draft group"""
+        with self._lock:
+            return list(self._by_draft_group.get(draft_group_id, []))
+
+    def as_dicts(self, appearances: Iterable[PlayerAppearance]) -> List[Dict[str, Any]]:
+        """Converts appearances to dicts, e.g. for json"""
+        return [attr.asdict(a) for a in appearances]
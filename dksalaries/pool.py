@@ -0,0 +1,382 @@
+# dksalaries/dksalaries/pool.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""pool.py: columnar player pool and memory-mapped snapshots
+
+Example:
+
+    ddoc = p.draftables(s.draftables(53019))
+    pool = PlayerPool.from_document(ddoc)
+    pool.write_snapshot('/dev/shm/53019.pool')
+
+    # in each worker, no copy of the column data
+    pool = PlayerPool.open_snapshot('/dev/shm/53019.pool')
+    rbs = pool.find_player_by_position('RB')
+
+"""
+import json
+from pathlib import Path
+import struct
+from typing import Any, Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from .documents import DraftablesDocument, PlayerDocument
+from .query import compile_filter
+
+
+NUMERIC_COLUMNS = {
+  'draftable_id': np.int64,
+  'player_id': np.int64,
+  'player_dk_id': np.int64,
+  'team_id': np.int64,
+  'roster_slot_id': np.int64,
+  'salary': np.int64,
+  'is_swappable': np.bool_,
+  'is_disabled': np.bool_,
+}
+
+STRING_COLUMNS = (
+  'first_name',
+  'last_name',
+  'display_name',
+  'short_name',
+  'team_abbreviation',
+  'position',
+  'status',
+)
+
+SNAPSHOT_MAGIC = b'DKPOOL01'
+
+ALIGN = 64
+
+
+class PlayerPool:
+    """Columnar view of the players in a DraftablesDocument
+
+    Numeric columns are numpy arrays, string columns are categorical
+    (int32 codes plus a list of categories). Lookups return a PlayerPool
+    of the matching rows.
+
+    """
+    def __init__(self,
+                 arrays: Dict[str, np.ndarray],
+                 categories: Dict[str, List[str]] = None,
+                 path: Union[str, Path] = None):
+        """Creates PlayerPool
+
+        Args:
+            arrays (Dict[str, np.ndarray]): numeric columns and string column codes
+            categories (Dict[str, List[str]]): categories of string columns, default None
+            path (Union[str, Path]): snapshot path if memory-mapped, default None
+
+        """
+        self.arrays = arrays
+        self.categories = categories or {}
+        self.path = path
+        self._lookup = {k: {v: i for i, v in enumerate(cats)} for k, cats in self.categories.items()}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.arrays.values()))) if self.arrays else 0
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Gets column: numeric values or decoded strings"""
+        if name in self.categories:
+            return np.asarray(self.categories[name], dtype=object)[self.arrays[name]]
+        return self.arrays[name]
+
+    def __reduce__(self):
+        # memory-mapped pools travel to workers as a path, not as data
+        if self.path is not None:
+            return (PlayerPool.open_snapshot, (str(self.path),))
+        return (PlayerPool, (self.arrays, self.categories))
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.arrays)
+
+    @classmethod
+    def from_document(cls, ddoc: Union[DraftablesDocument, Sequence[PlayerDocument]]) -> 'PlayerPool':
+        """Builds pool from draftables document or list of players
+
+        Args:
+            ddoc (Union[DraftablesDocument, Sequence[PlayerDocument]]): the players
+
+        Returns:
+            PlayerPool
+
+        """
+        players = ddoc.draftables if isinstance(ddoc, DraftablesDocument) else ddoc
+        arrays = {name: np.fromiter((getattr(p, name) or 0 for p in players), dtype=dtype, count=len(players))
+                  for name, dtype in NUMERIC_COLUMNS.items()}
+        categories = {}
+        for name in STRING_COLUMNS:
+            lookup = {}
+            codes = np.fromiter((lookup.setdefault(getattr(p, name), len(lookup)) for p in players),
+                                dtype=np.int32, count=len(players))
+            arrays[name] = codes
+            categories[name] = list(lookup)
+        return cls(arrays, categories)
+
+    def code(self, name: str, value: str) -> int:
+        """Gets categorical code for a string value, -1 if absent"""
+        return self._lookup[name].get(value, -1)
+
+    def mask(self, name: str, value: Any) -> np.ndarray:
+        """Gets boolean mask of rows where column equals value"""
+        if name in self.categories:
+            return self.arrays[name] == self.code(name, value)
+        return self.arrays[name] == value
+
+    def take(self, idx: Union[np.ndarray, Sequence[int]]) -> 'PlayerPool':
+        """Gets pool of the selected rows (index array or boolean mask)"""
+        return PlayerPool({k: v[idx] for k, v in self.arrays.items()}, self.categories)
+
+    def row(self, i: int) -> Dict[str, Any]:
+        """Gets single player as dict"""
+        d = {}
+        for k, v in self.arrays.items():
+            d[k] = self.categories[k][v[i]] if k in self.categories else v[i].item()
+        return d
+
+    def rows(self) -> Iterable[Dict[str, Any]]:
+        """Iterates players as dicts"""
+        return (self.row(i) for i in range(len(self)))
+
+    def by_draftable_id(self, draftable_id: int) -> Dict[str, Any]:
+        """Gets player by draftable_id
+
+        Args:
+            draftable_id (int): the draftable id
+
+        Returns:
+            Dict[str, Any]: the player, None if absent
+
+        """
+        idx = np.flatnonzero(self.arrays['draftable_id'] == draftable_id)
+        return self.row(idx[0]) if len(idx) else None
+
+    def find_player_by_name(self, first_name: str = None, last_name: str = None, full_name: str = None) -> 'PlayerPool':
+        """Finds player by first, last, or full name
+
+        Args:
+            first_name (str): the player first_name, default None
+            last_name (str): the player last_name, default None
+            full_name (str): the player display_name, default None
+
+        Returns:
+            PlayerPool
+
+        """
+        m = np.ones(len(self), dtype=bool)
+        if first_name:
+            m &= self.mask('first_name', first_name)
+        if last_name:
+            m &= self.mask('last_name', last_name)
+        if full_name:
+            m &= self.mask('display_name', full_name)
+        return self.take(m)
+
+    def find_player_by_position(self, pos: str) -> 'PlayerPool':
+        """Finds player by position
+
+        Args:
+            pos (str): the player position
+
+        Returns:
+            PlayerPool
+
+        """
+        return self.take(self.mask('position', pos))
+
+    def find_player_by_team(self, team: str) -> 'PlayerPool':
+        """Finds player by team
+
+        Args:
+            team (str): the player team
+
+        Returns:
+            PlayerPool
+
+        """
+        return self.take(self.mask('team_abbreviation', team))
+
+    def query(self, expr: str, stats: 'StatMatrix' = None) -> 'PlayerPool':
+        """Finds players matching a filter expression, see dksalaries.query
+
+        Args:
+            expr (str): the filter, e.g. "position in ('RB', 'WR') and salary <= 5000"
+            stats (StatMatrix): stat columns aligned with the pool, default None
+
+        Returns:
+            PlayerPool
+
+        """
+        return self.take(compile_filter(expr).mask(self, stats))
+
+    def player_salaries(self) -> Dict[int, int]:
+        """Gets salaries keyed by draftable_id"""
+        return dict(zip(self.arrays['draftable_id'].tolist(), self.arrays['salary'].tolist()))
+
+    def write_snapshot(self, path: Union[str, Path]) -> Path:
+        """Writes pool to a file that workers can memory-map read-only
+
+        Layout: magic, header length, json header, then each column
+        aligned to 64 bytes. Use a path under /dev/shm to keep the
+        snapshot in shared memory.
+
+        Args:
+            path (Union[str, Path]): the snapshot path
+
+        Returns:
+            Path
+
+        """
+        path = Path(path)
+        columns = []
+        offset = 0
+        for name, arr in self.arrays.items():
+            arr = np.ascontiguousarray(arr)
+            columns.append({'name': name, 'dtype': arr.dtype.str, 'offset': offset})
+            offset += -(-arr.nbytes // ALIGN) * ALIGN
+        header = json.dumps({'n': len(self), 'columns': columns, 'categories': self.categories}).encode()
+        start = -(-(len(SNAPSHOT_MAGIC) + 8 + len(header)) // ALIGN) * ALIGN
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        with tmp.open('wb') as f:
+            f.write(SNAPSHOT_MAGIC + struct.pack('<Q', len(header)) + header)
+            for col, arr in zip(columns, self.arrays.values()):
+                f.seek(start + col['offset'])
+                f.write(np.ascontiguousarray(arr).tobytes())
+            f.truncate(start + offset)
+        tmp.replace(path)
+        return path
+
+    @classmethod
+    def open_snapshot(cls, path: Union[str, Path]) -> 'PlayerPool':
+        """Opens snapshot as read-only memory-mapped pool
+
+        Args:
+            path (Union[str, Path]): the snapshot path
+
+        Returns:
+            PlayerPool
+
+        """
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(mm[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+            raise ValueError(f'Invalid snapshot: {path}')
+        hlen = struct.unpack('<Q', bytes(mm[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 8]))[0]
+        hstart = len(SNAPSHOT_MAGIC) + 8
+        header = json.loads(bytes(mm[hstart:hstart + hlen]))
+        start = -(-(hstart + hlen) // ALIGN) * ALIGN
+        n = header['n']
+        arrays = {}
+        for col in header['columns']:
+            dtype = np.dtype(col['dtype'])
+            begin = start + col['offset']
+            arrays[col['name']] = mm[begin:begin + n * dtype.itemsize].view(dtype)
+        return cls(arrays, header['categories'], path=path)
+
+
+def _stat_value(s: Any) -> float:
+    """Converts attribute value to float, NaN if not numeric"""
+    try:
+        return float(s)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class StatMatrix:
+    """Dense player x stat matrix of draft stat and player attributes
+
+    Rows follow the order of DraftablesDocument.draftables, so they line
+    up with PlayerPool.from_document. Draft stat columns come first, in
+    draft_stats order and named by abbreviation, then player attribute
+    and player game attribute columns by name. Values are the numeric
+    sortValue (or value), missing and non-numeric entries are NaN.
+
+    """
+    def __init__(self, draftable_ids: np.ndarray, columns: List[str], values: np.ndarray, stat_ids: Dict[str, Any] = None):
+        """Creates StatMatrix
+
+        Args:
+            draftable_ids (np.ndarray): row labels
+            columns (List[str]): column labels
+            values (np.ndarray): float64 array of shape (rows, columns)
+            stat_ids (Dict[str, Any]): column label to draft stat id, default None
+
+        """
+        self.draftable_ids = draftable_ids
+        self.columns = list(columns)
+        self.values = values
+        self.stat_ids = stat_ids or {}
+        self._col = {c: i for i, c in enumerate(self.columns)}
+        self._row = None
+
+    def __len__(self) -> int:
+        return len(self.draftable_ids)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Gets column by label, e.g. m['FPPG']"""
+        return self.values[:, self._col[column]]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._col
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape
+
+    @classmethod
+    def from_document(cls, ddoc: DraftablesDocument, attributes: bool = True) -> 'StatMatrix':
+        """Decodes the attribute lists of every player in one pass
+
+        Args:
+            ddoc (DraftablesDocument): the draftables
+            attributes (bool): include player and player game attributes, default True
+
+        Returns:
+            StatMatrix
+
+        """
+        players = ddoc.draftables
+        stats = sorted(ddoc.draft_stats, key=lambda s: s.order if s.order is not None else 0)
+        columns = [s.abbr for s in stats]
+        stat_ids = {s.abbr: s.id for s in stats}
+        by_id = {s.id: i for i, s in enumerate(stats)}
+        by_name = {}
+        if attributes:
+            for p in players:
+                for a in p.player_attributes + p.player_game_attributes:
+                    name = a.get('name')
+                    if name is not None and name not in by_name and name not in stat_ids:
+                        by_name[name] = len(columns)
+                        columns.append(name)
+        values = np.full((len(players), len(columns)), np.nan)
+        for row, p in enumerate(players):
+            for a in p.draft_stat_attributes:
+                col = by_id.get(a.get('id'))
+                if col is not None:
+                    values[row, col] = _stat_value(a.get('sortValue', a.get('value')))
+            if by_name:
+                for a in p.player_attributes + p.player_game_attributes:
+                    col = by_name.get(a.get('name'))
+                    if col is not None:
+                        values[row, col] = _stat_value(a.get('sortValue', a.get('value')))
+        ids = np.fromiter((p.draftable_id for p in players), dtype=np.int64, count=len(players))
+        return cls(ids, columns, values, stat_ids)
+
+    def row(self, draftable_id: int) -> Dict[str, float]:
+        """Gets stats of one draftable as dict, None if absent"""
+        if self._row is None:
+            self._row = {d: i for i, d in enumerate(self.draftable_ids.tolist())}
+        i = self._row.get(draftable_id)
+        if i is None:
+            return None
+        return dict(zip(self.columns, self.values[i].tolist()))
+
+    def take(self, idx: Union[np.ndarray, Sequence[int]]) -> 'StatMatrix':
+        """Gets matrix of the selected rows (index array or boolean mask)"""
+        return StatMatrix(self.draftable_ids[idx], self.columns, self.values[idx], self.stat_ids)
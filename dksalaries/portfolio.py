@@ -0,0 +1,212 @@
+# dksalaries/dksalaries/portfolio.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""portfolio.py: exposure, stack and overlap analytics over lineup sets
+
+Lineups of draftable_ids are encoded once as a lineup x player indicator
+matrix; exposures are column sums, pair counts and pairwise overlaps are
+matrix products, so the work stays vectorized for 10k+ lineups.
+
+Example:
+
+    ddoc = p.draftables(s.draftables(53019))
+    port = Portfolio(ddoc, lineups)
+    port.exposures()
+    port.stack_shapes()
+    port.overlap_distribution()
+
+"""
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from .documents import DraftablesDocument
+from .pool import PlayerPool
+
+
+class Portfolio:
+    """A set of lineups from one draft group
+
+    Columns of the indicator matrix are players (player_id), so the
+    captain and flex slots of the same player count as the same player
+    for exposure and overlap.
+
+    """
+    def __init__(self, players: Union[DraftablesDocument, PlayerPool], lineups: Sequence[Sequence[int]]):
+        """Creates Portfolio
+
+        Args:
+            players (Union[DraftablesDocument, PlayerPool]): the draft group players
+            lineups (Sequence[Sequence[int]]): lineups as draftable_ids, all of the same size
+
+        Raises:
+            KeyError: for draftable_ids not in the pool
+            ValueError: if there are no lineups or they differ in size
+
+        """
+        sizes = {len(lineup) for lineup in lineups}
+        if not sizes:
+            raise ValueError('Portfolio needs at least one lineup')
+        if len(sizes) > 1:
+            raise ValueError(f'Lineups differ in size: {sorted(sizes)}')
+        self.pool = PlayerPool.from_document(players) if isinstance(players, DraftablesDocument) else players
+        index = {d: i for i, d in enumerate(self.pool.arrays['draftable_id'].tolist())}
+        self.slots = np.array([[index[d] for d in lineup] for lineup in lineups], dtype=np.int64).reshape(len(lineups), -1)
+        self.player_ids, self._column = np.unique(self.pool.arrays['player_id'], return_inverse=True)
+        self.columns = self._column[self.slots]
+        self.matrix = np.zeros((len(self), len(self.player_ids)), dtype=np.bool_)
+        self.matrix[np.arange(len(self))[:, None], self.columns] = True
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    def _names(self) -> Dict[int, str]:
+        names = self.pool['display_name']
+        return dict(zip(self.pool.arrays['player_id'].tolist(), names.tolist()))
+
+    def counts(self) -> np.ndarray:
+        """Gets number of lineups per player, aligned with player_ids"""
+        return self.matrix.sum(axis=0)
+
+    def exposures(self, min_exposure: float = 0.0) -> Dict[int, float]:
+        """Gets share of lineups with each player
+
+        Args:
+            min_exposure (float): leave out players below this share, default 0 (players in no lineup are left out)
+
+        Returns:
+            Dict[int, float]: key is player_id, highest exposure first
+
+        """
+        share = self.counts() / max(len(self), 1)
+        order = np.argsort(-share, kind='stable')
+        keep = order[(share[order] > 0) & (share[order] >= min_exposure)]
+        return dict(zip(self.player_ids[keep].tolist(), share[keep].tolist()))
+
+    def slot_exposures(self) -> Dict[int, float]:
+        """Gets share of lineups with each draftable_id, e.g. captain vs flex"""
+        ids, n = np.unique(self.pool.arrays['draftable_id'][self.slots], return_counts=True)
+        order = np.argsort(-n, kind='stable')
+        return dict(zip(ids[order].tolist(), (n[order] / max(len(self), 1)).tolist()))
+
+    def exposure_table(self) -> List[Dict[str, Union[int, float, str]]]:
+        """Gets exposures with player names, e.g. for json"""
+        names = self._names()
+        return [{'player_id': pid, 'display_name': names.get(pid), 'exposure': e} for pid, e in self.exposures().items()]
+
+    def team_counts(self) -> Tuple[List[str], np.ndarray]:
+        """Counts players per team in each lineup
+
+        Returns:
+            Tuple[List[str], np.ndarray]: team abbreviations and a lineup x team int array
+
+        """
+        teams = self.pool.categories['team_abbreviation']
+        codes = self.pool.arrays['team_abbreviation'][self.slots]
+        rows = np.repeat(np.arange(len(self)), self.slots.shape[1])
+        counts = np.bincount(rows * len(teams) + codes.ravel(), minlength=len(self) * len(teams))
+        return teams, counts.reshape(len(self), len(teams))
+
+    def team_stacks(self, min_size: int = 2) -> Dict[str, int]:
+        """Gets number of lineups stacking each team
+
+        Args:
+            min_size (int): players of the same team that make a stack, default 2
+
+        Returns:
+            Dict[str, int]: key is team abbreviation, most stacked first
+
+        """
+        teams, counts = self.team_counts()
+        n = (counts >= min_size).sum(axis=0)
+        order = np.argsort(-n, kind='stable')
+        return {teams[i]: int(n[i]) for i in order if n[i]}
+
+    def stack_shapes(self) -> Dict[str, int]:
+        """Gets number of lineups per stack shape, e.g. '3-2' for a 3 and a 2 player stack
+
+        Lineups without two players of the same team have shape 'none'.
+
+        """
+        _, counts = self.team_counts()
+        counts = -np.sort(-counts, axis=1)
+        shapes, n = np.unique(counts, axis=0, return_counts=True)
+        out = {}
+        for shape, k in zip(shapes, n):
+            key = '-'.join(str(c) for c in shape if c > 1) or 'none'
+            out[key] = out.get(key, 0) + int(k)
+        return dict(sorted(out.items(), key=lambda kv: -kv[1]))
+
+    def pair_counts(self, top: int = 20, min_count: int = 1) -> List[Tuple[int, int, int]]:
+        """Gets most common player pairs
+
+        Args:
+            top (int): the number of pairs, default 20
+            min_count (int): leave out pairs in fewer lineups, default 1
+
+        Returns:
+            List[Tuple[int, int, int]]: player_id, player_id, number of lineups
+
+        """
+        used = np.flatnonzero(self.matrix.any(axis=0))
+        x = self.matrix[:, used].astype(np.float32)
+        co = np.triu(x.T @ x, k=1)
+        a, b = np.nonzero(co >= min_count)
+        n = co[a, b]
+        order = np.argsort(-n, kind='stable')[:top]
+        pid = self.player_ids[used]
+        return [(int(pid[a[i]]), int(pid[b[i]]), int(n[i])) for i in order]
+
+    def pair_correlation(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Gets correlation of player inclusion across lineups
+
+        Positive values mean two players are rostered together more
+        often than their exposures alone would predict.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: player_ids in the portfolio and a player x player matrix
+
+        """
+        used = np.flatnonzero(self.matrix.any(axis=0))
+        x = self.matrix[:, used].astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.corrcoef(x, rowvar=False)
+        return self.player_ids[used], np.atleast_2d(corr)
+
+    def overlap(self, i: int) -> np.ndarray:
+        """Gets number of players lineup i shares with every lineup"""
+        return self.matrix @ self.matrix[i].astype(np.int64)
+
+    def _overlap_chunks(self, chunk_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yields (start, chunk x lineups overlap counts), float32 products are exact here"""
+        x = self.matrix.astype(np.float32)
+        xt = np.ascontiguousarray(x.T)
+        for start in range(0, len(self), chunk_size):
+            yield start, x[start:start + chunk_size] @ xt
+
+    def overlap_distribution(self, chunk_size: int = 1024) -> np.ndarray:
+        """Gets histogram of shared players over all lineup pairs
+
+        Args:
+            chunk_size (int): lineups per matrix product, bounds memory, default 1024
+
+        Returns:
+            np.ndarray: element k is the number of pairs sharing k players
+
+        """
+        hist = np.zeros(self.slots.shape[1] + 1, dtype=np.int64)
+        for start, block in self._overlap_chunks(chunk_size):
+            # pairs (i, j) with j > i only
+            upper = np.arange(block.shape[1])[None, :] > np.arange(start, start + len(block))[:, None]
+            hist += np.bincount(block[upper].astype(np.int64), minlength=len(hist))[:len(hist)]
+        return hist
+
+    def max_overlap(self, chunk_size: int = 1024) -> np.ndarray:
+        """Gets the most players each lineup shares with any other lineup"""
+        out = np.zeros(len(self), dtype=np.int64)
+        for start, block in self._overlap_chunks(chunk_size):
+            block[np.arange(len(block)), np.arange(start, start + len(block))] = -1
+            out[start:start + len(block)] = block.max(axis=1, initial=0)
+        return out
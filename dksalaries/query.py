@@ -0,0 +1,308 @@
+# dksalaries/dksalaries/query.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""query.py: player pool filter expressions compiled to numpy masks
+
+Grammar (keywords are case-insensitive):
+
+    expr       := term ('or' term)*
+    term       := factor ('and' factor)*
+    factor     := 'not' factor | '(' expr ')' | comparison
+    comparison := column op value
+                | column ['not'] 'in' '(' value (',' value)* ')'
+                | column ['not'] 'between' value 'and' value
+                | column ['not'] 'like' string
+                | column 'is' ['not'] 'null'
+                | column
+    op         := '==' | '=' | '!=' | '<' | '<=' | '>' | '>='
+
+Columns are PlayerPool columns or StatMatrix columns (e.g. FPPG); names
+that are not identifiers go in backticks. A bare column is true where it
+is nonzero. String columns are evaluated once per category and gathered
+through the codes, so every comparison is a single array operation.
+
+Like patterns follow SQL and match the whole value, case-sensitive: '%'
+matches any run of characters and '_' any one character, so 'Jones'
+matches only Jones and '%Jones%' any value containing it.
+
+Example:
+
+    f = compile_filter("position in ('RB', 'WR') and salary between 4000 and 6000 and status != 'O'")
+    pool.take(f.mask(pool))
+    pool.query('FPPG >= 10 and not is_disabled', stats=ddoc.stat_matrix)
+
+"""
+import functools
+import operator
+import re
+from typing import Any, Callable, List, Set, Tuple
+
+import numpy as np
+
+
+KEYWORDS = {'and', 'or', 'not', 'in', 'between', 'like', 'is', 'null', 'true', 'false'}
+
+OPERATORS = {
+  '==': operator.eq,
+  '=': operator.eq,
+  '!=': operator.ne,
+  '<': operator.lt,
+  '<=': operator.le,
+  '>': operator.gt,
+  '>=': operator.ge,
+}
+
+TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<num>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+  | (?P<str>'[^']*'|"[^"]*")
+  | (?P<op>==|!=|<=|>=|=|<|>|\(|\)|,)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*|`[^`]+`)
+)""", re.VERBOSE)
+
+_END = ('end', None, -1)
+
+
+def _tokenize(expr: str) -> List[Tuple[str, Any, int]]:
+    """Splits expr into (kind, value, position) tokens"""
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    while pos < len(expr):
+        m = TOKEN_RE.match(expr, pos)
+        if m is None or m.end() == pos:
+            raise ValueError(f'Invalid filter at {pos}: {expr[pos:pos + 20]!r}')
+        kind = m.lastgroup
+        text = m.group(kind)
+        start = m.start(kind)
+        if kind == 'num':
+            value = float(text) if any(c in text for c in '.eE') else int(text)
+        elif kind == 'str':
+            value = text[1:-1]
+        elif kind == 'name' and text.startswith('`'):
+            value = text[1:-1]
+        elif kind == 'name' and text.lower() in KEYWORDS:
+            kind, value = 'kw', text.lower()
+        else:
+            value = text
+        tokens.append((kind, value, start))
+        pos = m.end()
+    return tokens
+
+
+class _Columns:
+    """Column access for one evaluation: pool columns, then stat columns"""
+
+    def __init__(self, pool: Any, stats: Any = None):
+        if stats is not None and len(stats) != len(pool):
+            raise ValueError(f'StatMatrix has {len(stats)} rows, pool has {len(pool)}')
+        self.pool = pool
+        self.stats = stats
+
+    def __len__(self) -> int:
+        return len(self.pool)
+
+    def get(self, name: str) -> Tuple[np.ndarray, List[str]]:
+        """Gets (values, None) for numeric columns, (codes, categories) for string columns"""
+        if name in self.pool.arrays:
+            return self.pool.arrays[name], self.pool.categories.get(name)
+        if self.stats is not None and name in self.stats:
+            return self.stats[name], None
+        raise ValueError(f'Unknown column: {name}')
+
+
+def _predicate(name: str, literals: Tuple[Any, ...], test: Callable[[Any], bool], vector: Callable[[np.ndarray], np.ndarray]) -> Callable:
+    """Builds a mask function; test runs once per category, vector on numeric arrays"""
+    def mask(cols: _Columns) -> np.ndarray:
+        values, categories = cols.get(name)
+        if categories is None:
+            bad = [x for x in literals if isinstance(x, str)]
+            if bad:
+                raise ValueError(f'Cannot compare numeric column {name} to {bad[0]!r}')
+            return vector(values)
+        if any(not isinstance(x, str) for x in literals):
+            raise ValueError(f'Cannot compare string column {name} to a number')
+        hit = np.fromiter((c is not None and test(c) for c in categories), dtype=np.bool_, count=len(categories))
+        return hit[values] if len(hit) else np.zeros(len(values), dtype=np.bool_)
+    return mask
+
+
+class _Parser:
+    """Recursive descent parser, builds a tree of mask functions"""
+
+    def __init__(self, expr: str):
+        self.expr = expr
+        self.tokens = _tokenize(expr)
+        self.i = 0
+        self.columns = set()
+
+    def peek(self) -> Tuple[str, Any, int]:
+        return self.tokens[self.i] if self.i < len(self.tokens) else _END
+
+    def next(self) -> Tuple[str, Any, int]:
+        tok = self.peek()
+        self.i += 1
+        return tok
+
+    def accept(self, kind: str, value: Any = None) -> bool:
+        k, v, _ = self.peek()
+        if k == kind and (value is None or v == value):
+            self.i += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Any = None) -> Any:
+        k, v, pos = self.next()
+        if k != kind or (value is not None and v != value):
+            want = value if value is not None else kind
+            got = 'end of filter' if k == 'end' else repr(v)
+            raise ValueError(f'Expected {want} at {pos if pos >= 0 else len(self.expr)}, got {got}: {self.expr!r}')
+        return v
+
+    def parse(self) -> Callable:
+        node = self.expr_()
+        if self.peek() is not _END:
+            _, v, pos = self.peek()
+            raise ValueError(f'Unexpected {v!r} at {pos}: {self.expr!r}')
+        return node
+
+    def expr_(self) -> Callable:
+        nodes = [self.term()]
+        while self.accept('kw', 'or'):
+            nodes.append(self.term())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda cols: functools.reduce(np.logical_or, (n(cols) for n in nodes))
+
+    def term(self) -> Callable:
+        nodes = [self.factor()]
+        while self.accept('kw', 'and'):
+            nodes.append(self.factor())
+        if len(nodes) == 1:
+            return nodes[0]
+        return lambda cols: functools.reduce(np.logical_and, (n(cols) for n in nodes))
+
+    def factor(self) -> Callable:
+        if self.accept('kw', 'not'):
+            node = self.factor()
+            return lambda cols: ~node(cols)
+        if self.accept('op', '('):
+            node = self.expr_()
+            self.expect('op', ')')
+            return node
+        return self.comparison()
+
+    def value(self) -> Any:
+        k, v, pos = self.next()
+        if k in ('num', 'str'):
+            return v
+        if k == 'kw' and v in ('true', 'false'):
+            return v == 'true'
+        got = 'end of filter' if k == 'end' else repr(v)
+        raise ValueError(f'Expected value at {pos if pos >= 0 else len(self.expr)}, got {got}: {self.expr!r}')
+
+    def comparison(self) -> Callable:
+        name = self.expect('name')
+        self.columns.add(name)
+        k, v, _ = self.peek()
+        if k == 'op' and v in OPERATORS:
+            self.next()
+            op, value = OPERATORS[v], self.value()
+            return _predicate(name, (value,), lambda c: op(c, value), lambda a: op(a, value))
+        negate = self.accept('kw', 'not')
+        if self.accept('kw', 'in'):
+            self.expect('op', '(')
+            values = [self.value()]
+            while self.accept('op', ','):
+                values.append(self.value())
+            self.expect('op', ')')
+            node = _predicate(name, tuple(values), set(values).__contains__, lambda a: np.isin(a, values))
+        elif self.accept('kw', 'between'):
+            lo = self.value()
+            self.expect('kw', 'and')
+            hi = self.value()
+            node = _predicate(name, (lo, hi), lambda c: lo <= c <= hi, lambda a: (a >= lo) & (a <= hi))
+        elif self.accept('kw', 'like'):
+            pattern = self.expect('str')
+            regex = _like_regex(pattern)
+            node = _predicate(name, (pattern,), lambda c: regex.fullmatch(c) is not None, None)
+        elif not negate and self.accept('kw', 'is'):
+            negate = self.accept('kw', 'not')
+            self.expect('kw', 'null')
+            node = lambda cols: _is_null(cols, name)
+        elif negate:
+            raise ValueError(f'Expected in, between or like after not: {self.expr!r}')
+        else:
+            node = _predicate(name, (), bool, lambda a: np.nan_to_num(a) != 0)
+        if negate:
+            inner = node
+            return lambda cols: ~inner(cols)
+        return node
+
+
+def _like_regex(pattern: str) -> re.Pattern:
+    """Translates a SQL like pattern, '%' and '_' wildcards, to a regex"""
+    parts = re.split(r'([%_])', pattern)
+    return re.compile(''.join({'%': '.*', '_': '.'}.get(p) or re.escape(p) for p in parts), re.DOTALL)
+
+
+def _is_null(cols: _Columns, name: str) -> np.ndarray:
+    values, categories = cols.get(name)
+    if categories is not None:
+        return np.array([c is None for c in categories], dtype=np.bool_)[values]
+    if values.dtype.kind == 'f':
+        return np.isnan(values)
+    return np.zeros(len(values), dtype=np.bool_)
+
+
+class PoolFilter:
+    """A compiled filter expression, reusable across pools"""
+
+    def __init__(self, expr: str):
+        """Compiles expr
+
+        Args:
+            expr (str): the filter expression
+
+        Raises:
+            ValueError: if expr is not a valid filter
+
+        """
+        parser = _Parser(expr)
+        self.expr = expr
+        self._mask = parser.parse()
+        self.columns: Set[str] = parser.columns
+
+    def __repr__(self) -> str:
+        return f'PoolFilter({self.expr!r})'
+
+    def mask(self, pool: Any, stats: Any = None) -> np.ndarray:
+        """Evaluates the filter over a pool
+
+        Args:
+            pool (PlayerPool): the players
+            stats (StatMatrix): stat columns aligned with pool, default None
+
+        Returns:
+            np.ndarray: boolean mask of pool rows
+
+        Raises:
+            ValueError: for unknown columns or a string compared to a numeric column
+
+        """
+        return self._mask(_Columns(pool, stats))
+
+
+@functools.lru_cache(maxsize=256)
+def compile_filter(expr: str) -> PoolFilter:
+    """Compiles expr, repeated expressions come from a cache
+
+    Args:
+        expr (str): the filter expression
+
+    Returns:
+        PoolFilter
+
+    """
+    return PoolFilter(expr)
@@ -0,0 +1,490 @@
+# dksalaries/dksalaries/rules.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""rules.py: roster rules per game type and precompiled lineup validation
+
+RosterRules describe a lineup: slots with their eligible positions and
+counts, the salary cap, captain multipliers and team / game minimums.
+Templates are keyed by (sport, game style); the registry resolves game
+type ids or GameTypeDocuments to a template, takes the cap from the game
+type description and binds each slot to the roster_slot_id the draft
+group uses for it.
+
+LineupValidator compiles bound rules against one draft group. Every pool
+row gets a packed slot count (5 bits per slot), a team bit and a game
+bit, so checking a lineup is a gather, a sum and a few bit operations:
+
+    registry = RulesRegistry()
+    validator = registry.validator(ddoc, game_type=1, sport='NFL')
+    ok = validator.valid(lineups)              # n x 9 draftable_ids
+    validator.explain(lineups[0])              # e.g. ['salary_cap']
+
+"""
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+import attr
+import numpy as np
+
+from .constants import SPORT_GAMETYPES, SPORT_IDS
+from .documents import GAME_TYPE_IDS, DraftablesDocument, GameTypeDocument
+from .pool import PlayerPool
+
+
+DEFAULT_SALARY_CAP = 50000
+
+SALARY_CAP_RE = re.compile(r'\$([\d,]+) salary cap', re.IGNORECASE)
+
+# violation bits of LineupValidator.check
+UNKNOWN_PLAYER = 1
+ROSTER = 2
+SALARY_CAP = 4
+DUPLICATE_PLAYER = 8
+TEAMS = 16
+GAMES = 32
+DISABLED = 64
+
+VIOLATIONS = {
+  UNKNOWN_PLAYER: 'unknown_player',
+  ROSTER: 'roster',
+  SALARY_CAP: 'salary_cap',
+  DUPLICATE_PLAYER: 'duplicate_player',
+  TEAMS: 'teams',
+  GAMES: 'games',
+  DISABLED: 'disabled',
+}
+
+# packed slot counts: COUNT_BITS per slot in one int64
+COUNT_BITS = 5
+MAX_SLOTS = 63 // COUNT_BITS - 1
+
+# draftable_id lookup is a dense table when the id range is at most this many entries, or this many times the pool
+LOOKUP_SPAN = 1 << 20
+LOOKUP_RATIO = 64
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class RosterSlot:
+    """One lineup slot, e.g. FLEX x1 for RB, WR and TE"""
+    name: str
+    positions: Tuple[str, ...]
+    count: int = 1
+    multiplier: float = 1.0
+    roster_slot_id: int = None
+
+
+@attr.s(auto_attribs=True, frozen=True)
+class RosterRules:
+    """Lineup rules of one game type
+
+    salary_cap is None for formats without a cap. roster_slot_ids are
+    None until the rules are bound to a draft group.
+
+    """
+    sport: str
+    name: str
+    slots: Tuple[RosterSlot, ...]
+    salary_cap: int = DEFAULT_SALARY_CAP
+    min_teams: int = 1
+    min_games: int = 1
+    game_type_id: int = None
+
+    @property
+    def size(self) -> int:
+        """Gets number of players in a lineup"""
+        return sum(s.count for s in self.slots)
+
+    @property
+    def is_bound(self) -> bool:
+        return all(s.roster_slot_id is not None for s in self.slots)
+
+    @property
+    def eligible(self) -> Dict[int, Tuple[str, ...]]:
+        """Gets eligible positions by roster_slot_id, bound rules only"""
+        return {s.roster_slot_id: s.positions for s in self.slots if s.roster_slot_id is not None}
+
+    @property
+    def multipliers(self) -> Dict[int, float]:
+        """Gets scoring multiplier by roster_slot_id, bound rules only"""
+        return {s.roster_slot_id: s.multiplier for s in self.slots if s.roster_slot_id is not None}
+
+    def lineup_slots(self) -> List[RosterSlot]:
+        """Gets slots in lineup order, one per player, e.g. RB, RB"""
+        return [s for s in self.slots for _ in range(s.count)]
+
+    def bind(self, players: Union[DraftablesDocument, PlayerPool], slot_ids: Dict[str, int] = None) -> 'RosterRules':
+        """Sets roster_slot_ids from the draftables of a draft group
+
+        A slot binds to the roster_slot_id whose players all play one of
+        its positions, the widest such id when several fit (FLEX over RB).
+        Slots with a multiplier above 1 take the more expensive of equally
+        wide ids, since captain salaries are scaled too.
+
+        Args:
+            players (Union[DraftablesDocument, PlayerPool]): the draft group players
+            slot_ids (Dict[str, int]): roster_slot_id by slot name, skips detection, default None
+
+        Returns:
+            RosterRules
+
+        Raises:
+            ValueError: if a slot has no roster_slot_id in the draft group
+
+        """
+        slot_ids = dict(slot_ids or {})
+        pool = PlayerPool.from_document(players) if isinstance(players, DraftablesDocument) else players
+        rsid = pool.arrays['roster_slot_id']
+        positions = pool['position']
+        candidates = {}
+        for r in np.unique(rsid).tolist():
+            rows = rsid == r
+            held = [set(p.split('/')) if p else set() for p in set(positions[rows].tolist())]
+            candidates[r] = (held, int(rows.sum()), float(pool.arrays['salary'][rows].mean()))
+        used = set(slot_ids.values())
+        for slot in sorted(self.slots, key=lambda s: (len(s.positions), -s.multiplier)):
+            if slot.name in slot_ids:
+                continue
+            wanted = set(slot.positions)
+            fits = [(n, sal, r) for r, (held, n, sal) in candidates.items()
+                    if r not in used and all(h & wanted for h in held)]
+            if not fits:
+                raise ValueError(f'No roster_slot_id for {self.sport} {self.name} slot {slot.name}')
+            n, sal, r = max(fits) if slot.multiplier > 1 else max(fits, key=lambda f: (f[0], -f[1]))
+            slot_ids[slot.name] = r
+            used.add(r)
+        return attr.evolve(self, slots=tuple(attr.evolve(s, roster_slot_id=slot_ids[s.name]) for s in self.slots))
+
+
+def _template(sport: str, name: str, slots: Sequence[Tuple], **kwargs) -> RosterRules:
+    return RosterRules(sport=sport, name=name, slots=tuple(RosterSlot(*s) for s in slots), **kwargs)
+
+
+def _captain(sport: str, positions: Tuple[str, ...], flex: str = 'FLEX') -> RosterRules:
+    return _template(sport, 'Showdown Captain Mode', [('CPT', positions, 1, 1.5), (flex, positions, 5)], min_teams=2)
+
+
+NFL_POSITIONS = ('QB', 'RB', 'WR', 'TE', 'K', 'DST')
+MLB_POSITIONS = ('SP', 'RP', 'C', '1B', '2B', '3B', 'SS', 'OF')
+NBA_POSITIONS = ('PG', 'SG', 'SF', 'PF', 'C')
+NHL_POSITIONS = ('C', 'W', 'D', 'G')
+
+# (sport, game style) -> RosterRules, roster_slot_ids are bound per draft group
+ROSTER_TEMPLATES = {(r.sport, r.name): r for r in (
+  _template('NFL', 'Classic', [('QB', ('QB',)), ('RB', ('RB',), 2), ('WR', ('WR',), 3), ('TE', ('TE',)),
+                               ('FLEX', ('RB', 'WR', 'TE')), ('DST', ('DST',))], min_games=2),
+  _captain('NFL', NFL_POSITIONS),
+  _template('MLB', 'Classic', [('P', ('SP', 'RP'), 2), ('C', ('C',)), ('1B', ('1B',)), ('2B', ('2B',)),
+                               ('3B', ('3B',)), ('SS', ('SS',)), ('OF', ('OF',), 3)], min_games=2),
+  _captain('MLB', MLB_POSITIONS, 'UTIL'),
+  _template('NBA', 'Classic', [('PG', ('PG',)), ('SG', ('SG',)), ('SF', ('SF',)), ('PF', ('PF',)), ('C', ('C',)),
+                               ('G', ('PG', 'SG')), ('F', ('SF', 'PF')), ('UTIL', NBA_POSITIONS)], min_games=2),
+  _captain('NBA', NBA_POSITIONS, 'UTIL'),
+  _template('NHL', 'Classic', [('C', ('C',), 2), ('W', ('W',), 3), ('D', ('D',), 2), ('G', ('G',)),
+                               ('UTIL', ('C', 'W', 'D'))], min_games=2),
+  _captain('NHL', NHL_POSITIONS, 'UTIL'),
+)}
+
+
+def salary_cap(game_type: GameTypeDocument) -> int:
+    """Gets the salary cap from a game type description, None if it has none"""
+    m = SALARY_CAP_RE.search(game_type.description or '')
+    return int(m.group(1).replace(',', '')) if m else None
+
+
+def _popcount(bits: np.ndarray) -> np.ndarray:
+    """Counts set bits of uint64 values, np.bitwise_count needs numpy 2.0"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(bits)
+    bits = bits - ((bits >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    bits = (bits & np.uint64(0x3333333333333333)) + ((bits >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    bits = (bits + (bits >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((bits * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.uint8)
+
+
+class LineupValidator:
+    """Bound rules compiled against the players of one draft group
+
+    Lineups are draftable_ids, one row per lineup. Checks run on the
+    whole array at once; check returns a violation bitmask per lineup
+    (see VIOLATIONS), 0 for a valid lineup.
+
+    """
+    def __init__(self, rules: RosterRules, players: Union[DraftablesDocument, PlayerPool], slot_ids: Dict[str, int] = None):
+        """Creates LineupValidator
+
+        Args:
+            rules (RosterRules): the rules, bound to the draft group if not bound yet
+            players (Union[DraftablesDocument, PlayerPool]): the draft group players, games are
+                only checked for a DraftablesDocument since a PlayerPool has no competitions
+            slot_ids (Dict[str, int]): roster_slot_id by slot name, default None (detect)
+
+        Raises:
+            ValueError: if the rules cannot be bound or have too many slots to pack
+
+        """
+        pool = PlayerPool.from_document(players) if isinstance(players, DraftablesDocument) else players
+        self.rules = rules if rules.is_bound and not slot_ids else rules.bind(pool, slot_ids)
+        self.pool = pool
+        if len(self.rules.slots) > MAX_SLOTS or self.rules.size >= 1 << COUNT_BITS:
+            raise ValueError(f'Cannot pack {len(self.rules.slots)} slots of {self.rules.size} players')
+        n = len(pool)
+        ids = pool.arrays['draftable_id']
+        # draftable_ids of a draft group are close together, so a dense table beats a binary search
+        self._base = int(ids.min()) if n else 0
+        span = int(ids.max()) - self._base + 1 if n else 0
+        if span <= max(LOOKUP_SPAN, LOOKUP_RATIO * n):
+            self._lookup = np.full(max(span, 0), n, dtype=np.int64)
+            # the first row wins for repeated draftable_ids, like a dict built from the pool
+            self._lookup[ids[::-1] - self._base] = np.arange(n)[::-1]
+        else:
+            self._lookup = None
+            self._order = np.argsort(ids, kind='stable')
+            self._sorted_ids = ids[self._order]
+        # per row arrays get one extra row for draftable_ids not in the pool
+        rsid = pool.arrays['roster_slot_id']
+        self._packed = np.full(n + 1, 1 << (COUNT_BITS * MAX_SLOTS), dtype=np.int64)
+        self._group = np.full(n + 1, -1, dtype=np.int64)
+        required = 0
+        for g, slot in enumerate(self.rules.slots):
+            rows = np.flatnonzero(rsid == slot.roster_slot_id)
+            self._packed[rows] = 1 << (COUNT_BITS * g)
+            self._group[rows] = g
+            required += slot.count << (COUNT_BITS * g)
+        self._required = required
+        self._lineup_groups = np.array([self.rules.slots.index(s) for s in self.rules.lineup_slots()], dtype=np.int64)
+        self._salary = np.append(pool.arrays['salary'], 0)
+        self._player = np.append(pool.arrays['player_id'], -1)
+        self._disabled = np.append(pool.arrays['is_disabled'].astype(np.bool_), False)
+        mult = np.ones(n + 1)
+        for slot in self.rules.slots:
+            mult[:-1][rsid == slot.roster_slot_id] = slot.multiplier
+        self._multiplier = mult
+        self._teams = self._bits(np.append(pool.arrays['team_abbreviation'], -1))
+        games = None
+        if isinstance(players, DraftablesDocument):
+            comps = np.array([p.competition.get('competitionId') or -1 for p in players.draftables] + [-1], dtype=np.int64)
+            # -1 sorts first and is always present, so game codes start at 0 after the shift
+            _, codes = np.unique(comps, return_inverse=True)
+            games = np.where(comps >= 0, codes - 1, -1)
+        self._games = self._bits(games) if games is not None else None
+
+    @staticmethod
+    def _bits(codes: np.ndarray) -> np.ndarray:
+        """Gets one uint64 bit per code, codes itself when there are more than 64"""
+        if codes.max(initial=-1) < 64:
+            return np.where(codes >= 0, np.left_shift(np.uint64(1), np.maximum(codes, 0).astype(np.uint64)), np.uint64(0))
+        return codes
+
+    def __len__(self) -> int:
+        return len(self.pool)
+
+    def encode(self, lineups: Union[np.ndarray, Sequence[Sequence[int]]]) -> np.ndarray:
+        """Gets pool rows of lineups, len(pool) for draftable_ids not in the pool"""
+        lineups = np.asarray(lineups, dtype=np.int64)
+        if lineups.ndim == 1:
+            lineups = lineups[None, :]
+        if self._lookup is not None:
+            idx = lineups - self._base
+            inside = (idx >= 0) & (idx < len(self._lookup))
+            return np.where(inside, self._lookup[np.where(inside, idx, 0)] if len(self._lookup) else 0, len(self.pool))
+        # only sparse, hence non-empty, pools get here
+        pos = np.minimum(np.searchsorted(self._sorted_ids, lineups), len(self._sorted_ids) - 1)
+        return np.where(self._sorted_ids[pos] == lineups, self._order[pos], len(self.pool))
+
+    @staticmethod
+    def _distinct(values: np.ndarray) -> np.ndarray:
+        """Counts distinct values per row, from bits when values are uint64 bits"""
+        if values.dtype == np.uint64:
+            return _popcount(np.bitwise_or.reduce(values, axis=1))
+        s = np.sort(values, axis=1)
+        return (s[:, :1] >= 0).sum(axis=1) + ((s[:, 1:] != s[:, :-1]) & (s[:, 1:] >= 0)).sum(axis=1)
+
+    def check(self, lineups: Union[np.ndarray, Sequence[Sequence[int]]], ordered: bool = False) -> np.ndarray:
+        """Checks lineups
+
+        Args:
+            lineups (Union[np.ndarray, Sequence[Sequence[int]]]): n x size draftable_ids
+            ordered (bool): players must also be in slot order (e.g. QB, RB, RB, ...), default False
+
+        Returns:
+            np.ndarray: uint8 violation bits per lineup, 0 if valid
+
+        """
+        rows = self.encode(lineups)
+        out = np.zeros(len(rows), dtype=np.uint8)
+        if rows.size == 0:
+            return out
+        out[(rows == len(self.pool)).any(axis=1)] |= UNKNOWN_PLAYER
+        if rows.shape[1] != self.rules.size:
+            out |= ROSTER
+        elif ordered:
+            out[(self._group[rows] != self._lineup_groups[None, :]).any(axis=1)] |= ROSTER
+        else:
+            out[self._packed[rows].sum(axis=1) != self._required] |= ROSTER
+        if self.rules.salary_cap is not None:
+            out[self._salary[rows].sum(axis=1) > self.rules.salary_cap] |= SALARY_CAP
+        players = np.sort(self._player[rows], axis=1)
+        out[((players[:, 1:] == players[:, :-1]) & (players[:, 1:] >= 0)).any(axis=1)] |= DUPLICATE_PLAYER
+        if self.rules.min_teams > 1:
+            out[self._distinct(self._teams[rows]) < self.rules.min_teams] |= TEAMS
+        if self.rules.min_games > 1 and self._games is not None:
+            out[self._distinct(self._games[rows]) < self.rules.min_games] |= GAMES
+        out[self._disabled[rows].any(axis=1)] |= DISABLED
+        return out
+
+    def valid(self, lineups: Union[np.ndarray, Sequence[Sequence[int]]], ordered: bool = False) -> np.ndarray:
+        """Gets boolean mask of valid lineups"""
+        return self.check(lineups, ordered) == 0
+
+    def explain(self, lineup: Sequence[int], ordered: bool = False) -> List[str]:
+        """Gets violation names of one lineup, empty if valid"""
+        bits = int(self.check([lineup], ordered)[0])
+        return [name for bit, name in VIOLATIONS.items() if bits & bit]
+
+    def salaries(self, lineups: Union[np.ndarray, Sequence[Sequence[int]]]) -> np.ndarray:
+        """Gets total salary per lineup"""
+        return self._salary[self.encode(lineups)].sum(axis=1)
+
+    def score(self, lineups: Union[np.ndarray, Sequence[Sequence[int]]], points: np.ndarray) -> np.ndarray:
+        """Gets lineup points with slot multipliers applied
+
+        Args:
+            lineups (Union[np.ndarray, Sequence[Sequence[int]]]): n x size draftable_ids
+            points (np.ndarray): points per pool row
+
+        Returns:
+            np.ndarray: float points per lineup
+
+        """
+        rows = self.encode(lineups)
+        pts = np.append(np.asarray(points, dtype=np.float64), 0.0)
+        return (pts[rows] * self._multiplier[rows]).sum(axis=1)
+
+
+class RulesRegistry:
+    """Builds, caches and serves RosterRules and LineupValidators
+
+    Rules are cached per (sport, game_type_id), validators per
+    draft_group_id when one is given.
+
+    """
+    def __init__(self, templates: Dict[Tuple[str, str], RosterRules] = None):
+        """Creates RulesRegistry
+
+        Args:
+            templates (Dict[Tuple[str, str], RosterRules]): rules by (sport, game style), default None (ROSTER_TEMPLATES)
+
+        """
+        self.templates = dict(ROSTER_TEMPLATES if templates is None else templates)
+        self._rules: Dict[Tuple[str, int], RosterRules] = {}
+        self._validators: Dict[int, LineupValidator] = {}
+        self._lock = threading.Lock()
+
+    def register(self, rules: RosterRules) -> None:
+        """Adds or replaces the template for (rules.sport, rules.name)"""
+        with self._lock:
+            self.templates[(rules.sport, rules.name)] = rules
+            self._rules.clear()
+            self._validators.clear()
+
+    def _template(self, sport: str, names: Iterable[str]) -> RosterRules:
+        for name in names:
+            if (sport, name) in self.templates:
+                return self.templates[(sport, name)]
+        return None
+
+    def _sport(self, game_type_id: int) -> str:
+        """Gets the sport of a game type id from the game type tables, NFL if not found"""
+        sports = {sid for sid, table in SPORT_GAMETYPES.items() if game_type_id in table}
+        abbr = {v: k for k, v in SPORT_IDS.items()}
+        return abbr[sports.pop()] if len(sports) == 1 else 'NFL'
+
+    def rules(self, game_type: Union[int, GameTypeDocument], sport: str = None) -> RosterRules:
+        """Gets rules of a game type
+
+        Args:
+            game_type (Union[int, GameTypeDocument]): game type id or document, a document sets
+                the salary cap from its description
+            sport (str): e.g. 'NFL', default None (from the document or the game type tables)
+
+        Returns:
+            RosterRules: not bound to a draft group
+
+        Raises:
+            KeyError: if no template matches the game type
+
+        """
+        if isinstance(game_type, GameTypeDocument):
+            abbr = {v: k for k, v in SPORT_IDS.items()}
+            sport = sport or abbr.get(game_type.sport_id)
+            gid = game_type.game_type_id
+        else:
+            gid = game_type
+            sport = sport or self._sport(gid)
+        key = (sport, gid)
+        if key in self._rules:
+            return self._rules[key]
+        names = []
+        if isinstance(game_type, GameTypeDocument):
+            names += [game_type.game_style.get('Name'), game_type.name]
+        names.append(SPORT_GAMETYPES.get(SPORT_IDS.get(sport), {}).get(gid))
+        if sport == 'NFL':
+            names.append(GAME_TYPE_IDS.get(gid))
+        template = self._template(sport, [n for n in names if n])
+        if template is None:
+            raise KeyError(f'No roster rules for {sport} game type {gid}')
+        changes = {'game_type_id': gid}
+        if isinstance(game_type, GameTypeDocument) and salary_cap(game_type):
+            changes['salary_cap'] = salary_cap(game_type)
+        rules = attr.evolve(template, **changes)
+        with self._lock:
+            return self._rules.setdefault(key, rules)
+
+    def add_game_types(self, game_types: Iterable[GameTypeDocument]) -> Dict[int, RosterRules]:
+        """Caches rules of lobby game types, e.g. GetContestsDocument.game_types
+
+        Returns:
+            Dict[int, RosterRules]: key is game_type_id, game types without a template are left out
+
+        """
+        out = {}
+        for gt in game_types:
+            try:
+                out[gt.game_type_id] = self.rules(gt)
+            except KeyError:
+                continue
+        return out
+
+    def validator(self,
+                  players: Union[DraftablesDocument, PlayerPool],
+                  game_type: Union[int, GameTypeDocument],
+                  sport: str = None,
+                  draft_group_id: int = None,
+                  slot_ids: Dict[str, int] = None) -> LineupValidator:
+        """Gets a validator for a draft group
+
+        Args:
+            players (Union[DraftablesDocument, PlayerPool]): the draft group players
+            game_type (Union[int, GameTypeDocument]): the draft group game type
+            sport (str): e.g. 'NFL', default None (see rules)
+            draft_group_id (int): caches the validator under this id, default None (not cached)
+            slot_ids (Dict[str, int]): roster_slot_id by slot name, default None (detect)
+
+        Returns:
+            LineupValidator
+
+        """
+        if draft_group_id is not None and draft_group_id in self._validators:
+            return self._validators[draft_group_id]
+        validator = LineupValidator(self.rules(game_type, sport), players, slot_ids)
+        if draft_group_id is None:
+            return validator
+        with self._lock:
+            return self._validators.setdefault(draft_group_id, validator)
+
+    def for_draft_group(self, draft_group: Any, players: Union[DraftablesDocument, PlayerPool]) -> LineupValidator:
+        """Gets the cached validator of a DraftGroupDocument"""
+        return self.validator(players, draft_group.game_type_id, draft_group.sport, draft_group.draft_group_id)
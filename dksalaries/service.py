@@ -0,0 +1,388 @@
+# dksalaries/dksalaries/service.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""service.py: long-running local salary service with in-memory hot cache
+
+Example:
+
+    svc = SalaryService(sports=['NFL'], interval=300)
+    svc.start()
+    serve(svc, port=8765)
+
+    $ curl localhost:8765/slates
+    $ curl 'localhost:8765/draftgroups/53019/players?position=RB&team=CAR'
+    $ curl localhost:8765/draftgroups/53019/salaries
+    $ curl localhost:8765/players/830517
+
+"""
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+import functools
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import socketserver
+import threading
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import attr
+
+from .constants import DEFAULT_SPORTS
+from .documents import DraftablesDocument, GetContestsDocument
+from .players import PlayerIndex
+from .pool import PlayerPool
+
+
+logger = logging.getLogger(__name__)
+
+# encoded responses memoized per state, least recently used dropped first
+RESPONSE_CACHE_SIZE = 1024
+
+
+@attr.s(auto_attribs=True)
+class DraftGroupIndex:
+    """Prebuilt lookups for one draft group"""
+    draft_group_id: int
+    sport: str
+    document: DraftablesDocument
+    pool: PlayerPool
+    players: List[Dict[str, Any]] = attr.Factory(list)
+    by_position: Dict[str, List[Dict[str, Any]]] = attr.Factory(dict)
+    by_team: Dict[str, List[Dict[str, Any]]] = attr.Factory(dict)
+    salaries: Dict[int, int] = attr.Factory(dict)
+
+    @classmethod
+    def build(cls, draft_group_id: int, sport: str, ddoc: DraftablesDocument) -> 'DraftGroupIndex':
+        """Builds indexes for a parsed draftables document
+
+        Args:
+            draft_group_id (int): the draft group id
+            sport (str): the sport
+            ddoc (DraftablesDocument): the parsed draftables
+
+        Returns:
+            DraftGroupIndex
+
+        """
+        pool = PlayerPool.from_document(ddoc)
+        o = cls(draft_group_id=draft_group_id, sport=sport, document=ddoc, pool=pool,
+                players=list(pool.rows()))
+        for row in o.players:
+            o.by_position.setdefault(row['position'], []).append(row)
+            o.by_team.setdefault(row['team_abbreviation'], []).append(row)
+            o.salaries[row['draftable_id']] = row['salary']
+        return o
+
+
+@attr.s(auto_attribs=True)
+class ServiceState:
+    """Snapshot of lobbies and indexes, swapped in whole by each refresh"""
+    lobbies: Dict[str, GetContestsDocument] = attr.Factory(dict)
+    draft_groups: Dict[int, DraftGroupIndex] = attr.Factory(dict)
+    slates: List[Dict[str, Any]] = attr.Factory(list)
+    players: PlayerIndex = attr.Factory(PlayerIndex)
+    refreshed: datetime.datetime = None
+    responses: 'collections.OrderedDict[Tuple, bytes]' = attr.Factory(collections.OrderedDict)
+    lock: threading.Lock = attr.ib(factory=threading.Lock, eq=False, repr=False)
+
+    def response(self, key: Tuple, build: Callable[[], bytes]) -> bytes:
+        """Gets a memoized response, building and adding it on a miss
+
+        Args:
+            key (Tuple): the normalized query, e.g. ('players', 53019, 'RB', None)
+            build (Callable[[], bytes]): encodes the response
+
+        Returns:
+            bytes
+
+        """
+        with self.lock:
+            body = self.responses.get(key)
+            if body is not None:
+                self.responses.move_to_end(key)
+                return body
+        body = build()
+        with self.lock:
+            self.responses[key] = body
+            while len(self.responses) > RESPONSE_CACHE_SIZE:
+                self.responses.popitem(last=False)
+        return body
+
+
+class SalaryService:
+    """Keeps current lobbies and draftables in memory and refreshes them in the background"""
+
+    def __init__(self,
+                 scraper: Any = None,
+                 parser: Any = None,
+                 sports: Sequence[str] = DEFAULT_SPORTS,
+                 game_types: Sequence[str] = ('Classic',),
+                 slates: str = 'all',
+                 interval: float = 300,
+                 max_workers: int = 8):
+        """Creates service
+
+        Args:
+            scraper (Scraper): default None (creates Scraper)
+            parser (Parser): default None (creates Parser)
+            sports (Sequence[str]): the lobbies to keep, default DEFAULT_SPORTS
+            game_types (Sequence[str]): game type names to load draftables for, default Classic
+            slates (str): slate selector, 'main', 'featured' or 'all', default 'all'
+            interval (float): seconds between refreshes, default 300
+            max_workers (int): concurrent draftables downloads, default 8
+
+        """
+        if scraper is None:
+            from .dksalaries import Scraper
+            scraper = Scraper(max_workers=max_workers, thread_safe=True)
+        if parser is None:
+            from .dksalaries import Parser
+            parser = Parser()
+        self.scraper = scraper
+        self.parser = parser
+        self.sports = list(sports)
+        self.game_types = list(game_types)
+        self.slate_selector = slates
+        self.interval = interval
+        self.max_workers = max_workers
+        self.state = ServiceState()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> ServiceState:
+        """Fetches and parses everything, then swaps in the new state
+
+        Draft groups whose draftables fail to download keep their previous
+        index so a transient error does not empty the cache. Likewise a
+        sport whose lobby fails keeps its previous lobby and draft groups.
+
+        Returns:
+            ServiceState
+
+        """
+        old = self.state
+        lobbies = {}
+        wanted = []
+        kept = []
+        for sport, data in self.scraper.getcontests_many(self.sports, return_exceptions=True):
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                gcd = self.parser.getcontests(data)
+                if not gcd.selected_sport:
+                    gcd.selected_sport = sport
+                dgids = gcd.select_draft_groups(self.game_types, self.slate_selector)
+            except Exception as e:
+                logger.warning(f'could not refresh {sport} lobby: {e}')
+                if sport in old.lobbies:
+                    lobbies[sport] = old.lobbies[sport]
+                kept += [idx for idx in old.draft_groups.values() if idx.sport == sport]
+                continue
+            lobbies[sport] = gcd
+            wanted += [(sport, dgid) for dgid in dgids]
+
+        def _load(item: Tuple[str, int]) -> DraftGroupIndex:
+            sport, dgid = item
+            try:
+                return DraftGroupIndex.build(dgid, sport, self.parser.draftables(self.scraper.draftables(dgid)))
+            except Exception as e:
+                logger.warning(f'could not refresh draft group {dgid}: {e}')
+                return old.draft_groups.get(dgid)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            indexes = kept + [idx for idx in executor.map(_load, wanted) if idx is not None]
+
+        players = PlayerIndex()
+        for idx in indexes:
+            players.add(idx.draft_group_id, idx.document)
+
+        slates = []
+        for gcd in lobbies.values():
+            for s in gcd.classic_slates:
+                slates.append({
+                    'sport': s.sport,
+                    'game_set_key': s.game_set_key,
+                    'draft_group_ids': [dg.draft_group_id for dg in s.dg],
+                    'n_games': s.n_games,
+                    'start_date': s.start_date.isoformat(),
+                    'end_date': s.end_date.isoformat(),
+                    'is_main_slate': s.is_main_slate,
+                })
+
+        self.state = ServiceState(lobbies=lobbies,
+                                  draft_groups={idx.draft_group_id: idx for idx in indexes},
+                                  slates=slates,
+                                  players=players,
+                                  refreshed=datetime.datetime.now(datetime.timezone.utc))
+        return self.state
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception('refresh failed')
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Starts background refresh thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='dksalaries-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stops background refresh thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def slates(self, sport: str = None) -> List[Dict[str, Any]]:
+        """Gets classic slates, optionally for one sport"""
+        return [s for s in self.state.slates if sport is None or s['sport'] == sport]
+
+    def players(self, draft_group_id: int, position: str = None, team: str = None) -> List[Dict[str, Any]]:
+        """Gets players in a draft group by position and/or team
+
+        Args:
+            draft_group_id (int): the draft group id
+            position (str): the player position, default None
+            team (str): the team abbreviation, default None
+
+        Returns:
+            List[Dict[str, Any]]
+
+        Raises:
+            KeyError: if the draft group is not loaded
+
+        """
+        idx = self.state.draft_groups[draft_group_id]
+        if position and team:
+            return [p for p in idx.by_position.get(position, []) if p['team_abbreviation'] == team]
+        if position:
+            return idx.by_position.get(position, [])
+        if team:
+            return idx.by_team.get(team, [])
+        return idx.players
+
+    def salaries(self, draft_group_id: int) -> Dict[int, int]:
+        """Gets salaries keyed by draftable id"""
+        return self.state.draft_groups[draft_group_id].salaries
+
+    def player(self, player_id: int) -> List[Dict[str, Any]]:
+        """Gets every draft group, roster slot and salary of a player
+
+        Raises:
+            KeyError: if the player is not in any loaded draft group
+
+        """
+        if player_id not in self.state.players:
+            raise KeyError(player_id)
+        players = self.state.players
+        return players.as_dicts(players.appearances(player_id))
+
+    def status(self) -> Dict[str, Any]:
+        """Gets service status"""
+        state = self.state
+        return {'refreshed': state.refreshed.isoformat() if state.refreshed else None,
+                'sports': list(state.lobbies),
+                'draft_groups': sorted(state.draft_groups)}
+
+    def query(self, target: str) -> bytes:
+        """Answers an API path with encoded json, memoized per state
+
+        Responses are memoized by route and known parameters, so unknown
+        parameters and their order do not add entries.
+
+        Args:
+            target (str): path and query string, e.g. '/draftgroups/53019/players?position=RB'
+
+        Returns:
+            bytes
+
+        Raises:
+            KeyError: for unknown paths or draft groups
+
+        """
+        state = self.state
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        parts = [p for p in url.path.split('/') if p]
+        if parts == ['slates']:
+            key = ('slates', params.get('sport'))
+            func = functools.partial(self.slates, params.get('sport'))
+        elif parts == ['status']:
+            return json.dumps(self.status()).encode()
+        elif len(parts) == 3 and parts[0] == 'draftgroups' and parts[2] == 'players':
+            key = ('players', int(parts[1]), params.get('position'), params.get('team'))
+            func = functools.partial(self.players, *key[1:])
+        elif len(parts) == 2 and parts[0] == 'players':
+            key = ('player', int(parts[1]))
+            func = functools.partial(self.player, key[1])
+        elif len(parts) == 3 and parts[0] == 'draftgroups' and parts[2] == 'salaries':
+            key = ('salaries', int(parts[1]))
+            func = functools.partial(self.salaries, key[1])
+        else:
+            raise KeyError(target)
+        return state.response(key, lambda: json.dumps(func()).encode())
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """Serves SalaryService.query over HTTP"""
+    service: SalaryService = None
+
+    def do_GET(self):
+        try:
+            body, code = self.service.query(self.path), 200
+        except (KeyError, ValueError) as e:
+            body, code = json.dumps({'error': f'not found: {e}'}).encode(), 404
+        except Exception as e:
+            logger.exception(f'error serving {self.path}')
+            body, code = json.dumps({'error': f'internal error: {e}'}).encode(), 500
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP over a unix domain socket"""
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('local', 0)
+
+
+def make_server(service: SalaryService, host: str = '127.0.0.1', port: int = 8765, unix_socket: str = None) -> socketserver.BaseServer:
+    """Creates HTTP server for service
+
+    Args:
+        service (SalaryService): the service
+        host (str): the bind address, default '127.0.0.1'
+        port (int): the port, default 8765
+        unix_socket (str): serve on this unix socket path instead, default None
+
+    Returns:
+        socketserver.BaseServer
+
+    """
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    if unix_socket:
+        return ThreadingUnixHTTPServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve(service: SalaryService, host: str = '127.0.0.1', port: int = 8765, unix_socket: str = None) -> None:
+    """Serves service until interrupted"""
+    with make_server(service, host, port, unix_socket) as server:
+        server.serve_forever()
@@ -0,0 +1,333 @@
+# dksalaries/dksalaries/simulate.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""simulate.py: vectorized Monte Carlo contest simulator
+
+Each iteration draws one fantasy score per athlete, scores every lineup
+and the field, ranks the lineups against the field and pays them from
+the contest payout table. Iterations run in chunks so memory stays
+bounded, optionally spread over worker processes.
+
+Example:
+
+    ddoc = p.draftables(s.draftables(53019))
+    payouts = payout_table(p.contest_detail(s.contest_detail(111149920)))
+    sim = ContestSimulator(ddoc)
+    res = sim.simulate(lineups, payouts, field=field_lineups, iterations=100000, processes=4)
+    res.roi
+
+"""
+from concurrent.futures import ProcessPoolExecutor
+import re
+from typing import Any, Dict, Sequence, Union
+
+import attr
+import numpy as np
+
+from .documents import ContestDocument, DraftablesDocument, TournamentDocument
+from .pool import PlayerPool
+
+
+# std of a player score as a fraction of the mean, when not given
+DEFAULT_CV = 0.45
+
+# flat-payout contest types: name fragment and prize as a multiple of the entry fee
+FLAT_PAYOUTS = (
+  ('Double Up', 2.0),
+  ('Triple Up', 3.0),
+  ('Quintuple Up', 5.0),
+  ('50/50', 1.8),
+)
+
+
+def _money(s: Any) -> float:
+    """Parses DK money strings, e.g. '$1,000,000.00'"""
+    if s is None:
+        return 0.0
+    if isinstance(s, (int, float)):
+        return float(s)
+    digits = re.sub(r'[^0-9.]', '', str(s))
+    return float(digits) if digits else 0.0
+
+
+@attr.s(auto_attribs=True)
+class PayoutTable:
+    """Cash payout tiers of a contest, positions are 1-based and inclusive"""
+    min_position: np.ndarray
+    max_position: np.ndarray
+    amount: np.ndarray
+    entry_fee: float
+    size: int
+
+    def payout(self, rank: np.ndarray) -> np.ndarray:
+        """Gets payout for finishing ranks, 0 outside the tiers"""
+        rank = np.asarray(rank)
+        tier = np.searchsorted(self.max_position, rank, side='left')
+        tier = np.minimum(tier, len(self.amount) - 1)
+        paid = (rank >= self.min_position[tier]) & (rank <= self.max_position[tier])
+        return np.where(paid, self.amount[tier], 0.0)
+
+    @property
+    def total(self) -> float:
+        return float(((self.max_position - self.min_position + 1) * self.amount).sum())
+
+
+def payout_table(contest: Union[ContestDocument, TournamentDocument], size: int = None) -> PayoutTable:
+    """Builds payout table from a contest or tournament
+
+    TournamentDocument.payout_summaries (lobby tournaments or contest
+    detail) give the full tiers. ContestDocument only carries the total
+    prize, so only head-to-head and flat payout contests (double ups,
+    50/50s) can be built from it. Ticket prizes are valued at 0.
+
+    Args:
+        contest (Union[ContestDocument, TournamentDocument]): the contest
+        size (int): the number of entries, default None (contest maximum)
+
+    Returns:
+        PayoutTable
+
+    Raises:
+        ValueError: if the tiers cannot be derived
+
+    """
+    if isinstance(contest, TournamentDocument):
+        tiers = sorted(contest.payout_summaries or [], key=lambda t: t['MinPosition'])
+        if not tiers:
+            raise ValueError(f'No payout summaries for {contest.tournament_key}')
+        return PayoutTable(min_position=np.array([t['MinPosition'] for t in tiers], dtype=np.int64),
+                           max_position=np.array([t['MaxPosition'] for t in tiers], dtype=np.int64),
+                           amount=np.array([_money(t['TierPayoutDescriptions'].get('Cash')) for t in tiers]),
+                           entry_fee=float(contest.entry_fee or 0),
+                           size=size or contest.maximum_entries or tiers[-1]['MaxPosition'])
+    fee = float(contest.a or 0)
+    size = size or contest.m
+    if size == 2:
+        n_paid, prize = 1, float(contest.po or 0)
+    else:
+        multiple = next((m for name, m in FLAT_PAYOUTS if name in (contest.n or '')), None)
+        if multiple is None or not fee:
+            raise ValueError(f'Payout tiers of contest {contest.id} need contest detail')
+        prize = fee * multiple
+        n_paid = int(round(float(contest.po or 0) / prize))
+    return PayoutTable(min_position=np.array([1]), max_position=np.array([n_paid]), amount=np.array([prize]),
+                       entry_fee=fee, size=size)
+
+
+@attr.s(auto_attribs=True)
+class SimulationResult:
+    """Per-lineup results, arrays are aligned with the simulated lineups"""
+    iterations: int
+    entry_fee: float
+    mean_payout: np.ndarray
+    std_payout: np.ndarray
+    cash_rate: np.ndarray
+    win_rate: np.ndarray
+    mean_rank: np.ndarray
+
+    @property
+    def roi(self) -> np.ndarray:
+        """Expected return on the entry fee, e.g. 0.1 is +10%"""
+        if not self.entry_fee:
+            return np.full_like(self.mean_payout, np.nan)
+        return self.mean_payout / self.entry_fee - 1
+
+    @classmethod
+    def combine(cls, parts: Sequence['SimulationResult']) -> 'SimulationResult':
+        """Combines results of independent runs over the same lineups"""
+        n = sum(p.iterations for p in parts)
+        w = [p.iterations / n for p in parts]
+        mean = sum(wi * p.mean_payout for wi, p in zip(w, parts))
+        second = sum(wi * (p.std_payout ** 2 + p.mean_payout ** 2) for wi, p in zip(w, parts))
+        return cls(iterations=n, entry_fee=parts[0].entry_fee, mean_payout=mean,
+                   std_payout=np.sqrt(np.maximum(second - mean ** 2, 0)),
+                   cash_rate=sum(wi * p.cash_rate for wi, p in zip(w, parts)),
+                   win_rate=sum(wi * p.win_rate for wi, p in zip(w, parts)),
+                   mean_rank=sum(wi * p.mean_rank for wi, p in zip(w, parts)))
+
+
+def _count_greater(sorted_rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Counts, per row, entries of sorted_rows strictly greater than each value
+
+    Rows are shifted into disjoint ranges so one searchsorted covers the
+    whole chunk.
+
+    """
+    c, n = sorted_rows.shape
+    lo = min(sorted_rows.min(), values.min())
+    span = max(sorted_rows.max(), values.max()) - lo + 1.0
+    offset = (np.arange(c) * span)[:, None]
+    flat = (sorted_rows - lo + offset).ravel()
+    pos = np.searchsorted(flat, (values - lo + offset).ravel(), side='right').reshape(values.shape)
+    return (np.arange(1, c + 1) * n)[:, None] - pos
+
+
+def _lineup_scores(scores: np.ndarray, lineups: np.ndarray) -> np.ndarray:
+    """Sums slot by slot, avoids a (chunk, lineups, slots) temporary"""
+    out = scores[:, lineups[:, 0]]
+    for j in range(1, lineups.shape[1]):
+        out += scores[:, lineups[:, j]]
+    return out
+
+
+def _simulate(means: np.ndarray,
+              stds: np.ndarray,
+              athlete: np.ndarray,
+              multiplier: np.ndarray,
+              lineups: np.ndarray,
+              field: np.ndarray,
+              payouts: PayoutTable,
+              iterations: int,
+              chunk_size: int,
+              seed: Any) -> SimulationResult:
+    """Runs iterations in chunks, module level so worker processes can run it"""
+    rng = np.random.default_rng(seed)
+    n_lineups, n_field = len(lineups), len(field)
+    # the field sample stands in for every entry that is not ours
+    scale = max(payouts.size - n_lineups, 0) / n_field if n_field else 0.0
+    total = np.zeros(n_lineups)
+    total_sq = np.zeros(n_lineups)
+    cashed = np.zeros(n_lineups)
+    won = np.zeros(n_lineups)
+    rank_sum = np.zeros(n_lineups)
+    done = 0
+    while done < iterations:
+        c = min(chunk_size, iterations - done)
+        athletes = rng.normal(means, stds, size=(c, len(means)))
+        scores = athletes[:, athlete] * multiplier
+        ours = _lineup_scores(scores, lineups)
+        rank = 1.0 + _count_greater(np.sort(ours, axis=1), ours)
+        if n_field:
+            theirs = np.sort(_lineup_scores(scores, field), axis=1)
+            # spread each sampled field lineup over the scale entries it stands for
+            rank += np.floor((_count_greater(theirs, ours) + rng.random(ours.shape)) * scale)
+        paid = payouts.payout(rank.astype(np.int64))
+        total += paid.sum(axis=0)
+        total_sq += (paid ** 2).sum(axis=0)
+        cashed += (paid > 0).sum(axis=0)
+        won += (rank == 1).sum(axis=0)
+        rank_sum += rank.sum(axis=0)
+        done += c
+    mean = total / iterations
+    return SimulationResult(iterations=iterations, entry_fee=payouts.entry_fee, mean_payout=mean,
+                            std_payout=np.sqrt(np.maximum(total_sq / iterations - mean ** 2, 0)),
+                            cash_rate=cashed / iterations, win_rate=won / iterations,
+                            mean_rank=rank_sum / iterations)
+
+
+class ContestSimulator:
+    """Simulates lineups from one draft group against a contest
+
+    Scores are drawn per athlete (player_id), so the captain and flex
+    slots of the same player move together; a slot multiplier scales
+    the athlete score. An athlete's mean and std are taken unscaled
+    from a slot with multiplier 1 when it has one, else its first slot.
+    Scores are independent normals.
+
+    """
+    def __init__(self,
+                 players: Union[DraftablesDocument, PlayerPool],
+                 means: Union[Dict[int, float], np.ndarray] = None,
+                 stds: Union[Dict[int, float], np.ndarray] = None,
+                 multipliers: Dict[int, float] = None):
+        """Creates ContestSimulator
+
+        Args:
+            players (Union[DraftablesDocument, PlayerPool]): the draft group players
+            means (Union[Dict[int, float], np.ndarray]): mean score by draftable_id or aligned with the pool,
+                default None (FPPG from the stat matrix, needs a DraftablesDocument)
+            stds (Union[Dict[int, float], np.ndarray]): score std, default None (DEFAULT_CV * mean)
+            multipliers (Dict[int, float]): score multiplier by draftable_id, e.g. 1.5 for captains, default None
+
+        """
+        if isinstance(players, DraftablesDocument):
+            pool = PlayerPool.from_document(players)
+            if means is None:
+                means = np.nan_to_num(players.stat_matrix['FPPG']) if 'FPPG' in players.stat_matrix else None
+        else:
+            pool = players
+        if means is None:
+            raise ValueError('means are required without FPPG')
+        self.pool = pool
+        ids = pool.arrays['draftable_id']
+        self.index = {d: i for i, d in enumerate(ids.tolist())}
+        self.multiplier = self._aligned(multipliers or {}, 1.0)
+        draftable_means = self._aligned(means, 0.0)
+        draftable_stds = self._aligned(stds, np.nan) if stds is not None else np.abs(draftable_means) * DEFAULT_CV
+        player_ids = pool.arrays['player_id']
+        _, self.athlete = np.unique(player_ids, return_inverse=True)
+        # unscaled slots first, so each athlete takes its distribution from one if it has any
+        order = np.lexsort((np.arange(len(player_ids)), self.multiplier != 1))
+        _, first = np.unique(player_ids[order], return_index=True)
+        first = order[first]
+        self.means = draftable_means[first]
+        self.stds = np.nan_to_num(draftable_stds[first])
+
+    def _aligned(self, values: Union[Dict[int, float], np.ndarray], default: float) -> np.ndarray:
+        if isinstance(values, dict):
+            out = np.full(len(self.index), default, dtype=float)
+            for d, v in values.items():
+                i = self.index.get(d)
+                if i is not None:
+                    out[i] = v
+            return out
+        return np.asarray(values, dtype=float)
+
+    def encode(self, lineups: Sequence[Sequence[int]]) -> np.ndarray:
+        """Converts lineups of draftable_ids to pool row indices
+
+        Raises:
+            KeyError: for draftable_ids not in the pool
+
+        """
+        return np.array([[self.index[d] for d in lineup] for lineup in lineups], dtype=np.int64).reshape(len(lineups), -1)
+
+    def simulate(self,
+                 lineups: Sequence[Sequence[int]],
+                 payouts: PayoutTable,
+                 field: Sequence[Sequence[int]],
+                 iterations: int = 10000,
+                 chunk_size: int = 1000,
+                 field_sample: int = 2000,
+                 processes: int = None,
+                 seed: int = None) -> SimulationResult:
+        """Simulates lineups against a field
+
+        The field is a sample of opponent lineups; each iteration scales
+        the number of field lineups beating ours up to the contest size.
+        Ties are not split.
+
+        Args:
+            lineups (Sequence[Sequence[int]]): our lineups as draftable_ids
+            payouts (PayoutTable): the contest payouts
+            field (Sequence[Sequence[int]]): opponent lineups as draftable_ids, should not include ours
+            iterations (int): the number of simulated contests, default 10000
+            chunk_size (int): iterations per vectorized chunk, bounds memory, default 1000
+            field_sample (int): max field lineups scored per iteration, default 2000
+            processes (int): worker processes, default None (run in this process)
+            seed (int): random seed, default None
+
+        Returns:
+            SimulationResult
+
+        Raises:
+            ValueError: for an empty field
+
+        """
+        if not len(field):
+            raise ValueError('field needs at least one lineup')
+        ours = self.encode(lineups)
+        theirs = self.encode(field)
+        rng = np.random.default_rng(seed)
+        if len(theirs) > field_sample:
+            theirs = theirs[rng.choice(len(theirs), field_sample, replace=False)]
+        args = (self.means, self.stds, self.athlete, self.multiplier, ours, theirs, payouts)
+        if not processes or processes < 2:
+            return _simulate(*args, iterations, chunk_size, seed)
+        seeds = np.random.SeedSequence(seed).spawn(processes)
+        counts = [iterations // processes + (i < iterations % processes) for i in range(processes)]
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [executor.submit(_simulate, *args, n, chunk_size, s) for n, s in zip(counts, seeds) if n]
+            return SimulationResult.combine([f.result() for f in futures])
@@ -0,0 +1,350 @@
+# dksalaries/dksalaries/synthetic.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+"""synthetic.py: seeded getcontests/draftables payloads for scale testing
+
+Payloads follow the raw (camelCase) schemas of tests/data/getcontests.json
+and tests/data/draftables.json, with consistent cross references:
+contest dg -> DraftGroupId -> GameSetKey -> Competitions -> draftables
+competitions. The same athlete keeps one playerId across draft groups.
+
+Example:
+
+    gen = LobbyGenerator(seed=7, sport='NFL')
+    lobby = gen.getcontests(n_contests=40000, n_game_sets=30)
+    gcd = p.getcontests(lobby)
+    for dgid, payload in gen.draftables_many(lobby):
+        ddoc = p.draftables(payload)
+
+"""
+import datetime
+import hashlib
+import random
+import string
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .constants import MAIN_SLATE_RULES, SPORT_GAMETYPES, SPORT_IDS
+from .util import pytz
+
+
+ET = 'America/New_York'
+
+# per-sport roster templates: players per team by position, position slot ids,
+# flex slots and the positions they accept, salary range
+# NFL slot ids match DK, the others are synthetic
+SPORT_TEMPLATES = {
+  'NFL': {
+    'players': {'QB': 3, 'RB': 5, 'WR': 8, 'TE': 4, 'DST': 1},
+    'slots': {'QB': 66, 'RB': 67, 'WR': 68, 'TE': 69, 'DST': 71},
+    'flex': {70: ('RB', 'WR', 'TE')},
+    'salary': (2500, 9500),
+    'start_times': [(3, 20, 20, 1), (6, 13, 0, 9), (6, 16, 5, 2), (6, 16, 25, 2), (6, 20, 20, 1), (0, 20, 15, 1)],
+  },
+  'MLB': {
+    'players': {'SP': 3, 'RP': 2, 'C': 2, '1B': 2, '2B': 2, '3B': 2, 'SS': 2, 'OF': 5},
+    'slots': {'SP': 201, 'RP': 202, 'C': 203, '1B': 204, '2B': 205, '3B': 206, 'SS': 207, 'OF': 208},
+    'flex': {},
+    'salary': (2000, 12000),
+    'start_times': [(1, 13, 5, 2), (1, 19, 5, 6), (1, 19, 10, 4), (1, 20, 10, 2), (1, 22, 10, 3)],
+  },
+  'NBA': {
+    'players': {'PG': 3, 'SG': 3, 'SF': 3, 'PF': 3, 'C': 2},
+    'slots': {'PG': 301, 'SG': 302, 'SF': 303, 'PF': 304, 'C': 305},
+    'flex': {306: ('PG', 'SG'), 307: ('SF', 'PF'), 308: ('PG', 'SG', 'SF', 'PF', 'C')},
+    'salary': (3000, 11500),
+    'start_times': [(1, 19, 0, 3), (1, 19, 30, 3), (1, 20, 0, 2), (1, 22, 0, 2), (1, 22, 30, 1)],
+  },
+  'NHL': {
+    'players': {'C': 4, 'W': 8, 'D': 6, 'G': 2},
+    'slots': {'C': 401, 'W': 402, 'D': 403, 'G': 404},
+    'flex': {405: ('C', 'W', 'D')},
+    'salary': (2500, 9000),
+    'start_times': [(1, 19, 0, 5), (1, 19, 30, 2), (1, 20, 0, 2), (1, 22, 0, 2)],
+  },
+}
+
+NFL_TEAMS = ['ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB',
+             'HOU', 'IND', 'JAX', 'KC', 'LAC', 'LAR', 'LV', 'MIA', 'MIN', 'NE', 'NO', 'NYG',
+             'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS']
+
+GAME_STYLE_IDS = {'Classic': 1, 'Tiers': 2, 'Showdown Captain Mode': 48, 'Snake': 120, 'Snake Showdown': 121, 'Best Ball': 45}
+
+FIRST_NAMES = ['Aaron', 'Ben', 'Chris', 'Dak', 'Eli', 'Frank', 'Gus', 'Hunter', 'Isaiah', 'Jalen',
+               'Kyle', 'Lamar', 'Mike', 'Nick', 'Odell', 'Pat', 'Quez', 'Russ', 'Sam', 'Tom']
+
+
+def _dk_date(dt: datetime.datetime) -> str:
+    return f'/Date({int(dt.timestamp() * 1000)})/'
+
+
+def _iso(dt: datetime.datetime) -> str:
+    return dt.astimezone(pytz.utc).strftime('%Y-%m-%dT%H:%M:%S.0000000Z')
+
+
+def _ordinal(n: int) -> str:
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f'{n}{suffix}'
+
+
+class LobbyGenerator:
+    """Generates seeded, internally consistent DK payloads"""
+
+    def __init__(self, seed: int = None, sport: str = 'NFL', week_start: datetime.date = datetime.date(2021, 9, 6), n_teams: int = 32):
+        """Creates generator
+
+        Args:
+            seed (int): the random seed, default None
+            sport (str): one of SPORT_TEMPLATES, default 'NFL'
+            week_start (datetime.date): the Monday of the generated week
+            n_teams (int): the number of teams, default 32
+
+        """
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.sport = sport
+        self.sport_id = SPORT_IDS[sport]
+        self.template = SPORT_TEMPLATES[sport]
+        self.week_start = week_start
+        self.tz = pytz.timezone(ET)
+        if sport == 'NFL' and n_teams <= len(NFL_TEAMS):
+            self.teams = NFL_TEAMS[:n_teams]
+        else:
+            self.teams = [''.join(self.rng.choices(string.ascii_uppercase, k=3)) + str(i) for i in range(n_teams)]
+        self.team_ids = {t: 300 + i for i, t in enumerate(self.teams)}
+        self.game_type_names = dict(SPORT_GAMETYPES.get(self.sport_id, {}))
+        self._game_type_ids = {v: k for k, v in reversed(list(self.game_type_names.items()))}
+        self._game_sets = {}
+        self._draft_groups = {}
+
+    def _game_type_id(self, name: str) -> int:
+        if name not in self._game_type_ids:
+            # styles without a known game type get the next free id
+            self._game_type_ids[name] = 9000 + sum(k >= 9000 for k in self._game_type_ids.values())
+        return self._game_type_ids[name]
+
+    def _key(self, *parts: Any) -> str:
+        return hashlib.md5(repr((self.seed,) + parts).encode()).hexdigest().upper()
+
+    def competitions(self) -> List[Dict[str, Any]]:
+        """Schedules one game per team pair for the week, lobby (GameSets) schema"""
+        teams = self.teams[:]
+        self.rng.shuffle(teams)
+        slots = self.template['start_times']
+        weights = [s[3] for s in slots]
+        comps = []
+        for i in range(0, len(teams) - 1, 2):
+            away, home = teams[i], teams[i + 1]
+            day, hour, minute, _ = self.rng.choices(slots, weights)[0]
+            local = self.tz.localize(datetime.datetime.combine(self.week_start + datetime.timedelta(days=(day - self.week_start.weekday()) % 7),
+                                                               datetime.time(hour, minute)))
+            comps.append({
+                'GameId': 5700000 + len(comps), 'AwayTeamId': self.team_ids[away], 'HomeTeamId': self.team_ids[home],
+                'HomeTeamScore': 0, 'AwayTeamScore': 0, 'HomeTeamCity': home, 'AwayTeamCity': away,
+                'HomeTeamName': home, 'AwayTeamName': away, 'StartDate': _iso(local), 'Location': home,
+                'LastPlay': None, 'TeamWithPossession': 0, 'TimeRemainingStatus': 'Pre-Game', 'Sport': self.sport,
+                'Status': 'Pre-Game', 'Description': f'{away} @ {home}', 'FullDescription': f'{away} @ {home}',
+                'ExceptionalMessages': [], 'SeriesType': 0, 'NumberOfGamesInSeries': 1, 'SeriesInfo': None,
+                'HomeTeamCompetitionOrdinal': 1, 'AwayTeamCompetitionOrdinal': 1,
+                'HomeTeamCompetitionCount': 1, 'AwayTeamCompetitionCount': 1,
+            })
+        return sorted(comps, key=lambda c: c['StartDate'])
+
+    def _game_style(self, name: str) -> Dict[str, Any]:
+        return {'GameStyleId': GAME_STYLE_IDS.get(name, 999), 'SportId': self.sport_id, 'SortOrder': 1, 'Name': name,
+                'Abbreviation': name[:3].upper(), 'Description': name, 'IsEnabled': True, 'Attributes': None}
+
+    def game_sets(self, comps: List[Dict[str, Any]], n_game_sets: int) -> List[Dict[str, Any]]:
+        """Builds main slate, full slate, single-game and random subset game sets"""
+        rule = MAIN_SLATE_RULES.get(self.sport, {})
+        main = [c for c in comps if self._is_main_window(c, rule)] or comps
+        sets = [(main, ['Classic', 'Tiers', 'Snake']), (comps, ['Classic', 'Best Ball'])]
+        for c in comps:
+            sets.append(([c], ['Showdown Captain Mode', 'Snake Showdown']))
+        while len(sets) < n_game_sets:
+            k = self.rng.randint(2, max(2, len(comps) // 2))
+            sets.append((sorted(self.rng.sample(comps, min(k, len(comps))), key=lambda c: c['StartDate']), ['Classic']))
+        out = []
+        for i, (cs, styles) in enumerate(sets[:n_game_sets]):
+            out.append({'GameSetKey': self._key('gs', i), 'ContestStartTimeSuffix': '' if len(cs) > 1 else f" ({cs[0]['Description']})",
+                        'Competitions': cs, 'GameStyles': [self._game_style(s) for s in styles],
+                        'SortOrder': i, 'MinStartTime': _dk_date(self._local(cs[0]['StartDate'])), 'Tag': 'Featured' if i == 0 else ''})
+        return out
+
+    def _local(self, iso: str) -> datetime.datetime:
+        return pytz.utc.localize(datetime.datetime.strptime(iso[:19], '%Y-%m-%dT%H:%M:%S')).astimezone(self.tz)
+
+    def _is_main_window(self, comp: Dict[str, Any], rule: Dict[str, Any]) -> bool:
+        dt = self._local(comp['StartDate'])
+        if rule.get('weekday') is not None and dt.weekday() != rule['weekday']:
+            return False
+        end = rule.get('end_hour') or rule.get('start_hour', 0) + 3
+        return rule.get('start_hour', 0) <= dt.hour <= end
+
+    def draft_groups(self, game_sets: List[Dict[str, Any]], draft_groups_per_set: int = 1) -> List[Dict[str, Any]]:
+        """Builds draft groups, one per game style and copy, lobby schema"""
+        dgs = []
+        for gs in game_sets:
+            start = self._local(gs['Competitions'][0]['StartDate'])
+            for style in gs['GameStyles']:
+                for copy in range(draft_groups_per_set):
+                    dgid = 60000 + len(dgs)
+                    dgs.append({
+                        'DraftGroupId': dgid, 'ContestTypeId': 21, 'StartDate': _iso(start),
+                        'StartDateEst': start.strftime('%Y-%m-%dT%H:%M:%S.0000000'), 'SortOrder': len(dgs),
+                        'DraftGroupTag': 'Featured' if gs['Tag'] == 'Featured' and copy == 0 else '',
+                        'GameTypeId': self._game_type_id(style['Name']), 'GameType': None, 'SportSortOrder': 0,
+                        'Sport': self.sport, 'GameCount': len(gs['Competitions']), 'ContestStartTimeSuffix': None,
+                        'ContestStartTimeType': 0, 'Games': None, 'DraftGroupSeriesId': copy + 1,
+                        'GameSetKey': gs['GameSetKey'], 'AllowUGC': True,
+                    })
+                    self._draft_groups[dgid] = (gs, style['Name'])
+        return dgs
+
+    def contest(self, i: int, dg: Dict[str, Any], game_type: str) -> Dict[str, Any]:
+        """Builds one contest in the lobby (abbreviated keys) schema"""
+        start = self._local(dg['StartDate'].replace('.0000000Z', ''))
+        fee = self.rng.choice([0.25, 1, 3, 5, 10, 20, 25, 50, 100, 300, 1000])
+        size = self.rng.choice([2, 3, 5, 10, 20, 100, 1000, 10000, 100000, 400000])
+        milly = i % 97 == 0 and game_type == 'Classic'
+        name = f"{self.sport} {'$3M Millionaire' if milly else 'Contest'} [{size} Entries] #{i}"
+        prize = round(fee * size * 0.85, 2)
+        return {
+            'uc': 0, 'ec': 0, 'mec': self.rng.choice([1, 3, 20, 150]), 'fpp': int(fee), 's': 1, 'n': name,
+            'attr': {'IsGuaranteed': 'true'} if size > 100 else {}, 'nt': self.rng.randint(0, size), 'm': size,
+            'a': fee, 'po': prize, 'pd': {'Cash': f'${prize:,.2f}'}, 'tix': False,
+            'sdstring': start.strftime('%a ') + start.strftime('%I:%M%p').lstrip('0'), 'sd': _dk_date(start),
+            'id': 110000000 + i, 'tmpl': 380000 + i % 1000, 'pt': 1, 'so': -i, 'fwt': False, 'isOwner': False,
+            'startTimeType': 0, 'dg': dg['DraftGroupId'], 'ulc': 1, 'cs': 1, 'gameType': game_type, 'ssd': None,
+            'dgpo': prize * 2, 'cso': 0, 'ir': 1, 'rl': False, 'rlc': 0, 'rll': 99999, 'sa': True,
+            'freeWithCrowns': False, 'crownAmount': int(fee * 550), 'isBonusFinalized': False,
+            'isSnakeDraft': 'Snake' in game_type,
+        }
+
+    def getcontests(self, n_contests: int = 4000, n_game_sets: int = 12, draft_groups_per_set: int = 1, n_tournaments: int = 3) -> Dict[str, Any]:
+        """Generates a getcontests payload
+
+        Args:
+            n_contests (int): the number of contests, default 4000
+            n_game_sets (int): the number of game sets, default 12
+            draft_groups_per_set (int): draft groups per game set and style, default 1
+            n_tournaments (int): the number of tournaments, default 3
+
+        Returns:
+            Dict[str, Any]
+
+        """
+        comps = self.competitions()
+        game_sets = self.game_sets(comps, n_game_sets)
+        dgs = self.draft_groups(game_sets, draft_groups_per_set)
+        names = {dg['DraftGroupId']: self._draft_groups[dg['DraftGroupId']][1] for dg in dgs}
+        # most contests go to the main slate
+        weights = [20 if dg['DraftGroupTag'] == 'Featured' else 1 for dg in dgs]
+        chosen = self.rng.choices(dgs, weights, k=n_contests)
+        contests = [self.contest(i, dg, names[dg['DraftGroupId']]) for i, dg in enumerate(chosen)]
+        game_types = []
+        for name in sorted(set(names.values())):
+            game_types.append({'GameTypeId': self._game_type_id(name), 'Name': name, 'Description': name, 'Tag': '',
+                               'SportId': self.sport_id, 'DraftType': 'SnakeDraft' if 'Snake' in name or 'Best' in name else 'SalaryCap',
+                               'GameStyle': self._game_style(name), 'IsSeasonLong': False})
+        tournaments = []
+        for i, dg in enumerate(self.rng.sample(dgs, min(n_tournaments, len(dgs)))):
+            tournaments.append({
+                'TournamentKey': self._key('t', i), 'Name': f'{self.sport} Tournament {i}', 'DraftGroupId': dg['DraftGroupId'],
+                'IsVisible': True, 'SortOrder': i, 'Status': 1, 'Entrants': 100000, 'ContestAttributes': {'IsGuranteed': 'true'},
+                'MaximumEntries': 200000, 'MaximumEntriesPerUser': 150, 'EntryFee': 20.0, 'AcceptedTickets': [],
+                'TotalPayouts': 3500000.0, 'PayoutDescriptions': {'Cash': '$3,500,000'}, 'FppAward': 20,
+                'PayoutSummaries': [{'MinPosition': 1, 'MaxPosition': 1, 'TierPayoutDescriptions': {'Cash': '$1,000,000.00'}},
+                                    {'MinPosition': 2, 'MaxPosition': 40000, 'TierPayoutDescriptions': {'Cash': '$50.00'}}],
+                'SportId': self.sport_id, 'CrownAmount': 11000, 'TicketOnlyEntry': False,
+                'StartTime': _dk_date(self._local(dg['StartDate'].replace('.0000000Z', ''))), 'StartTimeType': 'Normal',
+                'GameSetKey': dg['GameSetKey'],
+            })
+        return {
+            'SelectedSport': self.sport, 'SelectedSportId': self.sport_id, 'Contests': contests,
+            'Tournaments': tournaments, 'UserPrizes': [], 'DraftGroups': dgs, 'GameSets': game_sets,
+            'GameTypes': game_types, 'MarketingOffers': [], 'DirectChallengeModal': None, 'DepositTransaction': None,
+            'ShowRafLink': False, 'PrizeRedemptionModel': None, 'PrizeRedemptionPop': False,
+            'UseRaptorHeadToHead': False, 'UseJSWebLobbyModals': False, 'ShowGameStyleFilter': True,
+            'SportMenuItems': None, 'UserGeoLocation': None, 'ShowAds': True, 'IsVip': None, 'AdsEnabled': False,
+        }
+
+    def _player(self, team: str, pos: str, idx: int) -> Tuple[int, int, str, str, int]:
+        """Stable identity for the idx-th player at pos on team"""
+        tid = self.team_ids[team]
+        pid = (tid * 100 + list(self.template['players']).index(pos) * 12 + idx) * 7 + 800000
+        first = FIRST_NAMES[(pid // 7) % len(FIRST_NAMES)]
+        last = f'{team.title()}{pos}{idx}'
+        # base salary is part of the identity, draft groups add noise
+        lo, hi = self.template['salary']
+        base = lo + random.Random(f'{self.seed}-{pid}').randrange((hi - lo) // 100) * 100
+        return pid, pid // 7 - 100000, first, last, base
+
+    def draftables(self, lobby: Dict[str, Any], draft_group_id: int) -> Dict[str, Any]:
+        """Generates the draftables payload for a draft group in the lobby
+
+        Args:
+            lobby (Dict[str, Any]): output of getcontests
+            draft_group_id (int): the draft group id
+
+        Returns:
+            Dict[str, Any]
+
+        """
+        dg = next(d for d in lobby['DraftGroups'] if d['DraftGroupId'] == draft_group_id)
+        gs = next(g for g in lobby['GameSets'] if g['GameSetKey'] == dg['GameSetKey'])
+        game_type = next((g['Name'] for g in lobby['GameTypes'] if g['GameTypeId'] == dg['GameTypeId']), 'Classic')
+        rng = random.Random(f'{self.seed}-{draft_group_id}')
+        draftable_id = draft_group_id * 10000
+        captain = 'Captain' in game_type
+        comps, players = [], []
+        for c in gs['Competitions']:
+            home, away = c['HomeTeamCity'], c['AwayTeamCity']
+            comp = {'competitionId': c['GameId'], 'name': c['Description'], 'startTime': c['StartDate']}
+            comps.append({
+                'competitionId': c['GameId'], 'sport': self.sport, 'sportId': self.sport_id,
+                'homeTeam': {'teamId': c['HomeTeamId'], 'teamName': home, 'abbreviation': home, 'city': home},
+                'awayTeam': {'teamId': c['AwayTeamId'], 'teamName': away, 'abbreviation': away, 'city': away},
+                'startTime': c['StartDate'], 'name': c['Description'], 'venue': home,
+                'startingLineupsAvailable': False, 'depthChartsAvailable': True, 'competitionState': 'Upcoming',
+                'competitionStateDetail': '', 'competitionStartedEarly': False, 'competitionAttributes': [],
+            })
+            for team in (away, home):
+                for pos, n in self.template['players'].items():
+                    for idx in range(n):
+                        pid, dkid, first, last, base = self._player(team, pos, idx)
+                        salary = max(1000, base + rng.choice([-300, -200, -100, 0, 0, 100, 200, 300]))
+                        slots = [(1000, int(salary * 1.5)), (1001, salary)] if captain else \
+                                [(self.template['slots'][pos], salary)] + \
+                                [(sid, salary) for sid, allowed in self.template['flex'].items() if pos in allowed]
+                        fppg = round(rng.uniform(0, 30), 1)
+                        oprk = rng.randint(1, len(self.teams))
+                        status = rng.choices(['None', 'Q', 'O', 'IR'], [85, 8, 4, 3])[0]
+                        for slot_id, slot_salary in slots:
+                            draftable_id += 1
+                            players.append({
+                                'draftableId': draftable_id, 'firstName': first, 'lastName': last,
+                                'displayName': f'{first} {last}', 'shortName': f'{first[0]}. {last}',
+                                'playerId': pid, 'playerDkId': dkid, 'position': pos, 'rosterSlotId': slot_id,
+                                'salary': slot_salary, 'status': status, 'isSwappable': True, 'isDisabled': False,
+                                'newsStatus': 'None', 'playerImage50': '', 'playerImage160': '',
+                                'altPlayerImage50': '', 'altPlayerImage160': '', 'competition': comp,
+                                'competitions': [comp],
+                                'draftStatAttributes': [{'id': 90, 'value': str(fppg), 'sortValue': str(fppg)},
+                                                        {'id': -2, 'value': _ordinal(oprk), 'sortValue': str(oprk), 'quality': 'Medium'}],
+                                'playerAttributes': [], 'teamLeagueSeasonAttributes': [], 'playerGameAttributes': [],
+                                'teamId': self.team_ids[team], 'teamAbbreviation': team, 'draftAlerts': [],
+                                'playerGameHash': f"{pid}-{c['GameId']}",
+                            })
+        return {
+            'draftables': players, 'competitions': comps, 'teamsWithoutCompetitions': [], 'draftAlerts': [],
+            'draftStats': [{'id': 90, 'abbr': 'FPPG', 'name': 'Fantasy Points Per Game', 'order': 10},
+                           {'id': -2, 'abbr': 'OPRK', 'name': 'Opponent Rank', 'order': 20}],
+            'playerGameAttributes': [], 'errorStatus': [],
+        }
+
+    def draftables_many(self, lobby: Dict[str, Any]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yields (draft_group_id, draftables payload) for every draft group in the lobby"""
+        for dg in lobby['DraftGroups']:
+            yield dg['DraftGroupId'], self.draftables(lobby, dg['DraftGroupId'])
@@ -4,12 +4,12 @@
 # Licensed under the MIT License
 import collections
 import datetime
+import importlib.util
 import re
+import sys
+from types import ModuleType
 from typing import Any, Callable, Dict, List
 
-from dateutil.parser import parse
-import pytz
-
 
 def attr_boiler(d: dict) -> None:
     """Generates attr boilerplate for nested dict
@@ -59,6 +59,47 @@ def flatten(t: List[List[Any]]) -> List[Any]:
     return [item for sublist in t for item in sublist]
 
 
+class _LazyModule(ModuleType):
+    """Stands in for a module until the first attribute access imports it
+
+    The import goes through importlib.import_module, whose per-module
+    locks make a first access from several threads safe. The real
+    module's namespace is then copied in, so later lookups are plain
+    attribute reads; the proxy is never put in sys.modules.
+
+    """
+
+    def __getattr__(self, attr: str) -> Any:
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Imports module on first attribute access
+    
+    Args:
+        name (str): the module name, e.g. 'browser_cookie3'
+
+    Returns:
+        ModuleType
+
+    Raises:
+        ImportError: if the module is not installed
+
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    if importlib.util.find_spec(name) is None:
+        raise ImportError(f'No module named {name!r}', name=name)
+    return _LazyModule(name)
+
+
+# parse_dktime dependencies, loaded on first call
+dateutil_parser = lazy_import('dateutil.parser')
+pytz = lazy_import('pytz')
+
+
 def map_nested_dicts(ob: Dict[str, Any], func: Callable) -> Dict[str, Any]:
     """Applies functions to all keys in nested dict"""
     if isinstance(ob, collections.Mapping):
@@ -80,7 +121,7 @@ def parse_dktime(s: str, as_local: bool = False, tz: str = None) -> datetime.dat
 
     """
     if s.endswith('Z'):
-        dt = parse(s)
+        dt = dateutil_parser.parse(s)
     elif s.startswith('/Date'):
         epoch = int(''.join([c for c in s if c.isnumeric()])) / 1000
         dt = datetime.datetime.fromtimestamp(epoch, tz=pytz.utc)
@@ -1,9 +1,88 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
+import os
+from pathlib import Path
+import sys
+import time
+
 from dksalaries import Scraper, Parser
-import cattr
-import pandas as pd
+from dksalaries.constants import DEFAULT_SPORTS
+from dksalaries.documents import SLATE_SELECTORS
+from dksalaries.export import SALARY_COLUMNS, write_csv, write_parquet
+
+
+def _parse_and_write(sport, draft_group_id, payload, out_dir, fmt):
+    """Parses one draftables payload and writes it, runs in worker process"""
+    t0 = time.perf_counter()
+    ddoc = Parser().draftables(payload)
+    t1 = time.perf_counter()
+    fn = Path(out_dir) / sport / f'{draft_group_id}.{fmt}'
+    fn.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fn.with_suffix(f'.{os.getpid()}.tmp')
+    constants = {'sport': sport, 'draft_group_id': draft_group_id}
+    if fmt == 'parquet':
+        write_parquet(ddoc, tmp, SALARY_COLUMNS, constants=constants)
+    else:
+        with tmp.open('w', newline='') as f:
+            write_csv(ddoc, f, SALARY_COLUMNS, constants=constants)
+    tmp.replace(fn)
+    return len(ddoc.draftables), t1 - t0, time.perf_counter() - t1
+
+
+def batch(args):
+    """Fetches, parses and writes all matching draft groups"""
+    timings = {}
+
+    @contextlib.contextmanager
+    def stage(name):
+        t = time.perf_counter()
+        yield
+        timings[name] = timings.get(name, 0) + time.perf_counter() - t
+
+    # download threads share the scraper
+    s = Scraper(max_workers=args.threads, thread_safe=True)
+    p = Parser()
+
+    # step one: lobbies for every sport, concurrently
+    with stage('fetch lobbies'):
+        lobbies = dict(s.getcontests_many(args.sport))
 
+    # step two: select draft groups
+    with stage('parse lobbies'):
+        wanted = []
+        for sport, data in lobbies.items():
+            gcd = p.getcontests(data)
+            if not gcd.selected_sport:
+                gcd.selected_sport = sport
+            wanted += [(sport, dgid) for dgid in gcd.select_draft_groups(args.game_type, args.slates)]
 
-def run():
+    # step three: draftables for every draft group, concurrently
+    with stage('fetch draftables'):
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            payloads = list(executor.map(lambda item: s.draftables(item[1], raw=True), wanted))
+
+    # step four: parse and write in worker processes
+    parse_time = write_time = n_players = 0
+    with stage('parse + write'):
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            futures = [executor.submit(_parse_and_write, sport, dgid, payload, args.out_dir, args.format)
+                       for (sport, dgid), payload in zip(wanted, payloads)]
+            for future in futures:
+                n, pt, wt = future.result()
+                n_players += n
+                parse_time += pt
+                write_time += wt
+
+    print(f'{len(lobbies)} lobbies, {len(wanted)} draft groups, {n_players} players', file=sys.stderr)
+    for name, secs in timings.items():
+        print(f'{name:>20}: {secs:8.3f}s', file=sys.stderr)
+    print(f'{"parse (cpu)":>20}: {parse_time:8.3f}s', file=sys.stderr)
+    print(f'{"write (cpu)":>20}: {write_time:8.3f}s', file=sys.stderr)
+
+
+def main_slate():
+    """Prints NFL main slate salaries as csv"""
     s = Scraper()
     p = Parser()
 
@@ -14,8 +93,29 @@ def run():
     # download the player data
     # from main slate draftables
     ddoc = p.draftables(s.draftables(draft_group_id))
-    salaries = ddoc.player_salaries()
-    print(pd.DataFrame([cattr.unstructure(s) for s in salaries]).drop_duplicates(subset=['player_id', 'player_dk_id']))    
+    write_csv(ddoc, sys.stdout, columns=SALARY_COLUMNS, unique=['player_id', 'player_dk_id'])
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Get DraftKings salaries')
+    parser.add_argument('--out-dir', help='batch mode: write every matching draft group here')
+    parser.add_argument('--sport', action='append', help=f'repeatable, default {",".join(DEFAULT_SPORTS)}')
+    parser.add_argument('--game-type', action='append', help='game type name, repeatable, default Classic')
+    parser.add_argument('--slates', choices=SLATE_SELECTORS, default='main')
+    parser.add_argument('--format', choices=('csv', 'parquet'), default='csv')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent downloads')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes, default cpu count')
+    args = parser.parse_args(argv)
+    args.sport = args.sport or list(DEFAULT_SPORTS)
+    return args
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    if args.out_dir:
+        batch(args)
+    else:
+        main_slate()
 
 
 if __name__ == '__main__':
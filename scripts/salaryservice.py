@@ -0,0 +1,36 @@
+import argparse
+import logging
+
+from dksalaries.constants import DEFAULT_SPORTS
+from dksalaries.documents import SLATE_SELECTORS
+from dksalaries.service import SalaryService, serve
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve DraftKings salaries from memory')
+    parser.add_argument('--sport', action='append', help=f'repeatable, default {",".join(DEFAULT_SPORTS)}')
+    parser.add_argument('--game-type', action='append', help='game type name, repeatable, default Classic')
+    parser.add_argument('--slates', choices=SLATE_SELECTORS, default='all')
+    parser.add_argument('--interval', type=float, default=300, help='seconds between refreshes')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix-socket', help='serve on unix socket instead of host/port')
+    args = parser.parse_args(argv)
+    args.sport = args.sport or list(DEFAULT_SPORTS)
+    args.game_type = args.game_type or ['Classic']
+    return args
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    svc = SalaryService(sports=args.sport, game_types=args.game_type, slates=args.slates, interval=args.interval)
+    svc.start()
+    try:
+        serve(svc, args.host, args.port, args.unix_socket)
+    finally:
+        svc.stop()
+
+
+if __name__ == '__main__':
+    run()
@@ -18,18 +18,21 @@ def run():
           license="MIT",
           packages=find_packages(),
           package_data={'tests': ["data/*.json"]},
-          entry_points={'console_scripts': ['salaries=scripts.getsalaries:run']},
+          entry_points={'console_scripts': ['salaries=scripts.getsalaries:run',
+                                            'salaries-service=scripts.salaryservice:run']},
           install_requires=[
             'requests',
-            'requests_cache',
+            'requests_cache>=1.0',
             'browser_cookie3',
             'attrs',
+            'numpy',
             'cattrs',
             'python-dateutil',
             'pytz',
             'nflnames',
             'rapidfuzz'
           ],
+          extras_require={'export': ['pyarrow'], 'cache': ['msgpack']},
           zip_safe=False)
 
 
@@ -21,17 +21,6 @@ def test_directory(request):
     return Path(request.config.rootdir) / "tests"
 
 
-@pytest.fixture()
-def tprint(request, capsys):
-    """Fixture for printing info after test, not supressed by pytest stdout/stderr capture"""
-    lines = []
-    yield lines.append
-
-    with capsys.disabled():
-        for line in lines:
-            sys.stdout.write("\n{}".format(line))
-
-
 @pytest.fixture
 def draftables_document(test_directory):
     return json.loads((test_directory / 'data' / 'draftables.json').read_text())
@@ -0,0 +1,76 @@
+# dksalaries/tests/test_cache.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import json
+
+import attr
+import pytest
+
+from dksalaries import Parser
+from dksalaries.cache import *
+from dksalaries.documents import *
+
+
+def test_roundtrip(draftables_document):
+    """Tests dumps/loads round trip"""
+    o = Parser().draftables(draftables_document)
+    assert loads(dumps(o)) == o
+
+
+def test_parser_cache_hit(draftables_document, tmp_path):
+    """Tests repeated parse is a cache hit"""
+    cache = DocumentCache(tmp_path)
+    p = Parser(cache=cache)
+    o1 = p.draftables(draftables_document)
+    o2 = p.draftables(draftables_document)
+    assert o1 == o2 and o1 is not o2
+    assert cache.stats()['hits'] == 1
+    assert len(list(tmp_path.glob('*'))) == 1
+
+    # new process: disk hit, from raw bytes
+    p = Parser(cache=DocumentCache(tmp_path))
+    o3 = p.draftables(json.dumps(draftables_document, separators=(',', ':')).encode())
+    assert o3 == o1
+    assert p.cache.stats() == {'hits': 1, 'misses': 0, 'size': 1}
+
+
+def test_cache_sections(getcontests_document, tmp_path):
+    """Tests parse options are part of the cache key"""
+    p = Parser(cache=DocumentCache(tmp_path))
+    full = p.getcontests(getcontests_document)
+    partial = p.getcontests(getcontests_document, sections=['game_types'])
+    assert full.contests and not partial.contests
+    assert p.getcontests(getcontests_document, sections=('game_types',)) == partial
+    assert p.cache.stats()['size'] == 2
+
+
+def test_cache_version(draftables_document, tmp_path, monkeypatch):
+    """Tests schema change invalidates entries"""
+    cache = DocumentCache(tmp_path)
+    k1 = cache.key('draftables', draftables_document)
+    monkeypatch.setattr('dksalaries.cache.CACHE_VERSION', CACHE_VERSION + 1)
+    assert DocumentCache(tmp_path).key('draftables', draftables_document) != k1
+
+
+def test_cache_copies(getcontests_document):
+    """Tests changing a returned document does not change the cached one"""
+    p = Parser(cache=DocumentCache())
+    o1 = p.getcontests(getcontests_document)
+    o1.selected_sport = 'NBA'
+    o2 = p.getcontests(getcontests_document)
+    assert o2.selected_sport != 'NBA'
+    o2.selected_sport = 'MLB'
+    assert p.getcontests(getcontests_document).selected_sport not in ('NBA', 'MLB')
+
+
+def test_cache_schema_change(draftables_document, tmp_path, monkeypatch):
+    """Tests changing a document class invalidates entries"""
+    p = Parser(cache=DocumentCache(tmp_path))
+    p.draftables(draftables_document)
+    fields = [f.name for f in attr.fields(DraftStatsDocument)] + ['extra']
+    monkeypatch.setitem(DOCUMENT_CLASSES, 'DraftStatsDocument', attr.make_class('DraftStatsDocument', fields))
+    p = Parser(cache=DocumentCache(tmp_path))
+    p.draftables(draftables_document)
+    assert p.cache.stats() == {'hits': 0, 'misses': 1, 'size': 1}
@@ -3,15 +3,26 @@
 # Copyright (C) 2021 Eric Truett
 # Licensed under the MIT License
 
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import importlib.util
 import json
+import os
+from pathlib import Path
 import random
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
 from typing import List
 
 import cattr
 import pandas as pd
 import pytest
 
-from dksalaries import Parser
+from dksalaries import Parser, Scraper
+from dksalaries.cache import DocumentCache
 from dksalaries.documents import *
 from dksalaries.util import camel_to_snake
 
@@ -42,6 +53,39 @@ def test_getcontests(getcontests_document):
     assert isinstance(o, GetContestsDocument)
 
 
+def test_getcontests_sections(getcontests_document):
+    """Tests getcontests parses only requested sections and fields"""
+    p = Parser()
+    full = p.getcontests(getcontests_document)
+    o = p.getcontests(getcontests_document, sections=['draft_groups', 'game_sets'],
+                      fields={'draft_groups': ['draft_group_id', 'game_set_key'],
+                              'game_sets': ['game_set_key', 'competitions']})
+    assert o.contests == [] and o.tournaments == [] and o.game_types == []
+    assert [dg.draft_group_id for dg in o.draft_groups] == [dg.draft_group_id for dg in full.draft_groups]
+    assert all(dg.game_type_id is None for dg in o.draft_groups)
+    assert [gs.competitions for gs in o.game_sets] == [gs.competitions for gs in full.game_sets]
+    assert all(gs.game_styles == [] for gs in o.game_sets)
+    assert 'Competitions' in getcontests_document['GameSets'][0]
+    with pytest.raises(ValueError):
+        p.getcontests(getcontests_document, sections=['bogus'])
+
+
+@pytest.mark.parametrize('section,field,key', [
+    ('tournaments', 'name', 'tournament_key'),
+    ('draft_groups', 'game_type_id', 'draft_group_id'),
+    ('game_sets', 'tag', 'game_set_key'),
+    ('contests', 'n', 'id'),
+    ('game_types', 'description', 'game_type_id'),
+])
+def test_getcontests_fields_keep_keys(getcontests_document, section, field, key):
+    """Tests projections leaving out record keys still keep them"""
+    p = Parser()
+    full = getattr(p.getcontests(getcontests_document), section)
+    o = getattr(p.getcontests(getcontests_document, sections=[section], fields={section: [field]}), section)
+    assert [getattr(item, key) for item in o] == [getattr(item, key) for item in full]
+    assert [getattr(item, field) for item in o] == [getattr(item, field) for item in full]
+
+
 def test_draftables(draftables_document, tprint):
     """Testing structure of getcontest"""
     p = Parser()
@@ -65,4 +109,259 @@ def test_player_salary_document(draftables_document, tprint):
     o = p.draftables(draftables_document)
     pl = random.choice(o.draftables)
     ps = cattr.structure_attrs_fromdict(cattr.unstructure(pl), PlayerSalaryDocument)
-    assert isinstance(ps, PlayerSalaryDocument)
\ No newline at end of file
+    assert isinstance(ps, PlayerSalaryDocument)
+
+def test_scraper_slates(getcontests_document):
+    """Tests Scraper.slates across sports"""
+    s = Scraper.__new__(Scraper)
+    s._setup_fetch()
+    s.getcontests = lambda sport='NFL': getcontests_document if sport == 'NFL' else {}
+    slates = list(s.slates(sports=('NFL', 'NBA')))
+    assert slates
+    assert all(isinstance(item, SlateDocument) for item in slates)
+    assert all(item.sport == 'NFL' for item in slates)
+
+
+def test_getcontests_many_sessions(tmp_path):
+    """Tests lobby threads get their own sessions, closed when done"""
+    s = Scraper.__new__(Scraper)
+    s._setup_fetch()
+    s._setup_sessions(cache_name=str(tmp_path / 'http'))
+    barrier = threading.Barrier(3)
+
+    def getcontests(sport='NFL'):
+        barrier.wait(5)
+        return {'session': s._session()}
+
+    s.getcontests = getcontests
+    sessions = [d['session'] for _, d in s.getcontests_many(('NFL', 'NBA', 'MLB'))]
+    assert len({id(sess) for sess in sessions}) == 3
+    assert s.s not in sessions
+    assert s._sessions == [s.s]
+
+    def getcontests(sport='NFL'):
+        if sport == 'NBA':
+            raise ConnectionError(sport)
+        return {}
+
+    s.getcontests = getcontests
+    results = dict(s.getcontests_many(('NFL', 'NBA'), return_exceptions=True))
+    assert results['NFL'] == {} and isinstance(results['NBA'], ConnectionError)
+    with pytest.raises(ConnectionError):
+        dict(s.getcontests_many(('NFL', 'NBA')))
+    s.close()
+
+
+def test_getcontests_incremental(getcontests_document):
+    """Tests getcontests reuses unchanged records of the previous document"""
+    p = Parser()
+    gcd = p.getcontests(getcontests_document, track=True)
+    data = json.loads(json.dumps(getcontests_document))
+    contests = data['Contests']
+    contests[0]['nt'] += 5
+    contests[1]['n'] = 'Renamed'
+    removed = contests.pop(2)['id']
+    contests.append(dict(contests[-1], id=1))
+    data['GameSets'][0]['Tag'] = 'Changed'
+
+    new = p.getcontests(data, previous=gcd)
+    assert new == p.getcontests(data)
+    ch = new.changes
+    assert ch.updated['contests'] == [contests[0]['id']]
+    assert ch.modified['contests'] == [contests[1]['id']]
+    assert ch.removed['contests'] == [removed]
+    assert ch.added['contests'] == [1]
+    assert ch.modified['game_sets'] == [data['GameSets'][0]['GameSetKey']]
+    assert ch.unchanged['contests'] == len(contests) - 3
+    assert ch.n_changed == 5
+    assert new.contests[3] is gcd.contests[4]
+    assert new.game_sets[1] is gcd.game_sets[1]
+    assert new.contests[0].nt == gcd.contests[0].nt + 5
+
+    # chains, and options must match to reuse
+    again = p.getcontests(data, previous=new)
+    assert again.changes.n_changed == 0
+    partial = p.getcontests(data, sections=['contests'], previous=new)
+    assert len(partial.changes.added['contests']) == len(contests)
+
+
+def test_getcontests_incremental_mutated(getcontests_document):
+    """Tests a payload changed in place and passed again is seen as changed"""
+    p = Parser()
+    data = json.loads(json.dumps(getcontests_document))
+    gcd = p.getcontests(data, track=True)
+    data['Contests'][0]['n'] = 'Renamed'
+    data['Contests'][1]['nt'] += 5
+    new = p.getcontests(data, previous=gcd)
+    assert new.changes.modified['contests'] == [data['Contests'][0]['id']]
+    assert new.changes.updated['contests'] == [data['Contests'][1]['id']]
+    assert new.contests[0].n == 'Renamed' and gcd.contests[0].n != 'Renamed'
+    assert new.contests[1].nt == gcd.contests[1].nt + 5
+    assert new == p.getcontests(data)
+
+
+def test_contest_detail(test_directory):
+    """Tests contest detail parses into TournamentDocument"""
+    data = json.loads((test_directory / 'data' / 'contest.json').read_text())
+    o = Parser().contest_detail(data)
+    assert isinstance(o, TournamentDocument)
+    assert o.draft_group_id == 53019
+    assert o.sport_id == 1
+    assert o.payout_summaries[0]['MinPosition'] == 1
+    assert o.entry_fee == data['contestDetail']['entryFee']
+
+
+def test_draftgroup(test_directory):
+    """Tests draft group parses into DraftGroupDocument"""
+    data = (test_directory / 'data' / 'draftgroup.json').read_bytes()
+    o = Parser().draftgroup(data)
+    assert isinstance(o, DraftGroupDocument)
+    assert o.draft_group_id == 53019
+    assert o.game_count == len(o.games) == 13
+    assert o.draft_group_tag == 'Featured'
+
+
+def test_scraper_fetch_many():
+    """Tests batch fetches deduplicate in-flight requests and cache results"""
+    s = Scraper.__new__(Scraper)
+    s._setup_fetch(max_workers=4)
+    calls = []
+    release = threading.Event()
+
+    def fetch(i):
+        calls.append(i)
+        release.wait(5)
+        return {'id': i}
+
+    s.contest_detail = fetch
+    results = {}
+    threads = [threading.Thread(target=lambda n=n: results.setdefault(n, s.contests_detail([1, 2, 2, 3])))
+               for n in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    release.set()
+    for t in threads:
+        t.join()
+    assert sorted(calls) == [1, 2, 3]
+    assert all(r == {1: {'id': 1}, 2: {'id': 2}, 3: {'id': 3}} for r in results.values())
+    assert s.contests_detail([3, 4]) == {3: {'id': 3}, 4: {'id': 4}}
+    assert sorted(calls) == [1, 2, 3, 4]
+    s.close()
+
+
+IMPORT_BUDGET = float(os.environ.get('DKSALARIES_IMPORT_BUDGET', 0.25))
+
+
+def test_import_budget():
+    """Tests cold import of Parser and documents skips scraping dependencies and numpy"""
+    code = (
+        'import sys, time, types\n'
+        't = time.perf_counter()\n'
+        'from dksalaries import Parser\n'
+        'from dksalaries.documents import DraftablesDocument, GetContestsDocument\n'
+        'elapsed = time.perf_counter() - t\n'
+        "names = ('browser_cookie3', 'requests', 'requests_cache', 'nflnames', 'rapidfuzz', 'numpy')\n"
+        'loaded = [n for n in names if type(sys.modules.get(n)) is types.ModuleType]\n'
+        'print(elapsed, *loaded)\n'
+    )
+    timings = []
+    for _ in range(3):
+        out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                             check=True, cwd=Path(__file__).parent.parent).stdout.split()
+        assert out[1:] == []
+        timings.append(float(out[0]))
+    assert min(timings) < IMPORT_BUDGET
+
+
+def test_lazy_import_threads():
+    """Tests the first access of a lazily imported module from many threads at once"""
+    code = (
+        'import sys, threading\n'
+        'from concurrent.futures import ThreadPoolExecutor\n'
+        'from dksalaries.util import lazy_import\n'
+        "pd = lazy_import('pandas')\n"
+        "assert 'pandas' not in sys.modules\n"
+        'barrier = threading.Barrier(8)\n'
+        'def touch(_):\n'
+        '    barrier.wait()\n'
+        '    return pd.DataFrame({"a": [1]}).shape\n'
+        'with ThreadPoolExecutor(8) as executor:\n'
+        '    print(*set(executor.map(touch, range(8))))\n'
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         check=True, cwd=Path(__file__).parent.parent).stdout.split()
+    assert out == ['(1,', '1)']
+
+
+@pytest.mark.skipif(importlib.util.find_spec('requests_cache') is None, reason='requires requests_cache')
+def test_scraper_thread_safe(tmp_path):
+    """Tests worker threads share one scraper with per-thread sessions and a WAL cache"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps({'path': self.path}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    s = Scraper.__new__(Scraper)
+    s._setup_fetch(max_workers=4)
+    s._setup_sessions(thread_safe=True, pool_maxsize=4, cache_name=str(tmp_path / 'http'))
+    url = f'http://127.0.0.1:{server.server_port}/draftables'
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: s.get_json(url, params={'i': i % 20}), range(200)))
+        assert [r['path'] for r in results] == [f'/draftables?i={i % 20}' for i in range(200)]
+        assert 1 < len(s._sessions) <= 5
+        assert all(sess.get_adapter(url) is s._adapter for sess in s._sessions)
+        assert all(sess.__class__.__name__ == 'CachedSession' for sess in s._sessions)
+        mode = sqlite3.connect(tmp_path / 'http.sqlite').execute('pragma journal_mode').fetchone()[0]
+        assert mode == 'wal'
+    finally:
+        s.close()
+        server.shutdown()
+
+
+def test_scraper_sessions_without_cache(tmp_path, monkeypatch):
+    """Tests plain sessions only when requests_cache is missing, cache errors propagate"""
+    import dksalaries.dksalaries as dk
+    s = Scraper.__new__(Scraper)
+    s._setup_fetch()
+    monkeypatch.setattr(dk, 'requests_cache', None)
+    s._setup_sessions(cache_name=str(tmp_path / 'http'))
+    assert type(s.s) is dk.requests.Session
+
+    class Broken:
+        def CachedSession(self, *args, **kwargs):
+            raise TypeError('unexpected keyword argument')
+
+    monkeypatch.setattr(dk, 'requests_cache', Broken())
+    with pytest.raises(TypeError):
+        s._setup_sessions(cache_name=str(tmp_path / 'http'))
+
+
+def test_parse_many(test_directory, tmp_path):
+    """Tests process-pool parsing matches Parser.draftables"""
+    raw = (test_directory / 'data' / 'draftables.json').read_bytes()
+    p = Parser()
+    expected = p.draftables(raw)
+    docs = p.draftables_many([raw, raw], processes=2)
+    assert docs == [expected, expected]
+    pools = p.draftables_many([raw, raw], processes=2, compact=True)
+    assert pools[1]['salary'].tolist() == [pl.salary for pl in expected.draftables]
+    assert p.parse_many('draftgroup', [(test_directory / 'data' / 'draftgroup.json').read_bytes()], processes=1)[0].draft_group_id == 53019
+
+    # cache hits are not sent to workers
+    cached = Parser(cache=DocumentCache(tmp_path))
+    cached.draftables(raw)
+    assert cached.draftables_many([raw], processes=2) == [expected]
+    assert cached.cache.stats()['hits'] >= 1
+    with pytest.raises(ValueError):
+        p.parse_many('getcontests', [raw], compact=True)
@@ -8,6 +8,7 @@ import random
 from typing import List
 
 import pandas as pd
+import pytz
 import pytest
 
 from dksalaries.documents import *
@@ -150,4 +151,60 @@ def test_slates(gc: GetContestsDocument, tprint):
     assert s.is_main_slate
 
     for item in cs:
-        tprint((item.start_date, item.end_date, item.is_main_slate))
\ No newline at end of file
+        tprint((item.start_date, item.end_date, item.is_main_slate))
+
+def test_slates_sport(gc: GetContestsDocument):
+    """Tests sport-aware slate rules"""
+    assert gc.sport == 'NFL'
+    assert gc.classic_game_type_ids() == {1}
+    assert all(s.sport == 'NFL' for s in gc.classic_slates)
+
+
+def test_select_draft_groups(gc: GetContestsDocument):
+    """Tests select_draft_groups game type and slate selectors"""
+    dgs = {dg.draft_group_id: dg for dg in gc.draft_groups}
+    main = gc.select_draft_groups()
+    featured = gc.select_draft_groups(slates='featured')
+    everything = gc.select_draft_groups(slates='all')
+    assert main == [53019, 55333]
+    assert everything == [53019, 55333, 55758, 56005, 56006]
+    assert set(main) <= set(featured) <= set(everything)
+    assert all(dgs[dgid].draft_group_tag == 'Featured' for dgid in featured)
+    assert all(dgs[dgid].game_type_id == 1 for dgid in everything)
+    assert gc.select_draft_groups(['Showdown Captain Mode'], 'featured') == [53018]
+    assert gc.select_draft_groups(['Showdown Captain Mode'], 'main') == []
+    assert gc.select_draft_groups(['Classic', 'Tiers'], 'main') == [53019, 55333, 55986]
+    assert gc.select_draft_groups(['Bogus'], 'all') == []
+    with pytest.raises(ValueError):
+        gc.select_draft_groups(slates='bogus')
+
+
+def test_is_main_slate():
+    """Tests is_main_slate rules"""
+    tz = pytz.timezone('America/New_York')
+    sun = tz.localize(datetime.datetime(2021, 9, 12, 13))
+    sun_late = tz.localize(datetime.datetime(2021, 9, 12, 16, 25))
+    assert is_main_slate(sun, sun_late, 'NFL')
+    assert not is_main_slate(sun, sun_late, 'NBA')
+    tue = tz.localize(datetime.datetime(2021, 11, 9, 19))
+    assert is_main_slate(tue, tue.replace(hour=22), 'NBA')
+    assert is_main_slate_sdstring('Sun 1:00PM', 'NFL')
+    assert not is_main_slate_sdstring('Thu 8:20PM', 'NFL')
+    assert is_main_slate_sdstring('Tue 7:05PM', 'MLB')
+
+
+def test_calendar(gc):
+    """Tests SlateCalendar queries against a linear scan"""
+    cal = gc.calendar
+    assert cal is gc.calendar
+    assert len(cal) == len([gs for gs in gc.game_sets if gs.competitions])
+    tz = pytz.timezone('America/New_York')
+    hours = [tz.localize(datetime.datetime(2021, 9, d, h)) for d in range(7, 21) for h in (0, 13, 18, 20)]
+    for a, b in zip(hours, hours[3:]):
+        assert cal.overlapping(a, b) == [i for i in cal.intervals if i.start <= b and i.end >= a]
+        assert cal.within(a, b) == [i for i in cal.intervals if i.start >= a and i.end <= b]
+        assert cal.locking(a, b) == [i for i in cal.intervals if a <= i.start <= b]
+    nxt = cal.next_to_lock(datetime.datetime(2021, 9, 12, 14), n=2)
+    assert [i.start.date() for i in nxt] == [datetime.date(2021, 9, 19)]
+    main = cal.locking(datetime.datetime(2021, 9, 12, 13), datetime.datetime(2021, 9, 12, 13))
+    assert 53019 in [dgid for i in main for dgid in i.draft_group_ids]
@@ -0,0 +1,144 @@
+# dksalaries/tests/test_export.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import csv
+import io
+from pathlib import Path
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from dksalaries import Parser
+from dksalaries.documents import ContestDocument, PlayerDocument
+from dksalaries.export import *
+
+
+@pytest.fixture
+def ddoc(draftables_document):
+    return Parser().draftables(draftables_document)
+
+
+def test_iter_columns(ddoc):
+    """Tests iter_columns"""
+    batches = list(iter_columns(ddoc.draftables, ['draftable_id', 'salary'], batch_size=500))
+    assert len(batches) == 3
+    assert sum(len(b['salary']) for b in batches) == len(ddoc.draftables)
+    assert batches[0]['salary'][0] == ddoc.draftables[0].salary
+
+
+def test_iter_columns_unique(ddoc):
+    """Tests iter_columns with unique and constants"""
+    batch = next(iter_columns(ddoc.draftables, SALARY_COLUMNS, constants={'draft_group_id': 1},
+                              unique=['player_id', 'player_dk_id']))
+    pairs = list(zip(batch['player_id'], batch['player_dk_id']))
+    assert len(pairs) == len(set(pairs))
+    assert set(batch['draft_group_id']) == {1}
+
+
+def test_write_csv(ddoc, tmp_path):
+    """Tests write_csv appends to partitioned dataset"""
+    for _ in range(2):
+        write_csv(ddoc, tmp_path, SALARY_COLUMNS, constants={'draft_group_id': 1},
+                  partition_cols=['draft_group_id'])
+    files = list((tmp_path / 'draft_group_id=1').glob('*.csv'))
+    assert len(files) == 2
+    rows = list(csv.DictReader(files[0].open()))
+    assert len(rows) == len(ddoc.draftables)
+    assert 'draft_group_id' not in rows[0]
+
+    f = io.StringIO()
+    write_csv(ddoc, f, ['display_name', 'salary'])
+    assert f.getvalue().startswith('display_name,salary')
+
+
+def test_write_parquet(ddoc, gc, tmp_path):
+    """Tests record batches and parquet"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    batch = next(iter_record_batches(gc, section='draft_groups'))
+    assert batch.num_rows == len(gc.draft_groups)
+    write_parquet(ddoc, tmp_path / 'sal.parquet', SALARY_COLUMNS, batch_size=100)
+    tbl = pq.read_table(tmp_path / 'sal.parquet')
+    assert tbl.num_rows == len(ddoc.draftables)
+    assert tbl.column_names == SALARY_COLUMNS
+
+
+def test_to_frame(ddoc, gc):
+    """Tests to_frame matches a frame built from record dicts"""
+    df = ddoc.to_frame(SALARY_COLUMNS)
+    expected = pd.DataFrame([{c: getattr(p, c) for c in SALARY_COLUMNS} for p in ddoc.draftables])
+    assert list(df.columns) == SALARY_COLUMNS
+    assert df['position'].dtype == 'category'
+    pd.testing.assert_frame_equal(df.astype(object), expected.astype(object))
+
+    contests = gc.to_frame()
+    assert len(contests) == len(gc.contests)
+    assert contests['game_type'].dtype == 'category'
+    assert contests['id'].tolist() == [c.id for c in gc.contests]
+    assert to_frame(gc, section='draft_groups', categorical=False)['draft_group_id'].tolist() == \
+        [dg.draft_group_id for dg in gc.draft_groups]
+
+
+def test_to_frame_nulls():
+    """Tests nullable int, bool and string columns"""
+    records = [ContestDocument(id=1, n='a', tix=True, po=1.5), ContestDocument(id=None, n=None, tix=None, po=None)]
+    df = to_frame(records, columns=['id', 'n', 'tix', 'po'], categorical=True)
+    assert str(df['id'].dtype) == 'Int64' and df['id'].isna().tolist() == [False, True]
+    assert str(df['tix'].dtype) == 'boolean' and df['tix'].isna().tolist() == [False, True]
+    assert df['n'].isna().tolist() == [False, True]
+    assert df['po'].isna().tolist() == [False, True]
+
+
+@pytest.mark.skipif(pa is None, reason='pyarrow not installed')
+def test_to_arrow(ddoc, gc):
+    """Tests to_arrow dictionary-encodes repeated strings"""
+    table = ddoc.to_arrow(SALARY_COLUMNS)
+    assert table.num_rows == len(ddoc.draftables)
+    assert pa.types.is_dictionary(table.schema.field('team_abbreviation').type)
+    assert table.column('salary').to_pylist() == [p.salary for p in ddoc.draftables]
+    assert table.column('display_name').to_pylist() == [p.display_name for p in ddoc.draftables]
+    assert gc.to_arrow('tournaments').num_rows == len(gc.tournaments)
+
+    records = [ContestDocument(id=1, n='a', tix=True, po=1.5), ContestDocument(id=None, n=None, tix=None, po=None)]
+    table = to_arrow(records, columns=['id', 'n', 'tix', 'po'], categorical=True)
+    assert table.to_pylist() == [{'id': 1, 'n': 'a', 'tix': True, 'po': 1.5}, {'id': None, 'n': None, 'tix': None, 'po': None}]
+
+
+@pytest.mark.parametrize('columns', [['salry'], ['competitions'], ['competition']])
+def test_to_frame_invalid_columns(ddoc, columns):
+    """Tests unknown and non-scalar columns raise ValueError"""
+    with pytest.raises(ValueError, match=columns[0]):
+        ddoc.to_frame(columns)
+    if pa is not None:
+        with pytest.raises(ValueError, match=columns[0]):
+            ddoc.to_arrow(columns)
+        with pytest.raises(ValueError, match=columns[0]):
+            arrow_schema(PlayerDocument, columns)
+
+
+def test_write_csv_invalid(ddoc, tmp_path):
+    """Tests unknown columns and partitions of a file object raise ValueError"""
+    with pytest.raises(ValueError, match='salry'):
+        write_csv(ddoc, io.StringIO(), ['salry'])
+    with pytest.raises(ValueError, match='salry'):
+        write_csv(ddoc, tmp_path / 'sal.csv', SALARY_COLUMNS, unique=['salry'])
+    with pytest.raises(ValueError, match='partition_cols'):
+        write_csv(ddoc, io.StringIO(), SALARY_COLUMNS, partition_cols=['position'])
+    assert not (tmp_path / 'sal.csv').exists()
+
+
+def test_export_without_pyarrow():
+    """Tests export imports and writes csv without loading pyarrow"""
+    code = (
+        'import io, sys\n'
+        'from dksalaries.export import write_csv\n'
+        'from dksalaries.documents import ContestDocument\n'
+        "write_csv([ContestDocument(id=1, n='a')], io.StringIO(), ['id', 'n'])\n"
+        "print('pyarrow' in sys.modules)\n"
+    )
+    out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                         check=True, cwd=Path(__file__).parent.parent).stdout.split()
+    assert out == ['False']
@@ -0,0 +1,101 @@
+# dksalaries/tests/test_getsalaries.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import csv
+import importlib.util
+from pathlib import Path
+import sys
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.constants import DEFAULT_SPORTS
+from dksalaries.export import SALARY_COLUMNS
+
+# scripts is not a package, load the console script by path
+# registered so worker processes can unpickle _parse_and_write
+_spec = importlib.util.spec_from_file_location('getsalaries', Path(__file__).parent.parent / 'scripts' / 'getsalaries.py')
+getsalaries = sys.modules['getsalaries'] = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(getsalaries)
+
+
+@pytest.fixture
+def fake_scraper(monkeypatch, test_directory, getcontests_document):
+    """Replaces the batch Scraper with one serving the bundled fixtures"""
+    payload = (test_directory / 'data' / 'draftables.json').read_bytes()
+    requested = []
+
+    class FakeScraper:
+        def __init__(self, max_workers=8, thread_safe=False):
+            pass
+
+        def getcontests_many(self, sports):
+            for sport in sports:
+                yield sport, getcontests_document if sport == 'NFL' else {}
+
+        def draftables(self, dgid, raw=False):
+            requested.append(dgid)
+            return payload
+
+    monkeypatch.setattr(getsalaries, 'Scraper', FakeScraper)
+    return requested
+
+
+@pytest.fixture
+def n_players(test_directory):
+    return len(Parser().draftables((test_directory / 'data' / 'draftables.json').read_bytes()).draftables)
+
+
+def run_batch(tmp_path, *argv):
+    args = getsalaries.parse_args(['--out-dir', str(tmp_path), '--sport', 'NFL', '--sport', 'NBA',
+                                   '--workers', '1', *argv])
+    getsalaries.batch(args)
+
+
+def test_parse_args():
+    """Tests batch defaults"""
+    args = getsalaries.parse_args(['--out-dir', 'out'])
+    assert args.sport == list(DEFAULT_SPORTS)
+    assert args.game_type is None
+    assert (args.slates, args.format) == ('main', 'csv')
+    with pytest.raises(SystemExit):
+        getsalaries.parse_args(['--slates', 'bogus'])
+
+
+def test_batch_csv(fake_scraper, n_players, tmp_path, capsys):
+    """Tests batch writes one csv per main slate draft group"""
+    run_batch(tmp_path)
+    assert sorted(fake_scraper) == [53019, 55333]
+    assert sorted(fn.name for fn in (tmp_path / 'NFL').iterdir()) == ['53019.csv', '55333.csv']
+    assert not (tmp_path / 'NBA').exists()
+    with (tmp_path / 'NFL' / '53019.csv').open(newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == n_players
+    assert set(SALARY_COLUMNS) <= set(rows[0])
+    assert {(r['sport'], r['draft_group_id']) for r in rows} == {('NFL', '53019')}
+    assert '2 lobbies, 2 draft groups' in capsys.readouterr().err
+
+
+def test_batch_parquet(fake_scraper, n_players, tmp_path):
+    """Tests batch writes parquet"""
+    pq = pytest.importorskip('pyarrow.parquet')
+    run_batch(tmp_path, '--format', 'parquet')
+    table = pq.read_table(tmp_path / 'NFL' / '55333.parquet')
+    assert table.num_rows == n_players
+    assert set(table.column('draft_group_id').to_pylist()) == {55333}
+    assert list(tmp_path.rglob('*.tmp')) == []
+
+
+def test_batch_selectors(fake_scraper, tmp_path):
+    """Tests --slates and --game-type choose the draft groups"""
+    run_batch(tmp_path, '--slates', 'all')
+    assert sorted(fake_scraper) == [53019, 55333, 55758, 56005, 56006]
+    fake_scraper.clear()
+    run_batch(tmp_path, '--game-type', 'Showdown Captain Mode', '--slates', 'featured')
+    assert fake_scraper == [53018]
+    assert (tmp_path / 'NFL' / '53018.csv').exists()
+    fake_scraper.clear()
+    run_batch(tmp_path, '--game-type', 'Classic', '--game-type', 'Tiers')
+    assert sorted(fake_scraper) == [53019, 55333, 55986]
@@ -0,0 +1,94 @@
+# dksalaries/tests/test_history.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import copy
+
+import numpy as np
+import pytest
+
+from dksalaries import Parser
+from dksalaries.history import *
+from dksalaries.pool import PlayerPool
+
+
+@pytest.fixture
+def snapshots(draftables_document):
+    later = copy.deepcopy(draftables_document)
+    players = later['draftables']
+    for p in players[:20]:
+        p['salary'] += 200
+    for p in players[10:15]:
+        p['status'] = 'Q'
+    removed = players.pop(30)
+    players.append(dict(players[40], playerId=1, draftableId=1, salary=3000))
+    p = Parser()
+    return p.draftables(draftables_document), p.draftables(later), removed
+
+
+def _keyed(ddoc):
+    out = {}
+    for p in ddoc.draftables:
+        out.setdefault((p.player_id, p.roster_slot_id), p)
+    return out
+
+
+def test_diff(snapshots):
+    """Tests diff matches a dict join of the snapshots"""
+    old, new, removed = snapshots
+    hist = SalaryHistory([old, new], labels=['open', 'lock'])
+    a, b = _keyed(old), _keyed(new)
+    assert len(hist) == len(a.keys() | b.keys())
+
+    cols = hist.diff('open', 'lock', changed_only=True)
+    got = {(pid, slot): (ch, d) for pid, slot, ch, d in
+           zip(cols['player_id'].tolist(), cols['roster_slot_id'].tolist(), cols['change'], cols['delta'].tolist())}
+    expected = {}
+    for k in a.keys() | b.keys():
+        if k not in a:
+            expected[k] = 'added'
+        elif k not in b:
+            expected[k] = 'removed'
+        else:
+            moved, status = b[k].salary != a[k].salary, b[k].status != a[k].status
+            if moved or status:
+                expected[k] = 'salary+status' if moved and status else 'salary' if moved else 'status'
+    assert {k: v[0] for k, v in got.items()} == expected
+    assert all(d == b[k].salary - a[k].salary for k, (ch, d) in got.items() if 'salary' in ch)
+    assert all(np.isnan(d) for ch, d in got.values() if ch in ('added', 'removed'))
+
+    assert hist.added()['player_id'].tolist() == [1]
+    assert (removed['playerId'], removed['rosterSlotId']) in zip(*(hist.removed()[c].tolist() for c in ('player_id', 'roster_slot_id')))
+    assert set(hist.salary_changes(min_delta=200)['delta'].tolist()) == {200}
+    assert sum(hist.status_transitions().values()) == sum(1 for v in expected.values() if 'status' in v)
+    pid = old.draftables[0].player_id
+    assert hist.series(pid, old.draftables[0].roster_slot_id) == {'open': old.draftables[0].salary, 'lock': old.draftables[0].salary + 200}
+
+
+def test_snapshot_positions(snapshots):
+    """Tests ints are positions and integer labels go through position"""
+    old, new, _ = snapshots
+    hist = SalaryHistory([old, new], labels=[1, 0])
+    forward = SalaryHistory([old, new]).diff(0, 1)
+    assert hist.diff(0, 1)['change'].tolist() == forward['change'].tolist()
+    assert hist.diff(hist.position(1), hist.position(0))['change'].tolist() == forward['change'].tolist()
+    assert hist.added(0, 1)['player_id'].tolist() == [1]
+    with pytest.raises(IndexError):
+        hist.diff(0, 2)
+    with pytest.raises(KeyError):
+        hist.position(2)
+    with pytest.raises(KeyError):
+        hist.diff('open')
+
+
+def test_open(snapshots, tmp_path):
+    """Tests history from pool snapshot files"""
+    old, new, _ = snapshots
+    paths = [PlayerPool.from_document(d).write_snapshot(tmp_path / f'week{i}.pool') for i, d in enumerate((old, new))]
+    hist = SalaryHistory.open(paths)
+    assert hist.labels == ['week0', 'week1']
+    expected = SalaryHistory([old, new]).diff()
+    got = hist.diff('week0', 'week1')
+    for k, v in expected.items():
+        np.testing.assert_array_equal(got[k], v)
@@ -0,0 +1,72 @@
+# dksalaries/tests/test_lateswap.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import datetime
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.lateswap import *
+from dksalaries.util import parse_dktime
+
+
+@pytest.fixture
+def ddoc(draftables_document):
+    return Parser().draftables(draftables_document)
+
+
+def _start(p):
+    return (p.competition or {}).get('startTime', '')
+
+
+def _unlocked(ddoc, now):
+    return [p for p in ddoc.draftables
+            if p.is_swappable and not p.is_disabled and (not _start(p) or parse_dktime(_start(p)) > now)]
+
+
+def test_lateswap(ddoc):
+    """Tests locking by time matches a full scan of the pool"""
+    tracker = LateSwapTracker(ddoc)
+    first, comps = tracker.next_lock()
+    assert len(tracker.players(comps[0])) > 0
+    assert tracker.update(first - datetime.timedelta(minutes=1)) == []
+
+    newly = tracker.update(first)
+    assert sorted(newly) == sorted(comps)
+    assert tracker.update(first) == []
+    assert tracker.next_lock()[0] > first
+
+    open_players = _unlocked(ddoc, first)
+    rbs = [p for p in open_players if p.roster_slot_id == 67 and 4000 <= p.salary <= 6000]
+    alts = tracker.alternatives(67, 6000, 4000)
+    salary = {p.draftable_id: p.salary for p in ddoc.draftables}
+    assert set(alts) == {p.draftable_id for p in rbs}
+    assert [salary[d] for d in alts] == sorted((p.salary for p in rbs), reverse=True)
+    assert all(tracker.is_swappable(p.draftable_id) for p in open_players)
+    assert not any(tracker.is_swappable(p.draftable_id) for p in ddoc.draftables if (p.competition or {}).get('competitionId') in comps)
+
+    # naive times are local to tz, everything has locked by the next morning
+    tracker.update(datetime.datetime(2021, 9, 13, 9))
+    assert tracker.next_lock() is None
+    assert set(tracker.alternatives(67, 50000)) == {p.draftable_id for p in _unlocked(ddoc, first) if p.roster_slot_id == 67 and not _start(p)}
+
+
+def test_swap_options(ddoc):
+    """Tests swap options stay under the cap and skip locked players"""
+    tracker = LateSwapTracker(ddoc)
+    late = [p for p in ddoc.draftables if p.roster_slot_id == 67 and _start(p) > '2021-09-12T18']
+    early = [p for p in ddoc.draftables if p.roster_slot_id == 67 and '' < _start(p) < '2021-09-12T18']
+    lineup = [late[0].draftable_id, early[0].draftable_id]
+    used = late[0].salary + early[0].salary
+    tracker.lock(early[0].competition['competitionId'])
+    assert tracker.swappable(lineup) == [late[0].draftable_id]
+    assert tracker.swap_options(lineup, early[0].draftable_id, 50000) == []
+
+    options = tracker.swap_options(lineup, late[0].draftable_id, used + 500)
+    salary = {p.draftable_id: p for p in ddoc.draftables}
+    assert options
+    assert all(salary[d].salary <= late[0].salary + 500 for d in options)
+    assert all(salary[d].player_id != early[0].player_id for d in options)
+    assert all(tracker.is_swappable(d) for d in options)
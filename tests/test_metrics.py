@@ -0,0 +1,66 @@
+# dksalaries/tests/test_metrics.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import logging
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.cache import DocumentCache
+from dksalaries.metrics import *
+
+
+@pytest.fixture
+def sink():
+    sink = PrometheusSink()
+    set_sink(sink)
+    yield sink
+    set_sink(None)
+
+
+def test_disabled():
+    """Tests spans are no-ops without a sink"""
+    assert not enabled()
+    with span('x', records=1) as sp:
+        sp['bytes'] = 2
+
+
+def test_parser_spans(sink, draftables_document, gc):
+    """Tests parser and document spans"""
+    p = Parser(cache=DocumentCache())
+    p.draftables(draftables_document)
+    p.draftables(draftables_document)
+    gc.find_main_slate()
+    stats = sink.stats()
+    assert stats['parser.draftables']['count'] == 2
+    assert stats['parser.structure']['records'] == len(draftables_document['draftables']) + len(draftables_document['draftStats'])
+    assert stats['documents.find_main_slate']['count'] == 1
+    assert stats['documents.find_milly']['count'] == 1
+    assert sink.counter('parser.cache', result='hit') == 1
+    assert sink.counter('parser.cache', kind='draftables') == 2
+    text = sink.render()
+    assert 'dksalaries_span_seconds_count{span="parser.structure",cls="PlayerDocument"} 1' in text
+    assert 'dksalaries_events_total{event="parser.cache",kind="draftables",result="hit"} 1' in text
+
+
+def test_prometheus_escaping():
+    """Tests label values are escaped for the text format"""
+    sink = PrometheusSink()
+    sink.count('scrape', 1, {'contest': 'NFL "Milly" \\ Week 1\nFinal'})
+    assert 'dksalaries_events_total{event="scrape",contest="NFL \\"Milly\\" \\\\ Week 1\\nFinal"} 1' in sink.render()
+
+
+def test_logging_sink(caplog):
+    """Tests LoggingSink"""
+    set_sink(LoggingSink(level=logging.INFO))
+    try:
+        with caplog.at_level(logging.INFO):
+            with span('scraper.request', bytes=10):
+                pass
+            count('parser.cache', result='hit')
+    finally:
+        set_sink(None)
+    assert 'scraper.request' in caplog.text
+    assert 'bytes=10' in caplog.text
@@ -0,0 +1,74 @@
+# dksalaries/tests/test_players.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import threading
+
+from dksalaries import Parser
+from dksalaries.players import *
+from dksalaries.synthetic import LobbyGenerator
+
+
+def test_player_index():
+    """Tests appearances across draft groups"""
+    gen = LobbyGenerator(seed=5, n_teams=8)
+    lobby = gen.getcontests(100, n_game_sets=6)
+    p = Parser()
+    idx = PlayerIndex()
+    docs = {dgid: p.draftables(payload) for dgid, payload in gen.draftables_many(lobby)}
+    for dgid, ddoc in docs.items():
+        idx.add(dgid, ddoc)
+    assert sorted(idx.draft_group_ids) == sorted(docs)
+
+    # a main slate player also appears in their showdown
+    player = docs[lobby['DraftGroups'][0]['DraftGroupId']].draftables[0]
+    apps = idx.appearances(player.player_id)
+    expected = {dgid for dgid, ddoc in docs.items() if any(d.player_id == player.player_id for d in ddoc.draftables)}
+    assert {a.draft_group_id for a in apps} == expected
+    assert len(expected) > 1
+    assert idx.appearances(player_dk_id=player.player_dk_id) == apps
+    sal = idx.salaries(player.player_id)
+    for dgid in expected:
+        assert sal[dgid] == min(d.salary for d in docs[dgid].draftables if d.player_id == player.player_id)
+    assert player.player_id in idx.find_player_by_name(player.display_name)
+
+    # re-adding replaces, removing drops players seen only there
+    first = next(iter(docs))
+    idx.add(first, docs[first])
+    assert len(idx.appearances(player.player_id)) == len(apps)
+    for dgid in docs:
+        idx.remove(dgid)
+    assert len(idx) == 0
+    assert idx.appearances(player.player_id) == []
+
+
+def test_player_index_concurrent_reads():
+    """Tests reads while another thread adds and removes draft groups"""
+    gen = LobbyGenerator(seed=5, n_teams=8)
+    lobby = gen.getcontests(100, n_game_sets=6)
+    p = Parser()
+    docs = {dgid: p.draftables(payload) for dgid, payload in gen.draftables_many(lobby)}
+    idx = PlayerIndex()
+    for dgid, ddoc in docs.items():
+        idx.add(dgid, ddoc)
+    player_id = next(iter(docs.values())).draftables[0].player_id
+    stop = threading.Event()
+
+    def churn():
+        while not stop.is_set():
+            for dgid, ddoc in docs.items():
+                idx.remove(dgid)
+                idx.add(dgid, ddoc)
+
+    t = threading.Thread(target=churn)
+    t.start()
+    try:
+        for _ in range(2000):
+            idx.appearances(player_id)
+            idx.salaries(player_id)
+            for dgid in idx.draft_group_ids:
+                idx.players(dgid)
+    finally:
+        stop.set()
+        t.join()
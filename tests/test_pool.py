@@ -0,0 +1,70 @@
+# dksalaries/tests/test_pool.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+
+import numpy as np
+import pytest
+
+from dksalaries import Parser
+from dksalaries.documents import DraftStatsDocument
+from dksalaries.pool import *
+
+
+@pytest.fixture
+def ddoc(draftables_document):
+    return Parser().draftables(draftables_document)
+
+
+def _n_rbs(pool):
+    return len(pool.find_player_by_position('RB'))
+
+
+def test_pool_lookups(ddoc):
+    """Tests PlayerPool matches DraftablesDocument lookups"""
+    pool = PlayerPool.from_document(ddoc)
+    assert len(pool) == len(ddoc.draftables)
+    assert len(pool.find_player_by_position('RB')) == len(ddoc.find_player_by_position('RB'))
+    assert len(pool.find_player_by_team('CAR')) == len(ddoc.find_player_by_team('CAR'))
+    assert len(pool.find_player_by_name(last_name='McCaffrey')) == len(ddoc.find_player_by_name(last_name='McCaffrey'))
+    pl = ddoc.draftables[10]
+    assert pool.by_draftable_id(pl.draftable_id)['display_name'] == pl.display_name
+    assert pool['salary'].sum() == sum(p.salary for p in ddoc.draftables)
+
+
+def test_pool_snapshot(ddoc, tmp_path):
+    """Tests memory-mapped snapshot round trip"""
+    pool = PlayerPool.from_document(ddoc)
+    fn = pool.write_snapshot(tmp_path / 'dg.pool')
+    snap = PlayerPool.open_snapshot(fn)
+    assert isinstance(snap['salary'], np.memmap)
+    assert not snap['salary'].flags.writeable
+    for col in pool.columns:
+        assert (snap[col] == pool[col]).all()
+    assert len(pickle.dumps(snap)) < 200
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(_n_rbs, [snap, snap])) == [_n_rbs(pool)] * 2
+
+
+def test_stat_matrix(ddoc):
+    """Tests StatMatrix decodes draft stats and attributes"""
+    assert all(isinstance(s, DraftStatsDocument) for s in ddoc.draft_stats)
+    m = ddoc.stat_matrix
+    assert m is ddoc.stat_matrix
+    assert m.shape == (len(ddoc.draftables), len(m.columns))
+    assert m.columns[:2] == ['FPPG', 'OPRK']
+    assert m.stat_ids == {'FPPG': 90, 'OPRK': -2}
+    p = ddoc.draftables[0]
+    fppg = [a for a in p.draft_stat_attributes if a['id'] == 90][0]
+    assert m.row(p.draftable_id)['FPPG'] == float(fppg['sortValue'])
+    assert np.isnan(m['OPRK']).any()
+
+    # rows line up with the pool
+    pool = PlayerPool.from_document(ddoc)
+    assert (pool.arrays['draftable_id'] == m.draftable_ids).all()
+    top = pool.take(m['FPPG'] >= np.nanmax(m['FPPG']))
+    assert top.row(0)['draftable_id'] == m.take(m['FPPG'] >= np.nanmax(m['FPPG'])).draftable_ids[0]
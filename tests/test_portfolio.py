@@ -0,0 +1,74 @@
+# dksalaries/tests/test_portfolio.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+from collections import Counter
+import json
+
+import numpy as np
+import pytest
+
+from dksalaries import Parser
+from dksalaries.portfolio import *
+
+
+@pytest.fixture(scope='module')
+def ddoc(test_directory):
+    return Parser().draftables(json.loads((test_directory / 'data' / 'draftables.json').read_text()))
+
+
+@pytest.fixture(scope='module')
+def lineups(ddoc):
+    rng = np.random.default_rng(0)
+    ids = [p.draftable_id for p in ddoc.draftables]
+    return [list(rng.choice(ids, 9, replace=False)) for _ in range(60)]
+
+
+def test_exposures(ddoc, lineups):
+    """Tests exposures and stacks match per-lineup counting"""
+    port = Portfolio(ddoc, lineups)
+    pid = {p.draftable_id: p.player_id for p in ddoc.draftables}
+    team = {p.draftable_id: p.team_abbreviation for p in ddoc.draftables}
+    expected = Counter(x for lineup in lineups for x in {pid[d] for d in lineup})
+    assert port.exposures() == pytest.approx({k: v / len(lineups) for k, v in expected.items()})
+    assert list(port.exposures())[0] == expected.most_common(1)[0][0]
+    assert sum(port.slot_exposures().values()) == pytest.approx(9)
+
+    stacks = Counter(t for lineup in lineups for t, n in Counter(team[d] for d in lineup).items() if n >= 2)
+    assert port.team_stacks() == dict(stacks)
+    assert sum(port.stack_shapes().values()) == len(lineups)
+
+    a, b, n = port.pair_counts(top=1)[0]
+    assert n == sum(1 for lineup in lineups if {a, b} <= {pid[d] for d in lineup})
+    ids, corr = port.pair_correlation()
+    assert corr.shape == (len(ids), len(ids))
+
+    with pytest.raises(KeyError):
+        Portfolio(ddoc, [[-1] * 9])
+
+
+def test_portfolio_invalid(ddoc, lineups):
+    """Tests empty and ragged lineup sets raise ValueError"""
+    with pytest.raises(ValueError, match='at least one lineup'):
+        Portfolio(ddoc, [])
+    with pytest.raises(ValueError, match='differ in size'):
+        Portfolio(ddoc, [lineups[0], lineups[1][:8]])
+
+
+def test_overlap(ddoc, lineups):
+    """Tests chunked overlap matches pairwise set intersections"""
+    port = Portfolio(ddoc, lineups)
+    players = [set(row) for row in port.columns.tolist()]
+    hist = np.zeros(10, dtype=np.int64)
+    best = np.zeros(len(lineups), dtype=np.int64)
+    for i in range(len(players)):
+        for j in range(len(players)):
+            if i != j:
+                shared = len(players[i] & players[j])
+                best[i] = max(best[i], shared)
+                if j > i:
+                    hist[shared] += 1
+    assert port.overlap_distribution(chunk_size=7).tolist() == hist.tolist()
+    assert port.max_overlap(chunk_size=16).tolist() == best.tolist()
+    assert port.overlap(0)[0] == len(players[0])
@@ -0,0 +1,58 @@
+# dksalaries/tests/test_query.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.pool import PlayerPool
+from dksalaries.query import *
+
+
+@pytest.fixture
+def ddoc(draftables_document):
+    return Parser().draftables(draftables_document)
+
+
+def test_query(ddoc):
+    """Tests filters match list comprehensions over the players"""
+    players = ddoc.draftables
+    fppg = dict(zip(ddoc.stat_matrix.draftable_ids.tolist(), ddoc.stat_matrix['FPPG'].tolist()))
+    cases = {
+        "position in ('RB', 'WR') and salary between 4000 and 6000 and status != 'O'":
+            lambda p: p.position in ('RB', 'WR') and 4000 <= p.salary <= 6000 and p.status != 'O',
+        "team_abbreviation = 'NYG' or (position == 'QB' and not salary < 7000)":
+            lambda p: p.team_abbreviation == 'NYG' or (p.position == 'QB' and p.salary >= 7000),
+        "display_name LIKE '%Jones%' and position not in ('QB')":
+            lambda p: 'Jones' in p.display_name and p.position != 'QB',
+        "display_name like 'Jo%' or last_name not like '_a%'":
+            lambda p: p.display_name.startswith('Jo') or p.last_name[1:2] != 'a',
+        "team_abbreviation like 'NY_'":
+            lambda p: len(p.team_abbreviation) == 3 and p.team_abbreviation.startswith('NY'),
+        "display_name like 'Jones'":
+            lambda p: p.display_name == 'Jones',
+        "salary not between 3500 and 8000":
+            lambda p: not 3500 <= p.salary <= 8000,
+        "FPPG >= 15 and not is_disabled":
+            lambda p: fppg[p.draftable_id] >= 15 and not p.is_disabled,
+        "`FPPG` is null":
+            lambda p: fppg[p.draftable_id] != fppg[p.draftable_id],
+    }
+    for expr, keep in cases.items():
+        assert ddoc.query(expr) == [p for p in players if keep(p)], expr
+
+    pool = PlayerPool.from_document(ddoc)
+    assert len(pool.query("position = 'RB'")) == len(ddoc.find_player_by_position('RB'))
+    assert len(pool.query('FPPG > 10', stats=ddoc.stat_matrix)) == sum(v > 10 for v in fppg.values())
+    assert compile_filter('salary > 5000') is compile_filter('salary > 5000')
+    assert compile_filter("position = 'RB' and salary > 5000").columns == {'position', 'salary'}
+
+
+@pytest.mark.parametrize('expr', [
+    'salary >', "salary = 'x'", 'nope = 1', "position < 3", '(salary > 1', 'salary ~ 3', 'position not 3',
+])
+def test_query_errors(ddoc, expr):
+    """Tests invalid filters raise ValueError"""
+    with pytest.raises(ValueError):
+        ddoc.query(expr)
@@ -0,0 +1,125 @@
+# dksalaries/tests/test_rules.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import attr
+import numpy as np
+import pytest
+
+from dksalaries import Parser
+from dksalaries.rules import *
+from dksalaries.rules import _popcount
+from dksalaries.synthetic import LobbyGenerator
+
+
+@pytest.fixture
+def ddoc(draftables_document):
+    return Parser().draftables(draftables_document)
+
+
+def _cheapest(pool, roster_slot_id, k, skip=0):
+    rows = np.flatnonzero(pool.arrays['roster_slot_id'] == roster_slot_id)
+    rows = rows[np.argsort(pool.arrays['salary'][rows], kind='stable')]
+    return pool.arrays['draftable_id'][rows[skip:skip + k]].tolist()
+
+
+def _lineup(pool):
+    return (_cheapest(pool, 66, 1) + _cheapest(pool, 67, 2) + _cheapest(pool, 68, 3) +
+            _cheapest(pool, 69, 1) + _cheapest(pool, 70, 1, skip=10) + _cheapest(pool, 71, 1))
+
+
+def test_registry(gc):
+    """Tests rules from lobby game types and game type ids"""
+    reg = RulesRegistry()
+    rules = reg.add_game_types(gc.game_types)
+    assert set(rules) == {1, 96, 158, 159}
+    assert rules[1].size == 9 and rules[1].salary_cap == 50000
+    assert rules[96].size == 6 and rules[96].slots[0].multiplier == 1.5
+    assert reg.rules(1) is rules[1]
+    assert reg.rules(70).sport == 'NBA'
+    with pytest.raises(KeyError):
+        reg.rules(189)
+
+
+def test_bind(ddoc):
+    """Tests slots bind to the roster_slot_ids of the draft group"""
+    rules = RulesRegistry().rules(1).bind(ddoc)
+    assert rules.eligible == {66: ('QB',), 67: ('RB',), 68: ('WR',), 69: ('TE',), 70: ('RB', 'WR', 'TE'), 71: ('DST',)}
+    with pytest.raises(ValueError):
+        ROSTER_TEMPLATES[('NBA', 'Classic')].bind(ddoc)
+
+
+def test_bind_captain():
+    """Tests the captain slot takes the roster_slot_id with scaled salaries"""
+    gen = LobbyGenerator(seed=1)
+    lobby = gen.getcontests(200, 6)
+    dg = next(d for d in lobby['DraftGroups'] if d['GameTypeId'] == 96)
+    ddoc = Parser().draftables(gen.draftables(lobby, dg['DraftGroupId']))
+    cpt = {p.player_id: p.salary for p in ddoc.draftables if p.roster_slot_id == 1000}
+    flex = {p.player_id: p.salary for p in ddoc.draftables if p.roster_slot_id == 1001}
+    assert all(cpt[k] > flex[k] for k in cpt)
+    validator = RulesRegistry().validator(ddoc, 96, draft_group_id=dg['DraftGroupId'])
+    assert validator.rules.multipliers == {1000: 1.5, 1001: 1.0}
+
+
+def test_validator(ddoc):
+    """Tests each violation bit"""
+    validator = RulesRegistry().validator(ddoc, 1)
+    pool = validator.pool
+    lineup = _lineup(pool)
+    assert validator.explain(lineup) == []
+    assert validator.explain(lineup, ordered=True) == []
+    assert validator.explain(lineup[::-1]) == []
+    assert validator.explain(lineup[::-1], ordered=True) == ['roster']
+    assert validator.explain(lineup[:-1]) == ['roster']
+    assert validator.explain(lineup[:-1] + [1]) == ['unknown_player', 'roster']
+
+    # same player as RB and FLEX
+    rb = pool.by_draftable_id(lineup[1])
+    flex = [d for d, pid, slot in zip(pool.arrays['draftable_id'].tolist(), pool.arrays['player_id'].tolist(),
+                                      pool.arrays['roster_slot_id'].tolist()) if pid == rb['player_id'] and slot == 70]
+    assert 'duplicate_player' in validator.explain(lineup[:7] + flex + lineup[8:])
+
+    n = {slot: int((pool.arrays['roster_slot_id'] == slot).sum()) for slot in (66, 67, 68)}
+    expensive = _cheapest(pool, 66, 1, n[66] - 1) + _cheapest(pool, 67, 2, n[67] - 2) + _cheapest(pool, 68, 3, n[68] - 3) + lineup[6:]
+    assert validator.explain(expensive) == ['salary_cap']
+
+    capped = LineupValidator(attr.evolve(validator.rules, salary_cap=20000), ddoc)
+    assert capped.explain(lineup) == ['salary_cap']
+
+
+def test_validator_teams(ddoc):
+    """Tests team and game minimums against a full scan"""
+    rules = attr.evolve(RulesRegistry().rules(1), min_teams=9, min_games=9)
+    validator = LineupValidator(rules, ddoc)
+    pool = validator.pool
+    rng = np.random.default_rng(1)
+    lineups = pool.arrays['draftable_id'][rng.integers(0, len(pool), (500, 9))]
+    bits = validator.check(lineups)
+    comps = {p.draftable_id: p.competition.get('competitionId') for p in ddoc.draftables}
+    for lineup, b in zip(lineups.tolist(), bits.tolist()):
+        rows = [pool.by_draftable_id(d) for d in lineup]
+        assert bool(b & TEAMS) == (len({r['team_abbreviation'] for r in rows}) < 9)
+        assert bool(b & GAMES) == (len({comps[d] for d in lineup} - {None}) < 9)
+        assert bool(b & SALARY_CAP) == (sum(r['salary'] for r in rows) > 50000)
+        assert bool(b & DUPLICATE_PLAYER) == (len({r['player_id'] for r in rows}) < 9)
+
+
+def test_popcount(monkeypatch):
+    """Tests the popcount fallback for numpy without bitwise_count"""
+    bits = np.random.default_rng(2).integers(0, 2 ** 63, 1000, dtype=np.uint64)
+    bits[:3] = [0, 2 ** 64 - 1, 2 ** 63]
+    expected = [bin(b).count('1') for b in bits.tolist()]
+    assert _popcount(bits).tolist() == expected
+    monkeypatch.delattr(np, 'bitwise_count', raising=False)
+    assert _popcount(bits).tolist() == expected
+
+
+def test_validator_score(ddoc):
+    """Tests scores apply slot multipliers"""
+    validator = RulesRegistry().validator(ddoc, 1)
+    lineup = _lineup(validator.pool)
+    points = np.ones(len(validator.pool))
+    assert validator.score([lineup, lineup], points).tolist() == [9.0, 9.0]
+    assert validator.salaries([lineup])[0] == sum(validator.pool.by_draftable_id(d)['salary'] for d in lineup)
@@ -0,0 +1,107 @@
+# dksalaries/tests/test_service.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.service import *
+
+
+class FakeScraper:
+    def __init__(self, lobby, draftables):
+        self.lobby = lobby
+        self.payload = draftables
+        self.failing = set()
+
+    def getcontests_many(self, sports, return_exceptions=False):
+        for sport in sports:
+            if sport not in self.failing:
+                yield sport, self.lobby
+            elif return_exceptions:
+                yield sport, ConnectionError(sport)
+            else:
+                raise ConnectionError(sport)
+
+    def draftables(self, dgid):
+        return self.payload
+
+
+@pytest.fixture
+def svc(getcontests_document, draftables_document):
+    svc = SalaryService(scraper=FakeScraper(getcontests_document, draftables_document),
+                        parser=Parser(), sports=['NFL'], slates='main')
+    svc.refresh()
+    return svc
+
+
+def test_service_queries(svc):
+    """Tests SalaryService lookups"""
+    assert svc.status()['draft_groups'] == [53019, 55333]
+    assert any(s['is_main_slate'] for s in svc.slates('NFL'))
+    rbs = svc.players(53019, position='RB')
+    assert rbs and all(p['position'] == 'RB' for p in rbs)
+    assert all(p['team_abbreviation'] == 'CAR' for p in svc.players(53019, 'RB', 'CAR'))
+    cmc = [p for p in svc.players(53019) if p['display_name'] == 'Christian McCaffrey']
+    assert svc.salaries(53019)[cmc[0]['draftable_id']] == 9500
+    assert len(svc.salaries(53019)) == len(svc.players(53019))
+    body = svc.query('/draftgroups/53019/players?position=RB')
+    assert svc.query('/draftgroups/53019/players?position=RB') is body
+    with pytest.raises(KeyError):
+        svc.query('/draftgroups/1/players')
+
+
+def test_service_response_cache(svc, monkeypatch):
+    """Tests memoized responses are keyed by known parameters and capped"""
+    for i in range(50):
+        svc.query(f'/draftgroups/53019/players?position=RB&x={i}')
+    assert len(svc.state.responses) == 1
+    monkeypatch.setattr('dksalaries.service.RESPONSE_CACHE_SIZE', 10)
+    for i in range(50):
+        svc.query(f'/draftgroups/53019/players?team=T{i}')
+    assert len(svc.state.responses) == 10
+    assert ('players', 53019, None, 'T49') in svc.state.responses
+
+
+def test_service_refresh_failure(svc):
+    """Tests a failing lobby keeps the previous state of its sport"""
+    svc.scraper.failing.add('NFL')
+    state = svc.refresh()
+    assert state.lobbies['NFL'] is not None
+    assert sorted(state.draft_groups) == [53019, 55333]
+    assert svc.slates('NFL') and len(svc.players(53019)) == len(svc.salaries(53019))
+
+
+def test_service_http(svc):
+    """Tests HTTP server"""
+    server = make_server(svc, port=0)
+    t = threading.Thread(target=server.serve_forever, daemon=True)
+    t.start()
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/draftgroups/53019/salaries'
+        with urllib.request.urlopen(url) as r:
+            assert json.loads(r.read()) == {str(k): v for k, v in svc.salaries(53019).items()}
+        svc.query = lambda target: 1 / 0
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(url)
+        assert e.value.code == 500
+        assert 'internal error' in json.loads(e.value.read())['error']
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_service_player(svc):
+    """Tests player identity lookup across draft groups"""
+    row = svc.players(53019)[0]
+    apps = svc.player(row['player_id'])
+    assert {a['draft_group_id'] for a in apps} == {53019, 55333}
+    assert json.loads(svc.query(f"/players/{row['player_id']}")) == apps
+    with pytest.raises(KeyError):
+        svc.player(-1)
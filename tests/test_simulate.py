@@ -0,0 +1,87 @@
+# dksalaries/tests/test_simulate.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import json
+
+import numpy as np
+import pytest
+
+from dksalaries import Parser
+from dksalaries.documents import ContestDocument
+from dksalaries.simulate import *
+
+
+@pytest.fixture(scope='module')
+def ddoc(test_directory):
+    return Parser().draftables(json.loads((test_directory / 'data' / 'draftables.json').read_text()))
+
+
+@pytest.fixture(scope='module')
+def lineups(ddoc):
+    rng = np.random.default_rng(0)
+    ids = [p.draftable_id for p in ddoc.draftables]
+    return [list(rng.choice(ids, 9, replace=False)) for _ in range(40)]
+
+
+def test_payout_table(test_directory):
+    """Tests payout tables from contest detail and lobby contests"""
+    detail = Parser().contest_detail(json.loads((test_directory / 'data' / 'contest.json').read_text()))
+    pt = payout_table(detail)
+    assert pt.size == detail.maximum_entries
+    assert pt.payout(np.array([1, 2, 7, 8, 5620, 5621])).tolist() == [1e6, 1e5, 12500, 12500, 150, 0]
+    assert pt.total == pytest.approx(2.5e6)
+
+    du = payout_table(ContestDocument(id=1, n='NFL $10 Double Up', a=10, m=100, po=900))
+    assert du.payout(np.array([1, 45, 46])).tolist() == [20, 20, 0]
+    h2h = payout_table(ContestDocument(id=2, n='NFL $10 Head-to-Head', a=10, m=2, po=18))
+    assert h2h.payout(np.array([1, 2])).tolist() == [18, 0]
+    with pytest.raises(ValueError):
+        payout_table(ContestDocument(id=3, n='NFL $20K Spy', a=100, m=222, po=20000))
+
+
+def test_simulate(ddoc, lineups):
+    """Tests ranks and payouts match the field size when the field mirrors our lineups"""
+    pt = PayoutTable(np.array([1]), np.array([400]), np.array([18.0]), 10.0, 1000)
+    sim = ContestSimulator(ddoc)
+    res = sim.simulate(lineups, pt, field=lineups, iterations=4000, chunk_size=500, seed=1)
+    assert res.iterations == 4000
+    assert res.mean_payout.shape == (len(lineups),)
+    assert res.cash_rate.mean() == pytest.approx(0.4, abs=0.02)
+    assert res.mean_rank.mean() == pytest.approx(500.5, rel=0.03)
+    assert res.roi.mean() == pytest.approx(0.4 * 1.8 - 1, abs=0.04)
+
+    # stronger lineups cash more often
+    order = np.argsort([sum(sim.means[sim.athlete[i]] for i in row) for row in sim.encode(lineups)])
+    assert res.cash_rate[order[-5:]].mean() > res.cash_rate[order[:5]].mean()
+
+
+def test_simulate_processes(ddoc, lineups):
+    """Tests process-parallel runs combine"""
+    pt = PayoutTable(np.array([1]), np.array([400]), np.array([18.0]), 10.0, 1000)
+    sim = ContestSimulator(ddoc)
+    res = sim.simulate(lineups, pt, field=lineups[::-1], iterations=1001, processes=2, seed=2)
+    assert res.iterations == 1001
+    assert res.cash_rate.mean() == pytest.approx(0.4, abs=0.04)
+    with pytest.raises(KeyError):
+        sim.simulate([[-1] * 9], pt, field=lineups, iterations=10)
+    with pytest.raises(ValueError):
+        sim.simulate(lineups, pt, field=[], iterations=10)
+
+
+def test_simulate_multipliers(ddoc):
+    """Tests multipliers only scale scores, athletes keep their unscaled means"""
+    pool = ddoc.pool
+    ids = pool.arrays['draftable_id'].tolist()
+    pids = pool.arrays['player_id'].tolist()
+    fppg = dict(zip(ids, np.nan_to_num(ddoc.stat_matrix['FPPG']).tolist()))
+    first = {}
+    for d, pid in zip(ids, pids):
+        first.setdefault(pid, d)
+    captains = {d: 1.5 for d in first.values()}
+    sim = ContestSimulator(ddoc, multipliers=captains)
+    # captain-style slots carry the same FPPG as the athlete's other slots
+    assert sim.means.tolist() == [fppg[first[pid]] for pid in sorted(first)]
+    zero = ContestSimulator(ddoc, multipliers={d: 0.0 for d in ids})
+    assert np.isfinite(zero.means).all() and np.isfinite(zero.stds).all()
@@ -0,0 +1,84 @@
+# dksalaries/tests/test_synthetic.py
+# -*- coding: utf-8 -*-
+# Copyright (C) 2021 Eric Truett
+# Licensed under the MIT License
+
+import pytest
+
+from dksalaries import Parser
+from dksalaries.constants import SPORT_GAMETYPES, SPORT_IDS
+from dksalaries.synthetic import *
+
+
+@pytest.fixture
+def lobby():
+    return LobbyGenerator(seed=11).getcontests(n_contests=500, n_game_sets=20, draft_groups_per_set=2)
+
+
+def test_getcontests_deterministic():
+    """Tests same seed gives same payloads"""
+    a, b = LobbyGenerator(seed=3), LobbyGenerator(seed=3)
+    la, lb = a.getcontests(200), b.getcontests(200)
+    assert la == lb
+    dgid = la['DraftGroups'][0]['DraftGroupId']
+    assert a.draftables(la, dgid) == b.draftables(lb, dgid)
+    assert LobbyGenerator(seed=4).getcontests(200) != la
+
+
+def test_getcontests_references(lobby):
+    """Tests contests, draft groups, game sets and competitions line up"""
+    dgids = {dg['DraftGroupId'] for dg in lobby['DraftGroups']}
+    gskeys = {gs['GameSetKey'] for gs in lobby['GameSets']}
+    assert len(lobby['Contests']) == 500
+    assert {c['dg'] for c in lobby['Contests']} <= dgids
+    assert {dg['GameSetKey'] for dg in lobby['DraftGroups']} <= gskeys
+    assert {t['DraftGroupId'] for t in lobby['Tournaments']} <= dgids
+    gcd = Parser().getcontests(lobby)
+    assert len(gcd.contests) == 500
+    assert gcd.sport == 'NFL'
+    dgid, gskey = gcd.find_main_slate()
+    assert dgid in dgids and gskey in gskeys
+    assert gcd.find_milly() is not None
+
+
+def test_draftables_references(lobby):
+    """Tests draftables match the competitions of the draft group's game set"""
+    gen = LobbyGenerator(seed=11)
+    p = Parser()
+    seen = {}
+    for dgid, payload in gen.draftables_many(lobby):
+        dg = next(d for d in lobby['DraftGroups'] if d['DraftGroupId'] == dgid)
+        gs = next(g for g in lobby['GameSets'] if g['GameSetKey'] == dg['GameSetKey'])
+        game_ids = {c['GameId'] for c in gs['Competitions']}
+        ddoc = p.draftables(payload)
+        assert {c['competitionId'] for c in payload['competitions']} == game_ids
+        assert {d['competition']['competitionId'] for d in payload['draftables']} == game_ids
+        assert len({d.draftable_id for d in ddoc.draftables}) == len(ddoc.draftables)
+        for d in ddoc.draftables:
+            seen.setdefault(d.player_id, set()).add(d.display_name)
+    # player identity is stable across draft groups
+    assert all(len(v) == 1 for v in seen.values())
+
+
+@pytest.mark.parametrize('sport', ['MLB', 'NBA', 'NHL'])
+def test_other_sports(sport):
+    """Tests non-NFL lobbies parse"""
+    gen = LobbyGenerator(seed=1, sport=sport, n_teams=10)
+    lobby = gen.getcontests(100, n_game_sets=6)
+    gcd = Parser().getcontests(lobby)
+    assert gcd.sport == sport
+    assert gcd.classic_slates
+    ddoc = Parser().draftables(gen.draftables(lobby, lobby['DraftGroups'][0]['DraftGroupId']))
+    assert ddoc.draftables
+
+
+@pytest.mark.parametrize('sport_id', sorted(SPORT_GAMETYPES))
+def test_game_type_ids_unique(sport_id):
+    """Tests every game type, known or not, gets its own id"""
+    sport = {v: k for k, v in SPORT_IDS.items()}[sport_id]
+    lobby = LobbyGenerator(seed=1, sport=sport, n_teams=10).getcontests(100, n_game_sets=6)
+    ids = [gt['GameTypeId'] for gt in lobby['GameTypes']]
+    assert len(ids) == len(set(ids))
+    names = {gt['GameTypeId']: gt['Name'] for gt in lobby['GameTypes']}
+    dgs = {dg['DraftGroupId']: dg['GameTypeId'] for dg in lobby['DraftGroups']}
+    assert all(names[dgs[c['dg']]] == c['gameType'] for c in lobby['Contests'])